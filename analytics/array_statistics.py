@@ -0,0 +1,75 @@
+import numpy as np
+
+from settings import CellTypes
+
+
+class ArrayStatistics:
+    """
+    Calculates the world statistics of batch of worlds from their array state.
+    Each statistic is an array with value for each world, so stop conditions
+    evaluated on it give the result of all the worlds at once.
+    """
+
+    def __init__(self, state, generations, generation_transitions, generations_without_transitions):
+        """
+        Calculates the statistics of the worlds.
+
+        :param state: Array world state of the worlds
+        :param generations: Array of the generation of each world
+        :param generation_transitions: Array of the cell type transitions in the last generation of each world
+        :param generations_without_transitions: Array of the generations without transitions of each world
+        """
+        num_cells = state.shape[1] * state.shape[2]
+
+        self.generation = generations
+        self.num_cells = np.full(state.shape[0], num_cells)
+        self.mean_temp = state.temp.mean(axis=(1, 2))
+        self.max_temp = state.temp.max(axis=(1, 2))
+        self.mean_air_pollution = state.air_pollution.mean(axis=(1, 2))
+        self.num_winds = (state.wind_direction >= 0).sum(axis=(1, 2))
+        self.num_clouds = (state.cloud_precipitation >= 0).sum(axis=(1, 2))
+        self.generation_transitions = generation_transitions
+        self.generations_without_transitions = generations_without_transitions
+
+        flat_cell_types = state.cell_type.reshape(state.shape[0], num_cells)
+        self.__cell_counts = {
+            cell_type: (flat_cell_types == cell_type.value).sum(axis=1) for cell_type in CellTypes
+        }
+
+    @property
+    def cell_counts(self):
+        """
+        Getter for the number of cells of each cell type
+
+        :return: Dictionary of cell type as key and array of the number of cells in each world as value
+        """
+        return dict(self.__cell_counts)
+
+    def count(self, cell_type):
+        """
+        Returns the number of cells of the given cell type in each world
+
+        :param cell_type: Cell type to count
+        :return: Array of the number of cells of the given type in each world
+        """
+        return self.__cell_counts[cell_type]
+
+    def snapshot(self, world_index):
+        """
+        Creates snapshot of the statistics of single world, in the format of WorldStatistics.snapshot
+
+        :param world_index: Index of the world in the batch
+        :return: Dictionary of the statistics values
+        """
+        return {
+            'generation': int(self.generation[world_index]),
+            'cell_counts': {
+                cell_type.name: int(counts[world_index]) for cell_type, counts in self.__cell_counts.items()
+            },
+            'mean_temp': float(self.mean_temp[world_index]),
+            'max_temp': float(self.max_temp[world_index]),
+            'mean_air_pollution': float(self.mean_air_pollution[world_index]),
+            'num_winds': int(self.num_winds[world_index]),
+            'num_clouds': int(self.num_clouds[world_index]),
+            'generation_transitions': int(self.generation_transitions[world_index])
+        }
@@ -0,0 +1,62 @@
+class CycleDetector:
+    """
+    Detects fixed points and cycles of the world state by its hash in each generation.
+    """
+
+    def __init__(self):
+        self.__first_seen_generation = {}
+        self.__cycle_start = None
+        self.__cycle_length = None
+
+    @property
+    def cycle_detected(self):
+        """
+        Getter for whether a cycle was detected
+
+        :return: True if the world state repeated itself, Otherwise False
+        """
+        return self.__cycle_length is not None
+
+    @property
+    def is_fixed_point(self):
+        """
+        Getter for whether the world reached a fixed point (cycle of single generation)
+
+        :return: True if the world state stopped changing, Otherwise False
+        """
+        return self.__cycle_length == 1
+
+    @property
+    def cycle_start(self):
+        """
+        Getter for the first generation of the detected cycle
+
+        :return: Generation number, or None if no cycle detected
+        """
+        return self.__cycle_start
+
+    @property
+    def cycle_length(self):
+        """
+        Getter for the number of generations in the detected cycle
+
+        :return: Cycle length, or None if no cycle detected
+        """
+        return self.__cycle_length
+
+    def observe(self, generation, state_hash):
+        """
+        Observes the world state hash of a generation
+
+        :param generation: The generation number
+        :param state_hash: The world state hash in the generation
+        :return: True if a cycle was detected, Otherwise False
+        """
+        if self.__cycle_length is None:
+            first_seen_generation = self.__first_seen_generation.setdefault(state_hash, generation)
+
+            if first_seen_generation != generation:
+                self.__cycle_start = first_seen_generation
+                self.__cycle_length = generation - first_seen_generation
+
+        return self.cycle_detected
@@ -0,0 +1,232 @@
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from sys import getsizeof
+from types import FunctionType, ModuleType
+
+from analytics.run_metrics import resident_memory_bytes
+from cells.world_cell import WorldCell
+from cell_environment.wind import Wind
+from cell_environment.cloud import Cloud
+from settings import CellTypes
+
+# Attributes of the world cells which are accounted for by other subsystems
+CELL_SHARED_ATTRIBUTES = ['_wind_instance', '_cloud_instance', '_observer']
+
+
+def object_size(obj, seen=None, referenced_types=()):
+    """
+    Returns the deep size of object: the object itself and all the objects it references, each counted once.
+    Classes, modules and global namespaces of functions are never counted, as they belong to the program.
+
+    :param obj: Object to size
+    :param seen: Set of ids of the objects already counted, which are skipped (updated with the counted objects)
+    :param referenced_types: Types which instances are only referenced by the object, so are not counted
+                             (unless the object itself is one)
+    :return: Size in bytes
+    """
+    seen = set() if seen is None else seen
+    total_size = 0
+    pending_objects = [obj]
+
+    while pending_objects:
+        curr_obj = pending_objects.pop()
+
+        if id(curr_obj) in seen or isinstance(curr_obj, (type, ModuleType)):
+            continue
+
+        if curr_obj is not obj and isinstance(curr_obj, referenced_types):
+            continue
+
+        seen.add(id(curr_obj))
+        total_size += getsizeof(curr_obj)
+
+        if isinstance(curr_obj, dict):
+            pending_objects.extend(curr_obj.keys())
+            pending_objects.extend(curr_obj.values())
+        elif isinstance(curr_obj, (list, tuple, set, frozenset, deque)):
+            pending_objects.extend(curr_obj)
+        elif isinstance(curr_obj, FunctionType):
+            # Closures keep their captured values alive, unlike the globals they share with the module
+            pending_objects.extend(cell.cell_contents for cell in curr_obj.__closure__ or [])
+            pending_objects.extend(curr_obj.__defaults__ or [])
+        elif hasattr(curr_obj, 'nbytes') and hasattr(curr_obj, 'base'):
+            # Array views are sized as their header, the buffer belongs to the array they view
+            if curr_obj.base is not None:
+                pending_objects.append(curr_obj.base)
+        elif hasattr(curr_obj, '__dict__'):
+            pending_objects.append(vars(curr_obj))
+
+    return total_size
+
+
+class MemoryProfiler:
+    """
+    Attributes the memory of automaton to its subsystems, and traces the peak allocation of each phase
+    of the generations with tracemalloc.
+
+    The subsystems are sized by walking their objects (see object_size): the grid cells by their type,
+    the environment entities (winds and clouds), the array state of the array engines and the world observers
+    (statistics and their history, indices, hashes and counters). The generation changes lists of the reference
+    engine only live during a generation, so their size is recorded as they are created. The canvas items of GUI
+    live in Tk rather than Python, so they are counted and the resident memory growth of drawing them is traced.
+    """
+
+    def __init__(self):
+        """
+        Creates memory profiler, which traces allocations from now on until stopped.
+        """
+        self.__started_tracing = not tracemalloc.is_tracing()
+        self.__active_phase = None
+        self.__phase_peaks = {}
+        self.__last_phase_peaks = {}
+        self.__phase_resident_growth = {}
+        self.__generation_changes_size = 0
+        self.__generation_changes_peak_size = 0
+        self.__num_generation_changes = 0
+
+        if self.__started_tracing:
+            tracemalloc.start()
+
+    @property
+    def phase_peaks(self):
+        """
+        Getter for the peak allocation of each phase, over all the times it ran
+
+        :return: Dictionary of the peak bytes allocated by phase name
+        """
+        return dict(self.__phase_peaks)
+
+    @property
+    def last_phase_peaks(self):
+        """
+        Getter for the peak allocation of each phase, in the last time it ran
+
+        :return: Dictionary of the peak bytes allocated by phase name
+        """
+        return dict(self.__last_phase_peaks)
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Traces the peak allocation of a phase above what was allocated when it started, and the growth of the
+        resident memory (which includes allocations outside of Python). Phases nested in another phase are
+        part of the outer phase only.
+
+        :param name: Name of the phase
+        """
+        if self.__active_phase is not None or not tracemalloc.is_tracing():
+            yield
+            return
+
+        self.__active_phase = name
+        start_resident_size = resident_memory_bytes()
+        tracemalloc.reset_peak()
+        (start_size, _) = tracemalloc.get_traced_memory()
+
+        try:
+            yield
+        finally:
+            (_, peak_size) = tracemalloc.get_traced_memory()
+            self.__active_phase = None
+            self.__last_phase_peaks[name] = peak_size - start_size
+            self.__phase_peaks[name] = max(self.__phase_peaks.get(name, 0), peak_size - start_size)
+
+            if start_resident_size is not None:
+                self.__phase_resident_growth[name] = max(
+                    self.__phase_resident_growth.get(name, 0),
+                    resident_memory_bytes() - start_resident_size
+                )
+
+    def record_generation_changes(self, generation_changes):
+        """
+        Records the generation changes list of a generation, before they are applied
+
+        :param generation_changes: List of the generation changes of the cells
+        """
+        # The changes reference the cells and their environment, which are accounted for by the grid
+        self.__generation_changes_size = object_size(generation_changes, referenced_types=(WorldCell, Wind, Cloud))
+        self.__generation_changes_peak_size = max(self.__generation_changes_peak_size, self.__generation_changes_size)
+        self.__num_generation_changes = len(generation_changes)
+
+    def report(self, generation, world_grid, observers, array_state=None, canvas=None):
+        """
+        Creates report of the memory of automaton by subsystem (see CellularAutomaton.memory_report)
+
+        :param generation: The generation of the automaton
+        :param world_grid: World grid matrix of the automaton
+        :param observers: List of the world observers of the automaton
+        :param array_state: Array state of the array engines, None for the reference engine
+        :param canvas: Canvas of GUI which draws the automaton, None for no GUI
+        :return: Dictionary of the bytes of each subsystem and their breakdown, the peak allocation of
+                 the phases and the traced memory
+        """
+        seen = set()
+
+        # The observers keep references to the cells, which belong to the grid
+        observers_size = {}
+
+        for observer in observers:
+            observer_name = type(observer).__name__
+            observers_size[observer_name] = observers_size.get(observer_name, 0) + \
+                object_size(observer, seen, referenced_types=(WorldCell, Wind, Cloud))
+
+        cells_size = {cell_type.name: 0 for cell_type in CellTypes}
+        num_cells = {cell_type.name: 0 for cell_type in CellTypes}
+        environment_size = {'winds': 0, 'clouds': 0}
+        num_environment = {'winds': 0, 'clouds': 0}
+
+        for cells_row in world_grid:
+            for cell in cells_row:
+                cell_vars = vars(cell)
+                seen.update([id(cell), id(cell_vars)])
+                cells_size[cell.type.name] += getsizeof(cell) + getsizeof(cell_vars) + sum(
+                    object_size(value, seen)
+                    for attribute, value in cell_vars.items()
+                    if attribute not in CELL_SHARED_ATTRIBUTES
+                )
+                num_cells[cell.type.name] += 1
+
+                for (environment_name, environment_instance) in [('winds', cell.wind), ('clouds', cell.cloud)]:
+                    if environment_instance is not None:
+                        environment_size[environment_name] += object_size(environment_instance, seen)
+                        num_environment[environment_name] += 1
+
+        num_canvas_items = {}
+
+        for canvas_item in [] if canvas is None else canvas.find_all():
+            num_canvas_items[canvas.type(canvas_item)] = num_canvas_items.get(canvas.type(canvas_item), 0) + 1
+
+        (traced_size, traced_peak_size) = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+
+        return {
+            'generation': generation,
+            'subsystems': {
+                'grid_cells': sum(cells_size.values()) + object_size(world_grid, seen, referenced_types=(WorldCell,)),
+                'environment': sum(environment_size.values()),
+                'generation_changes': self.__generation_changes_size,
+                'array_state': 0 if array_state is None else object_size(array_state, seen),
+                'observers': sum(observers_size.values()),
+                'canvas_items': self.__phase_resident_growth.get('draw')
+            },
+            'grid_cells_by_type': cells_size,
+            'num_cells_by_type': num_cells,
+            'environment_by_type': environment_size,
+            'num_environment_by_type': num_environment,
+            'observers_by_type': observers_size,
+            'generation_changes_peak': self.__generation_changes_peak_size,
+            'num_generation_changes': self.__num_generation_changes,
+            'num_canvas_items_by_type': num_canvas_items,
+            'phase_peaks': self.phase_peaks,
+            'phase_resident_growth': dict(self.__phase_resident_growth),
+            'traced': traced_size,
+            'traced_peak': traced_peak_size,
+            'resident': resident_memory_bytes()
+        }
+
+    def stop(self):
+        """
+        Stops tracing the allocations, if the profiler started tracing them
+        """
+        if self.__started_tracing and tracemalloc.is_tracing():
+            tracemalloc.stop()
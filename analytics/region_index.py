@@ -0,0 +1,154 @@
+import numpy as np
+
+from settings import CellTypes
+
+
+class RegionIndex:
+    """
+    Answers rectangular region queries over the world in constant time,
+    by keeping summed-area tables of the world arrays.
+
+    Regions are given as (top, left, bottom, right) where bottom and right are exclusive,
+    same as slicing the world grid.
+    """
+    __fields = ['temp', 'air_pollution']
+
+    def __init__(self, world_arrays):
+        """
+        Creates region index over the given world arrays.
+        The summed-area tables are rebuilt lazily, only when queried after the arrays changed.
+
+        :param world_arrays: World arrays instance to index
+        """
+        self.__world_arrays = world_arrays
+        self.__built_version = None
+        self.__tables = {}
+        self.__type_counts_table = None
+
+    def sum(self, field, region):
+        """
+        Calculates the sum of a field in the given region
+
+        :param field: Field name to sum (temp or air_pollution)
+        :param region: (top, left, bottom, right) region
+        :return: Sum of the field values in the region
+        """
+        return float(RegionIndex.__region_sums(self.__get_table(field), np.asarray(region)))
+
+    def mean(self, field, region):
+        """
+        Calculates the mean of a field in the given region
+
+        :param field: Field name to average (temp or air_pollution)
+        :param region: (top, left, bottom, right) region
+        :return: Mean of the field values in the region
+        """
+        return self.sum(field, region) / RegionIndex.__region_size(np.asarray(region))
+
+    def count(self, cell_type, region):
+        """
+        Counts the cells of the given cell type in the given region
+
+        :param cell_type: Cell type to count
+        :param region: (top, left, bottom, right) region
+        :return: Number of cells of the cell type in the region
+        """
+        self.__rebuild_if_needed()
+        return int(RegionIndex.__region_sums(self.__type_counts_table[cell_type.value], np.asarray(region)))
+
+    def sums(self, field, regions):
+        """
+        Calculates the sums of a field in many regions at once
+
+        :param field: Field name to sum (temp or air_pollution)
+        :param regions: Sequence or array of (top, left, bottom, right) regions
+        :return: Array of the sums, one for each region
+        """
+        return RegionIndex.__region_sums(self.__get_table(field), np.asarray(regions))
+
+    def means(self, field, regions):
+        """
+        Calculates the means of a field in many regions at once
+
+        :param field: Field name to average (temp or air_pollution)
+        :param regions: Sequence or array of (top, left, bottom, right) regions
+        :return: Array of the means, one for each region
+        """
+        regions = np.asarray(regions)
+        return RegionIndex.__region_sums(self.__get_table(field), regions) / RegionIndex.__region_size(regions)
+
+    def counts(self, cell_type, regions):
+        """
+        Counts the cells of the given cell type in many regions at once
+
+        :param cell_type: Cell type to count
+        :param regions: Sequence or array of (top, left, bottom, right) regions
+        :return: Array of the counts, one for each region
+        """
+        self.__rebuild_if_needed()
+        return RegionIndex.__region_sums(self.__type_counts_table[cell_type.value], np.asarray(regions))
+
+    def __get_table(self, field):
+        """
+        Returns the summed-area table of the given field
+
+        :param field: Field name
+        :return: Summed-area table of the field
+        """
+        if field not in RegionIndex.__fields:
+            raise ValueError(f'Unknown region index field "{field}".')
+
+        self.__rebuild_if_needed()
+        return self.__tables[field]
+
+    def __rebuild_if_needed(self):
+        """
+        Rebuilds the summed-area tables if the world arrays changed since the last build
+        """
+        if self.__built_version == self.__world_arrays.version:
+            return
+
+        for field in RegionIndex.__fields:
+            self.__tables[field] = RegionIndex.__summed_area_table(getattr(self.__world_arrays, field))
+
+        # One hot encoding of the cell types, so each type has its own counts table
+        type_values = np.array([cell_type.value for cell_type in CellTypes], dtype=np.int8)
+        one_hot_types = self.__world_arrays.cell_type[np.newaxis, :, :] == type_values[:, np.newaxis, np.newaxis]
+        self.__type_counts_table = RegionIndex.__summed_area_table(one_hot_types.astype(np.int64))
+
+        self.__built_version = self.__world_arrays.version
+
+    @staticmethod
+    def __summed_area_table(values):
+        """
+        Builds summed-area table for the last two axes of the values, padded with zeros
+        at the first row and column so region sums don't need boundary checks
+
+        :param values: Array of values
+        :return: Summed-area table of the values
+        """
+        table = np.zeros(values.shape[:-2] + (values.shape[-2] + 1, values.shape[-1] + 1), dtype=values.dtype)
+        table[..., 1:, 1:] = values.cumsum(axis=-2).cumsum(axis=-1)
+        return table
+
+    @staticmethod
+    def __region_sums(table, regions):
+        """
+        Calculates region sums from summed-area table
+
+        :param table: Summed-area table
+        :param regions: Array of (top, left, bottom, right) regions (or single region)
+        :return: Sums of the regions
+        """
+        top, left, bottom, right = regions[..., 0], regions[..., 1], regions[..., 2], regions[..., 3]
+        return table[..., bottom, right] - table[..., top, right] - table[..., bottom, left] + table[..., top, left]
+
+    @staticmethod
+    def __region_size(regions):
+        """
+        Calculates the number of cells in the regions
+
+        :param regions: Array of (top, left, bottom, right) regions (or single region)
+        :return: Number of cells in each region
+        """
+        return (regions[..., 2] - regions[..., 0]) * (regions[..., 3] - regions[..., 1])
@@ -0,0 +1,273 @@
+import sys
+from argparse import ArgumentParser
+from collections import deque
+from json import dumps
+from random import seed as random_seed
+
+from settings import LogicSettings, CellTypes
+from world_observer import WorldObserver
+
+# Names of the counters, each counts how many times a rule fired
+COUNTER_NAMES = [
+    'cloud_generations',
+    'cloud_rains',
+    'wind_generations',
+    'air_pollution_cools',
+    'air_pollution_heats',
+    'transitions_met',
+    'rain_transitions_met',
+    'neighbors_changes_emitted',
+    'wind_moves',
+    'wind_reflections',
+    'wind_stuck',
+    'wind_rays_applied',
+    'wind_rays_clipped',
+    'neighbors_changes_applied',
+    'neighbors_changes_clipped',
+    'cell_changes'
+]
+
+# Indices of the counters, for counting them in the hot paths
+(
+    CLOUD_GENERATIONS,
+    CLOUD_RAINS,
+    WIND_GENERATIONS,
+    AIR_POLLUTION_COOLS,
+    AIR_POLLUTION_HEATS,
+    TRANSITIONS_MET,
+    RAIN_TRANSITIONS_MET,
+    NEIGHBORS_CHANGES_EMITTED,
+    WIND_MOVES,
+    WIND_REFLECTIONS,
+    WIND_STUCK,
+    WIND_RAYS_APPLIED,
+    WIND_RAYS_CLIPPED,
+    NEIGHBORS_CHANGES_APPLIED,
+    NEIGHBORS_CHANGES_CLIPPED,
+    CELL_CHANGES
+) = range(len(COUNTER_NAMES))
+
+
+class RuleCounters(WorldObserver):
+    """
+    Counts how many times each rule fired in each generation, and the cell type transitions of each generation
+    as matrix of (old type, new type).
+
+    The rules of the world cells (WorldCell.next_generation and its subclasses) and of the generation changes
+    (CellularAutomaton.apply_generation_change) count into the counters of their world observers group,
+    while the counting is enabled. The rules are fired only by the reference engine, the array engines
+    count the transitions only (of all the generations since the last sync).
+    """
+    __default_history_size = 1000
+
+    def __init__(self, history_size=__default_history_size):
+        """
+        Creates rule counters.
+
+        :param history_size: Maximum number of generations kept in the counters history (None for unlimited)
+        """
+        num_cell_types = len(CellTypes)
+
+        # Counted by the hot paths, so they are plain lists until the generation passes
+        self.counts = [0] * len(COUNTER_NAMES)
+        self.__transitions = [[0] * num_cell_types for _ in range(num_cell_types)]
+
+        self.__generation = None
+        self.__generation_counts = [0] * len(COUNTER_NAMES)
+        self.__generation_transitions = [[0] * num_cell_types for _ in range(num_cell_types)]
+        self.__total_counts = [0] * len(COUNTER_NAMES)
+        self.__total_transitions = [[0] * num_cell_types for _ in range(num_cell_types)]
+        self.__history = deque(maxlen=history_size)
+
+    @property
+    def generation(self):
+        """
+        Getter for the last generation counted
+
+        :return: Generation number, or None if no generation passed yet
+        """
+        return self.__generation
+
+    @property
+    def generation_counts(self):
+        """
+        Getter for the counters of the last generation
+
+        :return: Array of the counts, in the order of COUNTER_NAMES
+        """
+        # Imported here since numpy is only required for the array based features
+        import numpy as np
+
+        return np.array(self.__generation_counts, dtype=np.int64)
+
+    @property
+    def transition_matrix(self):
+        """
+        Getter for the cell type transitions of the last generation
+
+        :return: Array of the transitions counts, in the shape (old cell type, new cell type)
+        """
+        import numpy as np
+
+        return np.array(self.__generation_transitions, dtype=np.int64)
+
+    @property
+    def total_counts(self):
+        """
+        Getter for the counters of all the generations counted
+
+        :return: Array of the counts, in the order of COUNTER_NAMES
+        """
+        import numpy as np
+
+        return np.array(self.__total_counts, dtype=np.int64)
+
+    @property
+    def total_transition_matrix(self):
+        """
+        Getter for the cell type transitions of all the generations counted
+
+        :return: Array of the transitions counts, in the shape (old cell type, new cell type)
+        """
+        import numpy as np
+
+        return np.array(self.__total_transitions, dtype=np.int64)
+
+    @property
+    def history(self):
+        """
+        Getter for the counters history
+
+        :return: Tuple of array of the counts in the shape (generations, counters), and array of the transitions
+                 in the shape (generations, old cell type, new cell type)
+        """
+        import numpy as np
+
+        num_cell_types = len(CellTypes)
+
+        return (
+            np.array([counts for (counts, _) in self.__history], dtype=np.int64).reshape(-1, len(COUNTER_NAMES)),
+            np.array(
+                [transitions for (_, transitions) in self.__history],
+                dtype=np.int64
+            ).reshape(-1, num_cell_types, num_cell_types)
+        )
+
+    def move_counts(self, counts):
+        """
+        Adds counts to the counters of the current generation, and zeroes them
+
+        :param counts: List of counts, in the order of COUNTER_NAMES
+        """
+        for (counter_index, count) in enumerate(counts):
+            if count:
+                self.counts[counter_index] += count
+                counts[counter_index] = 0
+
+    def count(self, name):
+        """
+        Returns the count of a counter in the last generation
+
+        :param name: Name of the counter (one of COUNTER_NAMES)
+        :return: Count of the counter
+        """
+        if name not in COUNTER_NAMES:
+            raise ValueError(f'Unknown rule counter given "{name}".')
+
+        return self.__generation_counts[COUNTER_NAMES.index(name)]
+
+    def snapshot(self):
+        """
+        Creates snapshot of the counters of the last generation
+
+        :return: Dictionary of the generation, the counts by their names and the transitions matrix
+        """
+        return {
+            'generation': self.__generation,
+            'counts': dict(zip(COUNTER_NAMES, self.__generation_counts)),
+            'transitions': [list(transitions_row) for transitions_row in self.__generation_transitions]
+        }
+
+    def cell_replaced(self, location, old_cell_instance, new_cell_instance):
+        self.__transitions[old_cell_instance.type.value][new_cell_instance.type.value] += 1
+
+    def generation_passed(self, generation):
+        self.__generation = generation
+        self.__generation_counts = self.counts
+        self.__generation_transitions = self.__transitions
+
+        for counter_index, count in enumerate(self.__generation_counts):
+            self.__total_counts[counter_index] += count
+
+        for old_type_value, transitions_row in enumerate(self.__generation_transitions):
+            for new_type_value, count in enumerate(transitions_row):
+                self.__total_transitions[old_type_value][new_type_value] += count
+
+        self.__history.append((self.__generation_counts, self.__generation_transitions))
+
+        # The lists counted so far are kept as the last generation, new ones are counted into
+        self.counts = [0] * len(COUNTER_NAMES)
+        self.__transitions = [[0] * len(CellTypes) for _ in CellTypes]
+
+
+def counter_errors(automaton, num_generations):
+    """
+    Passes number of generations of automaton of the reference engine with the rule counters enabled, and checks
+    the counters against the world: each cloud and each wind is counted once a generation, and each cell change
+    is counted once by the transitions met and once by the transitions matrix
+
+    :param automaton: Cellular automaton instance of the reference engine
+    :param num_generations: Number of generations to check
+    :return: List of the texts of the failed checks, empty if all of them passed
+    """
+    rule_counters = automaton.enable_rule_counters()
+    errors = []
+
+    for _ in range(num_generations):
+        num_clouds = sum(cell.cloud is not None for row in automaton.world_grid for cell in row)
+        num_winds = sum(cell.wind is not None for row in automaton.world_grid for cell in row)
+        automaton.next_generation()
+
+        generation = rule_counters.generation
+        counts = rule_counters.snapshot()['counts']
+        expected_counts = {
+            'cloud_generations': num_clouds,
+            'wind_generations': num_winds,
+            'transitions_met': counts['cell_changes'] - counts['rain_transitions_met'],
+            'cell_changes': int(rule_counters.transition_matrix.sum())
+        }
+
+        errors.extend(
+            f'Generation {generation} counted {counts[name]} {name} instead of {expected_count}.'
+            for name, expected_count in expected_counts.items()
+            if counts[name] != expected_count
+        )
+
+    return errors
+
+
+def parse_arguments():
+    """
+    Parses the command line arguments of the rule counters check
+
+    :return: Parsed arguments
+    """
+    parser = ArgumentParser(description='Checks the rule counters against the world of the reference engine.')
+    parser.add_argument('--world', default=LogicSettings.WORLD_FILE_PATH, help='Path to world file')
+    parser.add_argument('--rules', default=LogicSettings.RULES_FILE_PATH, help='Path to rules file')
+    parser.add_argument('--generations', type=int, default=50, help='Number of generations to check')
+    parser.add_argument('--seed', type=int, default=1, help='Seed for the random initial conditions')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    # Imported here since the automaton imports the rule counters
+    from cellular_automaton import CellularAutomaton
+    from rules import RuleSet, RuleTables
+
+    arguments = parse_arguments()
+    RuleTables.activate(RuleSet.load(arguments.rules).compile())
+    random_seed(arguments.seed)
+    check_errors = counter_errors(CellularAutomaton(arguments.world), arguments.generations)
+    print(dumps({'generations': arguments.generations, 'errors': check_errors}, indent=4))
+    sys.exit(1 if check_errors else 0)
@@ -0,0 +1,356 @@
+from collections import deque
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from os import replace, sysconf
+from threading import Lock, Thread, Event
+from time import monotonic
+
+# Step latency quantiles published by the metrics
+LATENCY_QUANTILES = [0.5, 0.9, 0.99]
+
+# Content type of the Prometheus text exposition format
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def resident_memory_bytes():
+    """
+    Returns the resident memory of the current process
+
+    :return: Resident memory in bytes, or None if it's not available on this platform
+    """
+    try:
+        with open('/proc/self/statm', 'r') as statm_file:
+            return int(statm_file.read().split()[1]) * sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        pass
+
+    try:
+        # The peak resident memory is the closest available, in kilobytes (bytes on macOS)
+        from resource import getrusage, RUSAGE_SELF
+        from sys import platform
+
+        max_rss = getrusage(RUSAGE_SELF).ru_maxrss
+        return max_rss if platform == 'darwin' else max_rss * 1024
+    except ImportError:
+        return None
+
+
+class RunMetrics:
+    """
+    Live metrics of a running automaton, fed by the timings of its generations (see
+    CellularAutomaton.enable_metrics) and by the outputs of the run (checkpoints and exports).
+    The generations are recorded by the thread running the automaton, while the metrics may be rendered
+    by any other thread.
+    """
+    __default_window_size = 1000
+
+    def __init__(self, window_size=__default_window_size):
+        """
+        Creates run metrics.
+
+        :param window_size: Number of recent generations the rate and the latency quantiles are calculated over
+        """
+        self.__lock = Lock()
+        self.__start_time = monotonic()
+        self.__generation = 0
+        self.__num_generations = 0
+        self.__num_cells = 0
+        self.__cells_processed = 0
+        self.__num_winds = 0
+        self.__num_clouds = 0
+        self.__step_seconds_total = 0.0
+        self.__last_generation_time = None
+        self.__recent_steps = deque(maxlen=window_size)
+        self.__outputs = {}
+
+    @property
+    def generation(self):
+        """
+        Getter for the last generation recorded
+
+        :return: Generation number
+        """
+        return self.__generation
+
+    def record_generation(self, generation, step_seconds, num_cells, num_winds, num_clouds):
+        """
+        Records generation which passed
+
+        :param generation: The generation number
+        :param step_seconds: Seconds it took to pass the generation
+        :param num_cells: Number of cells processed by the generation
+        :param num_winds: Number of active winds after the generation
+        :param num_clouds: Number of clouds after the generation
+        """
+        with self.__lock:
+            self.__generation = generation
+            self.__num_generations += 1
+            self.__num_cells = num_cells
+            self.__cells_processed += num_cells
+            self.__num_winds = num_winds
+            self.__num_clouds = num_clouds
+            self.__step_seconds_total += step_seconds
+            self.__last_generation_time = monotonic()
+            self.__recent_steps.append((self.__last_generation_time, step_seconds))
+
+    def record_output(self, kind, generation):
+        """
+        Records output of the run which completed, such as checkpoint or exported frame
+
+        :param kind: Kind of the output, the lag is published for each kind
+        :param generation: The generation the output is of
+        """
+        with self.__lock:
+            (last_generation, _) = self.__outputs.get(kind, (None, None))
+
+            # Outputs may complete out of order, the lag is of the latest generation completed
+            if last_generation is None or generation >= last_generation:
+                self.__outputs[kind] = (generation, monotonic())
+
+    def generations_per_second(self):
+        """
+        Returns the rate of the recent generations, including the time between them
+
+        :return: Generations per second, 0 before two generations were recorded
+        """
+        with self.__lock:
+            return self.__generations_per_second()
+
+    def latency_quantiles(self):
+        """
+        Returns the quantiles of the recent generations step latency
+
+        :return: Dictionary of the step seconds by quantile (see LATENCY_QUANTILES), empty if none recorded
+        """
+        with self.__lock:
+            return self.__latency_quantiles()
+
+    def snapshot(self):
+        """
+        Creates snapshot of the current metrics
+
+        :return: Dictionary of the metrics values
+        """
+        with self.__lock:
+            now = monotonic()
+
+            return {
+                'generation': self.__generation,
+                'generations_total': self.__num_generations,
+                'generations_per_second': self.__generations_per_second(),
+                'step_seconds_total': self.__step_seconds_total,
+                'step_seconds_quantiles': self.__latency_quantiles(),
+                'seconds_since_last_generation':
+                    None if self.__last_generation_time is None else now - self.__last_generation_time,
+                'cells': self.__num_cells,
+                'cells_processed_total': self.__cells_processed,
+                'winds': self.__num_winds,
+                'clouds': self.__num_clouds,
+                'resident_memory_bytes': resident_memory_bytes(),
+                'uptime_seconds': now - self.__start_time,
+                'outputs': {
+                    kind: {
+                        'generation': output_generation,
+                        'lag_generations': self.__generation - output_generation,
+                        'seconds_since': now - output_time
+                    }
+                    for kind, (output_generation, output_time) in self.__outputs.items()
+                }
+            }
+
+    def render(self):
+        """
+        Renders the current metrics in the Prometheus text exposition format
+
+        :return: Metrics text
+        """
+        snapshot = self.snapshot()
+        lines = []
+
+        def add_metric(name, metric_type, help_text, samples):
+            lines.append(f'# HELP automaton_{name} {help_text}')
+            lines.append(f'# TYPE automaton_{name} {metric_type}')
+
+            for labels, value in samples:
+                if value is not None:
+                    labels_text = ','.join(f'{label}="{label_value}"' for label, label_value in labels.items())
+                    lines.append(
+                        f'automaton_{name}{{{labels_text}}} {value}' if labels_text else f'automaton_{name} {value}'
+                    )
+
+        add_metric('generation', 'gauge', 'Last generation passed.', [({}, snapshot['generation'])])
+        add_metric('generations_total', 'counter', 'Generations passed by this process.',
+                   [({}, snapshot['generations_total'])])
+        add_metric('generations_per_second', 'gauge', 'Rate of the recent generations.',
+                   [({}, snapshot['generations_per_second'])])
+        add_metric('step_seconds', 'summary', 'Seconds it took to pass the recent generations.', [
+            ({'quantile': quantile}, seconds) for quantile, seconds in snapshot['step_seconds_quantiles'].items()
+        ])
+        lines.append(f'automaton_step_seconds_sum {snapshot["step_seconds_total"]}')
+        lines.append(f'automaton_step_seconds_count {snapshot["generations_total"]}')
+        add_metric('seconds_since_last_generation', 'gauge', 'Seconds since the last generation passed.',
+                   [({}, snapshot['seconds_since_last_generation'])])
+        add_metric('cells', 'gauge', 'Number of cells in the world.', [({}, snapshot['cells'])])
+        add_metric('cells_processed_total', 'counter', 'Cells processed by all the generations.',
+                   [({}, snapshot['cells_processed_total'])])
+        add_metric('winds', 'gauge', 'Number of active winds.', [({}, snapshot['winds'])])
+        add_metric('clouds', 'gauge', 'Number of clouds.', [({}, snapshot['clouds'])])
+        add_metric('resident_memory_bytes', 'gauge', 'Resident memory of the process.',
+                   [({}, snapshot['resident_memory_bytes'])])
+        add_metric('uptime_seconds', 'gauge', 'Seconds since the metrics were created.',
+                   [({}, snapshot['uptime_seconds'])])
+        add_metric('output_lag_generations', 'gauge', 'Generations passed since the latest completed output.', [
+            ({'kind': kind}, output['lag_generations']) for kind, output in snapshot['outputs'].items()
+        ])
+        add_metric('output_lag_seconds', 'gauge', 'Seconds since the latest output completed.', [
+            ({'kind': kind}, output['seconds_since']) for kind, output in snapshot['outputs'].items()
+        ])
+
+        return '\n'.join(lines) + '\n'
+
+    def __generations_per_second(self):
+        """
+        Calculates the rate of the recent generations, the lock must be held
+
+        :return: Generations per second
+        """
+        if len(self.__recent_steps) < 2:
+            return 0.0
+
+        elapsed = self.__recent_steps[-1][0] - self.__recent_steps[0][0]
+        return (len(self.__recent_steps) - 1) / elapsed if elapsed > 0 else 0.0
+
+    def __latency_quantiles(self):
+        """
+        Calculates the quantiles of the recent step latency, the lock must be held
+
+        :return: Dictionary of the step seconds by quantile
+        """
+        if not self.__recent_steps:
+            return {}
+
+        step_seconds = sorted(seconds for (_, seconds) in self.__recent_steps)
+        return {
+            quantile: step_seconds[min(int(quantile * len(step_seconds)), len(step_seconds) - 1)]
+            for quantile in LATENCY_QUANTILES
+        }
+
+
+class MetricsExporter:
+    """
+    Publishes run metrics for node monitoring, as Prometheus text endpoint over HTTP and/or as textfile
+    which is rewritten periodically (for the textfile collector of the node exporter).
+    Both run in background daemon threads, so the run itself is never blocked by them.
+    """
+
+    def __init__(self, metrics, port=None, textfile_path=None, host='127.0.0.1', interval=5.0):
+        """
+        Creates metrics exporter.
+
+        :param metrics: Run metrics to publish
+        :param port: Port of the HTTP endpoint, None for no endpoint (0 for any free port)
+        :param textfile_path: Path to the textfile, None for no textfile
+        :param host: Host the HTTP endpoint listens on, local only by default
+        :param interval: Seconds between the rewrites of the textfile
+        """
+        self.__metrics = metrics
+        self.__port = port
+        self.__textfile_path = textfile_path
+        self.__host = host
+        self.__interval = interval
+        self.__server = None
+        self.__threads = []
+        self.__closed = Event()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def port(self):
+        """
+        Getter for the port of the HTTP endpoint (the actual port once started when 0 was given)
+
+        :return: Port number, or None if there's no endpoint
+        """
+        if self.__server is not None:
+            return self.__server.server_address[1]
+
+        return self.__port
+
+    def start(self):
+        """
+        Starts the HTTP endpoint and the textfile rewrites
+        """
+        if self.__port is not None:
+            self.__server = ThreadingHTTPServer((self.__host, self.__port), self.__request_handler())
+            self.__server.daemon_threads = True
+            self.__threads.append(Thread(target=self.__server.serve_forever, daemon=True))
+
+        if self.__textfile_path is not None:
+            self.__threads.append(Thread(target=self.__rewrite_textfile, daemon=True))
+
+        for thread in self.__threads:
+            thread.start()
+
+    def close(self):
+        """
+        Stops the HTTP endpoint and writes the textfile one last time
+        """
+        self.__closed.set()
+
+        if self.__server is not None:
+            self.__server.shutdown()
+            self.__server.server_close()
+
+        for thread in self.__threads:
+            thread.join()
+
+        self.__threads.clear()
+
+    def write_textfile(self):
+        """
+        Writes the metrics to the textfile, atomically so the collector never reads partial file
+        """
+        with open(f'{self.__textfile_path}.tmp', 'w') as textfile:
+            textfile.write(self.__metrics.render())
+
+        replace(f'{self.__textfile_path}.tmp', self.__textfile_path)
+
+    def __rewrite_textfile(self):
+        """
+        Rewrites the textfile every interval until the exporter is closed
+        """
+        while not self.__closed.wait(self.__interval):
+            self.write_textfile()
+
+        self.write_textfile()
+
+    def __request_handler(self):
+        """
+        Creates request handler class of the HTTP endpoint
+
+        :return: Request handler class
+        """
+        metrics = self.__metrics
+
+        class MetricsRequestHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ['/', '/metrics']:
+                    self.send_error(404)
+                    return
+
+                body = metrics.render().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                # Scrapes are periodic, logging each of them would flood the run output
+                pass
+
+        return MetricsRequestHandler
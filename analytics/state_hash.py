@@ -0,0 +1,84 @@
+from world_observer import WorldObserver
+
+
+class StateHasher(WorldObserver):
+    """
+    Maintains Zobrist style hash of the whole world state.
+    Each (location, field, value) contributes a pseudo random key which is XORed into the hash,
+    so each change updates the hash in constant time, without rehashing unchanged cells.
+    """
+    __cell_fields = ['type', 'temp', 'air_pollution', 'wind', 'cloud']
+
+    def __init__(self, seed=0):
+        """
+        Creates state hasher of empty world.
+
+        :param seed: Seed for the keys generation, different seeds produce different hash values
+        """
+        self.__seed = seed
+        self.__hash = 0
+
+        # Current key contributed by each (location, field), so it can be XORed out on change
+        self.__contributions = {}
+
+    @property
+    def hash(self):
+        """
+        Getter for the hash of the current world state
+
+        :return: World state hash value
+        """
+        return self.__hash
+
+    def cell_added(self, location, cell_instance):
+        self.__set_contribution(location, 'type', cell_instance.type.value)
+        self.__set_contribution(location, 'temp', cell_instance.temp)
+        self.__set_contribution(location, 'air_pollution', cell_instance.air_pollution)
+        self.__set_contribution(location, 'wind', StateHasher.__wind_value(cell_instance.wind))
+        self.__set_contribution(location, 'cloud', StateHasher.__cloud_value(cell_instance.cloud))
+
+    def cell_removed(self, location, cell_instance):
+        for field in StateHasher.__cell_fields:
+            self.__hash ^= self.__contributions.pop((location, field), 0)
+
+    def cell_changed(self, location, field, old_value, new_value):
+        if field == 'wind':
+            self.__set_contribution(location, 'wind', StateHasher.__wind_value(new_value))
+        elif field == 'cloud':
+            self.__set_contribution(location, 'cloud', StateHasher.__cloud_value(new_value))
+        elif field == 'precipitation':
+            self.__set_contribution(location, 'cloud', new_value)
+        else:
+            self.__set_contribution(location, field, new_value)
+
+    def __set_contribution(self, location, field, value):
+        """
+        Replaces the key contributed to the hash by the given location and field
+
+        :param location: (row, col) location of the cell
+        :param field: Field name of the cell
+        :param value: The new value of the field
+        """
+        new_key = hash((self.__seed, location, field, value))
+        self.__hash ^= self.__contributions.get((location, field), 0) ^ new_key
+        self.__contributions[(location, field)] = new_key
+
+    @staticmethod
+    def __wind_value(wind_instance):
+        """
+        Returns the hashed value of wind instance
+
+        :param wind_instance: Wind instance or None
+        :return: Value representing the wind state
+        """
+        return None if wind_instance is None else (wind_instance.direction, wind_instance.speed)
+
+    @staticmethod
+    def __cloud_value(cloud_instance):
+        """
+        Returns the hashed value of cloud instance
+
+        :param cloud_instance: Cloud instance or None
+        :return: Value representing the cloud state
+        """
+        return None if cloud_instance is None else cloud_instance.precipitation
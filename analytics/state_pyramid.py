@@ -0,0 +1,259 @@
+import numpy as np
+
+from settings import CellTypes
+
+
+class PyramidLevel:
+    """
+    Represent the aggregated state of single level of state pyramid, as world state of its blocks:
+    the dominant cell type, the mean temperature and the mean air pollution of each block.
+    """
+
+    def __init__(self, level, cell_type, temp, air_pollution):
+        """
+        Creates pyramid level state.
+
+        :param level: The level, blocks of 2 ** level by 2 ** level cells
+        :param cell_type: Array of the dominant cell type value of each block
+        :param temp: Array of the mean temperature of each block
+        :param air_pollution: Array of the mean air pollution of each block
+        """
+        self.level = level
+        self.cell_type = cell_type
+        self.temp = temp
+        self.air_pollution = air_pollution
+
+
+class StatePyramid:
+    """
+    Keeps multi resolution pyramid of the world state, where each level aggregates blocks of 2 by 2 blocks of
+    the level below it: level 0 is the cells, level 1 is blocks of 2 by 2 cells, level 2 of 4 by 4 cells and so on
+    up to single block of the whole world. Each block keeps the sums of the temperature and air pollution and
+    the counts of the cell types of its cells, for the means and the dominant cell type.
+
+    Updating the pyramid finds the changed cells, and recalculates only the blocks which contain them (from their
+    children blocks, so no error accumulates). Queries read only the blocks of the requested region.
+
+    Regions are given in blocks of the queried level as (top, left, bottom, right), where bottom and right are
+    exclusive, same as slicing.
+    """
+    __fields = ['temp', 'air_pollution']
+
+    def __init__(self, state):
+        """
+        Creates state pyramid of world state.
+
+        :param state: World state with cell_type, temp and air_pollution arrays (such as WorldArrays)
+        """
+        self.__shape = state.temp.shape
+        self.__num_levels = 1 + int(np.ceil(np.log2(max(self.__shape)))) if max(self.__shape) > 1 else 1
+        self.__levels = []
+
+        # Each level is allocated twice the size of the level above it, so its blocks group in whole 2 by 2
+        for level in range(self.__num_levels):
+            level_shape = self.__padded_level_shape(level)
+            self.__levels.append({
+                'temp': np.zeros(level_shape, dtype=np.float64),
+                'air_pollution': np.zeros(level_shape, dtype=np.float64),
+                'count': np.zeros(level_shape, dtype=np.int64),
+                'type_counts': np.zeros((len(CellTypes), *level_shape), dtype=np.int64)
+            })
+
+        (num_rows, num_cols) = self.__shape
+        self.__cell_type = np.full(self.__levels[0]['count'].shape, -1, dtype=np.int8)
+        self.__levels[0]['count'][:num_rows, :num_cols] = 1
+        self.__update_cells(state, np.ones(self.__shape, dtype=bool))
+
+        for level in range(1, self.__num_levels):
+            (level_rows, level_cols) = self.level_shape(level)
+
+            for (name, child_values) in self.__levels[level - 1].items():
+                self.__levels[level][name][..., :level_rows, :level_cols] = \
+                    child_values[..., :2 * level_rows, :2 * level_cols].reshape(
+                        *child_values.shape[:-2], level_rows, 2, level_cols, 2
+                    ).sum(axis=(-3, -1))
+
+    @property
+    def num_levels(self):
+        """
+        Getter for the number of levels, the top level is single block of the whole world
+
+        :return: Number of levels
+        """
+        return self.__num_levels
+
+    def block_size(self, level):
+        """
+        Returns the size in cells of the blocks of a level
+
+        :param level: The level
+        :return: Block size
+        """
+        self.__check_level(level)
+        return 2 ** level
+
+    def level_shape(self, level):
+        """
+        Returns the number of blocks of a level
+
+        :param level: The level
+        :return: (num_rows, num_cols) of the blocks
+        """
+        self.__check_level(level)
+        return tuple(-(-size // 2 ** level) for size in self.__shape)
+
+    def level_for_size(self, num_rows, num_cols):
+        """
+        Returns the finest level which fits in a view, so overviews read no more blocks than they show
+
+        :param num_rows: Number of rows the view shows
+        :param num_cols: Number of columns the view shows
+        :return: The level
+        """
+        for level in range(self.__num_levels):
+            (level_rows, level_cols) = self.level_shape(level)
+
+            if level_rows <= num_rows and level_cols <= num_cols:
+                return level
+
+        return self.__num_levels - 1
+
+    def means(self, field, level, region=None):
+        """
+        Returns the means of a field in the blocks of a region
+
+        :param field: Field name (temp or air_pollution)
+        :param level: The level of the blocks
+        :param region: (top, left, bottom, right) region in blocks, None for the whole level
+        :return: Array of the means of the blocks in the region
+        """
+        if field not in StatePyramid.__fields:
+            raise ValueError(f'Unknown state pyramid field "{field}".')
+
+        blocks = self.__region_blocks(level, region)
+        return self.__levels[level][field][blocks] / self.__levels[level]['count'][blocks]
+
+    def counts(self, cell_type, level, region=None):
+        """
+        Returns the counts of cell type in the blocks of a region
+
+        :param cell_type: Cell type to count
+        :param level: The level of the blocks
+        :param region: (top, left, bottom, right) region in blocks, None for the whole level
+        :return: Array of the counts of the blocks in the region
+        """
+        return self.__levels[level]['type_counts'][(cell_type.value, *self.__region_blocks(level, region))]
+
+    def dominant_types(self, level, region=None):
+        """
+        Returns the dominant cell type value (the most common, the lowest value on ties) in the blocks of a region
+
+        :param level: The level of the blocks
+        :param region: (top, left, bottom, right) region in blocks, None for the whole level
+        :return: Array of the cell type values of the blocks in the region
+        """
+        blocks = self.__region_blocks(level, region)
+        return self.__levels[level]['type_counts'][(slice(None), *blocks)].argmax(axis=0).astype(np.int8)
+
+    def level_state(self, level, region=None):
+        """
+        Returns the aggregated state of the blocks of a region, which can be used as world state (such as for
+        rasterizing overview)
+
+        :param level: The level of the blocks
+        :param region: (top, left, bottom, right) region in blocks, None for the whole level
+        :return: Pyramid level state
+        """
+        return PyramidLevel(
+            level,
+            self.dominant_types(level, region),
+            self.means('temp', level, region),
+            self.means('air_pollution', level, region)
+        )
+
+    def update(self, state):
+        """
+        Updates the blocks which contain cells that changed since the last update
+
+        :param state: World state with cell_type, temp and air_pollution arrays, in the shape of the pyramid
+        :return: Number of cells which changed
+        """
+        (num_rows, num_cols) = self.__shape
+        level_cells = self.__levels[0]
+        changed = (state.cell_type != self.__cell_type[:num_rows, :num_cols]) | \
+            (state.temp != level_cells['temp'][:num_rows, :num_cols]) | \
+            (state.air_pollution != level_cells['air_pollution'][:num_rows, :num_cols])
+        (row_indices, col_indices) = self.__update_cells(state, changed)
+        num_changed = len(row_indices)
+
+        # Only the blocks containing changed cells are recalculated, from their four children
+        for level in range(1, self.__num_levels):
+            if len(row_indices) == 0:
+                break
+
+            num_level_cols = self.__levels[level]['count'].shape[1]
+            block_indices = np.unique((row_indices >> 1) * num_level_cols + (col_indices >> 1))
+            (row_indices, col_indices) = (block_indices // num_level_cols, block_indices % num_level_cols)
+
+            for (name, child_values) in self.__levels[level - 1].items():
+                self.__levels[level][name][..., row_indices, col_indices] = \
+                    child_values[..., 2 * row_indices, 2 * col_indices] + \
+                    child_values[..., 2 * row_indices + 1, 2 * col_indices] + \
+                    child_values[..., 2 * row_indices, 2 * col_indices + 1] + \
+                    child_values[..., 2 * row_indices + 1, 2 * col_indices + 1]
+
+        return num_changed
+
+    def __update_cells(self, state, changed):
+        """
+        Updates the cells level of the pyramid where the cells changed
+
+        :param state: World state with cell_type, temp and air_pollution arrays
+        :param changed: Boolean array of the changed cells
+        :return: (row indices, col indices) of the changed cells
+        """
+        (row_indices, col_indices) = np.nonzero(changed)
+        level_cells = self.__levels[0]
+        new_cell_type = state.cell_type[row_indices, col_indices]
+
+        level_cells['temp'][row_indices, col_indices] = state.temp[row_indices, col_indices]
+        level_cells['air_pollution'][row_indices, col_indices] = state.air_pollution[row_indices, col_indices]
+        level_cells['type_counts'][:, row_indices, col_indices] = 0
+        level_cells['type_counts'][new_cell_type, row_indices, col_indices] = 1
+        self.__cell_type[row_indices, col_indices] = new_cell_type
+
+        return row_indices, col_indices
+
+    def __padded_level_shape(self, level):
+        """
+        Returns the allocated shape of a level, whole 2 by 2 blocks of each block of the level above it
+
+        :param level: The level
+        :return: (num_rows, num_cols) of the allocated blocks
+        """
+        if level == self.__num_levels - 1:
+            return 1, 1
+
+        return tuple(2 * -(-size // 2 ** (level + 1)) for size in self.__shape)
+
+    def __region_blocks(self, level, region):
+        """
+        Returns the slices of the blocks of a region
+
+        :param level: The level of the blocks
+        :param region: (top, left, bottom, right) region in blocks, None for the whole level
+        :return: (rows slice, cols slice) of the blocks
+        """
+        (num_rows, num_cols) = self.level_shape(level)
+        (top, left, bottom, right) = (0, 0, num_rows, num_cols) if region is None else region
+
+        return slice(max(0, top), min(bottom, num_rows)), slice(max(0, left), min(right, num_cols))
+
+    def __check_level(self, level):
+        """
+        Checks the level is one of the pyramid levels
+
+        :param level: The level
+        """
+        if not 0 <= level < self.__num_levels:
+            raise ValueError(f'Unknown state pyramid level given "{level}".')
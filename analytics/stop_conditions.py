@@ -0,0 +1,116 @@
+from settings import CellTypes
+
+
+class StopCondition:
+    """
+    Represent an abstraction for condition which ends a run of the automaton.
+    Conditions are evaluated against the incremental world statistics, so checking them
+    does not walk the world cells, or against the array statistics of the array engines
+    (see ArrayStatistics), so checking them does not sync the world cells.
+    """
+
+    def is_met(self, stats):
+        """
+        Checks if the condition is met by the current world statistics
+
+        :param stats: World statistics or array statistics instance
+        :return: True if the run should stop, Otherwise False (array of them for array statistics)
+        """
+        raise AssertionError('Abstract stop condition, need to override the stop condition class.')
+
+    def __str__(self):
+        return self.__class__.__name__
+
+
+class CellTypeExtinct(StopCondition):
+    """
+    Condition which is met when there are no more cells of the given type in the world.
+    """
+
+    def __init__(self, cell_type):
+        self.__cell_type = cell_type
+
+    def is_met(self, stats):
+        return stats.count(self.__cell_type) == 0
+
+    def __str__(self):
+        return f'extinct:{self.__cell_type.name}'
+
+
+class MeanTempAbove(StopCondition):
+    """
+    Condition which is met when the mean temperature of the world is above the given threshold.
+    """
+
+    def __init__(self, threshold):
+        self.__threshold = threshold
+
+    def is_met(self, stats):
+        return stats.mean_temp > self.__threshold
+
+    def __str__(self):
+        return f'mean_temp>{self.__threshold}'
+
+
+class MeanAirPollutionAbove(StopCondition):
+    """
+    Condition which is met when the mean air pollution of the world is above the given threshold.
+    """
+
+    def __init__(self, threshold):
+        self.__threshold = threshold
+
+    def is_met(self, stats):
+        return stats.mean_air_pollution > self.__threshold
+
+    def __str__(self):
+        return f'mean_air_pollution>{self.__threshold}'
+
+
+class NoTransitions(StopCondition):
+    """
+    Condition which is met when no cell changed its type for the given number of generations.
+    """
+
+    def __init__(self, num_generations):
+        self.__num_generations = num_generations
+
+    def is_met(self, stats):
+        return stats.generations_without_transitions >= self.__num_generations
+
+    def __str__(self):
+        return f'quiet:{self.__num_generations}'
+
+
+def parse_stop_condition(condition_text):
+    """
+    Parses stop condition from text, in one of the formats:
+
+    - extinct:<CELL_TYPE> - No more cells of the cell type (for example extinct:ICEBERG).
+    - mean_temp><THRESHOLD> - Mean temperature above the threshold.
+    - mean_air_pollution><THRESHOLD> - Mean air pollution above the threshold.
+    - quiet:<GENERATIONS> - No cell type transitions for number of generations.
+
+    :param condition_text: Text of the stop condition
+    :return: Stop condition instance
+    """
+    condition_text = condition_text.strip()
+
+    if condition_text.startswith('extinct:'):
+        cell_type_name = condition_text[len('extinct:'):].upper()
+
+        if cell_type_name not in CellTypes.__members__:
+            raise ValueError(f'Unknown cell type "{cell_type_name}" in stop condition.')
+
+        return CellTypeExtinct(CellTypes[cell_type_name])
+
+    if condition_text.startswith('mean_temp>'):
+        return MeanTempAbove(float(condition_text[len('mean_temp>'):]))
+
+    if condition_text.startswith('mean_air_pollution>'):
+        return MeanAirPollutionAbove(float(condition_text[len('mean_air_pollution>'):]))
+
+    if condition_text.startswith('quiet:'):
+        return NoTransitions(int(condition_text[len('quiet:'):]))
+
+    raise ValueError(f'Bad stop condition given "{condition_text}".')
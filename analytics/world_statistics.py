@@ -0,0 +1,262 @@
+from collections import deque
+
+from settings import CellTypes
+from world_observer import WorldObserver
+
+
+class WorldStatistics(WorldObserver):
+    """
+    Maintains aggregated statistics of the world incrementally by the world cells changes,
+    so reading them does not require walking the whole world grid.
+    """
+    __default_history_size = 10000
+
+    def __init__(self, history_size=__default_history_size, generation=0):
+        """
+        Creates empty world statistics.
+
+        :param history_size: Maximum number of generations kept in the statistics history (None for unlimited)
+        :param generation: Generation of the world the statistics start from
+        """
+        self.__generation = generation
+        self.__num_cells = 0
+        self.__cell_counts = {cell_type: 0 for cell_type in CellTypes}
+        self.__temp_sum = 0
+        self.__air_pollution_sum = 0
+        self.__num_winds = 0
+        self.__num_clouds = 0
+
+        # Cell type transitions of the current generation, and the streak of generations without them
+        self.__pending_transitions = 0
+        self.__generation_transitions = 0
+        self.__generations_without_transitions = 0
+
+        # Multiset of the temperatures in the world, used for keeping the maximum temperature
+        self.__temp_values = {}
+        self.__max_temp = None
+        self.__max_temp_dirty = False
+
+        self.__history = deque(maxlen=history_size)
+
+    @property
+    def generation(self):
+        """
+        Getter for the generation the statistics belongs to
+
+        :return: Generation number
+        """
+        return self.__generation
+
+    @property
+    def num_cells(self):
+        """
+        Getter for the number of cells in the world
+
+        :return: Number of cells
+        """
+        return self.__num_cells
+
+    @property
+    def cell_counts(self):
+        """
+        Getter for the number of cells of each cell type
+
+        :return: Dictionary of cell type as key and number of cells as value
+        """
+        return dict(self.__cell_counts)
+
+    @property
+    def mean_temp(self):
+        """
+        Getter for the mean temperature of the world
+
+        :return: Mean temperature
+        """
+        return self.__temp_sum / self.__num_cells if self.__num_cells > 0 else 0
+
+    @property
+    def max_temp(self):
+        """
+        Getter for the maximum temperature of the world
+
+        :return: Maximum temperature
+        """
+        # The maximum is recalculated only when the previous maximum left the world
+        if self.__max_temp_dirty:
+            self.__max_temp = max(self.__temp_values) if self.__temp_values else None
+            self.__max_temp_dirty = False
+
+        return self.__max_temp
+
+    @property
+    def mean_air_pollution(self):
+        """
+        Getter for the mean air pollution of the world
+
+        :return: Mean air pollution
+        """
+        return self.__air_pollution_sum / self.__num_cells if self.__num_cells > 0 else 0
+
+    @property
+    def num_winds(self):
+        """
+        Getter for the number of active winds in the world
+
+        :return: Number of winds
+        """
+        return self.__num_winds
+
+    @property
+    def num_clouds(self):
+        """
+        Getter for the number of clouds in the world
+
+        :return: Number of clouds
+        """
+        return self.__num_clouds
+
+    @property
+    def generation_transitions(self):
+        """
+        Getter for the number of cell type transitions occurred in the last generation
+
+        :return: Number of cell type transitions
+        """
+        return self.__generation_transitions
+
+    @property
+    def generations_without_transitions(self):
+        """
+        Getter for the number of the last consecutive generations without any cell type transition
+
+        :return: Number of generations
+        """
+        return self.__generations_without_transitions
+
+    @property
+    def history(self):
+        """
+        Getter for the statistics history, containing snapshot for each generation passed
+
+        :return: Deque of statistics snapshots ordered by generation
+        """
+        return self.__history
+
+    def count(self, cell_type):
+        """
+        Returns the number of cells of the given cell type
+
+        :param cell_type: Cell type to count
+        :return: Number of cells of the given type
+        """
+        return self.__cell_counts[cell_type]
+
+    def series(self, name):
+        """
+        Returns the time series of single statistic from the history
+
+        :param name: Name of the statistic in the snapshot
+        :return: List of the statistic values ordered by generation
+        """
+        return [snapshot[name] for snapshot in self.__history]
+
+    def snapshot(self):
+        """
+        Creates snapshot of the current statistics
+
+        :return: Dictionary of the statistics values
+        """
+        return {
+            'generation': self.__generation,
+            'cell_counts': {cell_type.name: count for cell_type, count in self.__cell_counts.items()},
+            'mean_temp': self.mean_temp,
+            'max_temp': self.max_temp,
+            'mean_air_pollution': self.mean_air_pollution,
+            'num_winds': self.__num_winds,
+            'num_clouds': self.__num_clouds,
+            'generation_transitions': self.__generation_transitions
+        }
+
+    def cell_added(self, location, cell_instance):
+        self.__num_cells += 1
+        self.__cell_counts[cell_instance.type] += 1
+        self.__temp_sum += cell_instance.temp
+        self.__air_pollution_sum += cell_instance.air_pollution
+        self.__add_temp_value(cell_instance.temp)
+
+        if cell_instance.wind is not None:
+            self.__num_winds += 1
+
+        if cell_instance.cloud is not None:
+            self.__num_clouds += 1
+
+    def cell_removed(self, location, cell_instance):
+        self.__num_cells -= 1
+        self.__cell_counts[cell_instance.type] -= 1
+        self.__temp_sum -= cell_instance.temp
+        self.__air_pollution_sum -= cell_instance.air_pollution
+        self.__remove_temp_value(cell_instance.temp)
+
+        if cell_instance.wind is not None:
+            self.__num_winds -= 1
+
+        if cell_instance.cloud is not None:
+            self.__num_clouds -= 1
+
+    def cell_replaced(self, location, old_cell_instance, new_cell_instance):
+        self.cell_removed(location, old_cell_instance)
+        self.cell_added(location, new_cell_instance)
+        self.__pending_transitions += 1
+
+    def cell_changed(self, location, field, old_value, new_value):
+        if field == 'temp':
+            self.__temp_sum += new_value - old_value
+            self.__remove_temp_value(old_value)
+            self.__add_temp_value(new_value)
+        elif field == 'air_pollution':
+            self.__air_pollution_sum += new_value - old_value
+        elif field == 'wind':
+            self.__num_winds += (new_value is not None) - (old_value is not None)
+        elif field == 'cloud':
+            self.__num_clouds += (new_value is not None) - (old_value is not None)
+
+    def generation_passed(self, generation):
+        is_generation_passed = generation > self.__generation
+        self.__generation = generation
+        self.__generation_transitions = self.__pending_transitions
+        self.__pending_transitions = 0
+
+        if self.__generation_transitions == 0:
+            self.__generations_without_transitions += 1 if is_generation_passed else 0
+        else:
+            self.__generations_without_transitions = 0
+
+        self.__history.append(self.snapshot())
+
+    def __add_temp_value(self, temp):
+        """
+        Adds temperature value to the temperatures multiset
+
+        :param temp: Temperature value to add
+        """
+        self.__temp_values[temp] = self.__temp_values.get(temp, 0) + 1
+
+        if not self.__max_temp_dirty and (self.__max_temp is None or temp > self.__max_temp):
+            self.__max_temp = temp
+
+    def __remove_temp_value(self, temp):
+        """
+        Removes temperature value from the temperatures multiset
+
+        :param temp: Temperature value to remove
+        """
+        remaining = self.__temp_values[temp] - 1
+
+        if remaining > 0:
+            self.__temp_values[temp] = remaining
+        else:
+            del self.__temp_values[temp]
+
+            # The maximum temperature left the world, so it should be recalculated on demand
+            if temp == self.__max_temp:
+                self.__max_temp_dirty = True
@@ -0,0 +1,223 @@
+from argparse import ArgumentParser
+from contextlib import nullcontext
+from json import dumps
+from random import seed as random_seed
+
+from cellular_automaton import CellularAutomaton
+from analytics.cycle_detector import CycleDetector
+from analytics.run_metrics import MetricsExporter
+from analytics.stop_conditions import parse_stop_condition
+from engines.engine import ENGINES
+from settings import LogicSettings
+from rules import RuleSet, RuleTables
+
+
+class AutomatonBatchRunner:
+    """
+    Runs the automaton without GUI for number of generations
+    """
+
+    def __init__(self, world_file_path=LogicSettings.WORLD_FILE_PATH, seed=None, engine='reference'):
+        """
+        Creates batch runner for a world.
+
+        :param world_file_path: Path to world file
+        :param seed: Seed for the random initial conditions of the world, None for random seed
+        :param engine: Name of the engine which passes the generations (one of ENGINES)
+        """
+        self.__seed = seed
+        random_seed(seed)
+        self.__automaton = CellularAutomaton(world_file_path, engine)
+
+    @property
+    def automaton(self):
+        """
+        Getter for the automaton the runner runs
+
+        :return: Cellular automaton instance
+        """
+        return self.__automaton
+
+    def run(
+            self,
+            num_generations,
+            stop_on_cycle=False,
+            fast_forward=False,
+            stop_conditions=None,
+            output_pipeline=None,
+            output_every=1
+    ):
+        """
+        Runs the automaton for number of generations
+
+        :param num_generations: Number of generations to run
+        :param stop_on_cycle: Whether to stop as soon as the world reached a fixed point or a cycle
+        :param fast_forward: Whether to skip whole cycles once the world reached a fixed point or a cycle
+        :param stop_conditions: List of stop conditions, the run stops as soon as one of them is met
+        :param output_pipeline: Output pipeline which snapshots of the generations are submitted to, None for none
+        :param output_every: Submit snapshots only of generations which are multiple of it
+        :return: Dictionary summarizing the run
+        """
+        cycle_detector = None
+        stop_reason = 'generations'
+        stop_conditions = stop_conditions or []
+        target_generation = self.__automaton.generation + num_generations
+
+        # The statistics of the reference engine are maintained only once enabled, so they count all the transitions
+        if stop_conditions and not self.__automaton.engine.uses_arrays:
+            self.__automaton.enable_statistics()
+
+        if stop_on_cycle or fast_forward:
+            state_hasher = self.__automaton.enable_state_hashing()
+            cycle_detector = CycleDetector()
+            cycle_detector.observe(self.__automaton.generation, state_hasher.hash)
+
+        while self.__automaton.generation < target_generation:
+            self.__automaton.next_generation()
+
+            # Only copying the state is done here, the snapshots are written by the writers of the pipeline
+            if output_pipeline is not None and self.__automaton.generation % output_every == 0:
+                output_pipeline.submit(self.__automaton.snapshot(), self.__automaton.generation)
+
+            stop_stats = None
+
+            # The array engines are checked on their array state, so the world cells are not synced every generation
+            if stop_conditions:
+                stop_stats = self.__automaton.array_stats() or self.__automaton.stats
+
+            met_condition = next(
+                (condition for condition in stop_conditions if condition.is_met(stop_stats)),
+                None
+            )
+
+            if met_condition is not None:
+                stop_reason = str(met_condition)
+                break
+
+            if cycle_detector is not None and \
+                    cycle_detector.observe(self.__automaton.generation, self.__automaton.state_hasher.hash):
+                if stop_on_cycle:
+                    stop_reason = 'fixed_point' if cycle_detector.is_fixed_point else 'cycle'
+                    break
+
+                # The rest of the generations can be calculated from the cycle position
+                self.__automaton.fast_forward(
+                    target_generation - self.__automaton.generation,
+                    cycle_detector.cycle_length
+                )
+                stop_reason = 'fast_forward'
+
+        return {
+            'seed': self.__seed,
+            'generation': self.__automaton.generation,
+            'stop_reason': stop_reason,
+            'cycle_start': cycle_detector.cycle_start if cycle_detector else None,
+            'cycle_length': cycle_detector.cycle_length if cycle_detector else None,
+            'stats': self.__automaton.stats.snapshot()
+        }
+
+
+def parse_arguments():
+    """
+    Parses the command line arguments of the batch runner
+
+    :return: Parsed arguments
+    """
+    parser = ArgumentParser(description='Runs the global warming automaton without GUI.')
+    parser.add_argument('--world', default=LogicSettings.WORLD_FILE_PATH, help='Path to world file')
+    parser.add_argument('--generations', type=int, default=100, help='Number of generations to run')
+    parser.add_argument('--seed', type=int, default=None, help='Seed for the random initial conditions')
+    parser.add_argument('--rules', default=LogicSettings.RULES_FILE_PATH, help='Path to rules file')
+    parser.add_argument(
+        '--engine',
+        default='reference',
+        choices=list(ENGINES),
+        help='Engine which passes the generations'
+    )
+    parser.add_argument(
+        '--stop-on-cycle',
+        action='store_true',
+        help='Stop as soon as the world reached a fixed point or a cycle'
+    )
+    parser.add_argument(
+        '--fast-forward',
+        action='store_true',
+        help='Skip whole cycles once the world reached a fixed point or a cycle'
+    )
+    parser.add_argument(
+        '--stop-when',
+        action='append',
+        default=[],
+        type=parse_stop_condition,
+        help='Stop when the condition is met, can be given multiple times. '
+             'Formats: extinct:<CELL_TYPE>, mean_temp><VALUE>, mean_air_pollution><VALUE>, quiet:<GENERATIONS>'
+    )
+    parser.add_argument('--metrics-port', type=int, default=None, help='Port of local Prometheus metrics endpoint')
+    parser.add_argument('--metrics-textfile', default=None, help='Path to Prometheus metrics textfile to rewrite')
+    parser.add_argument(
+        '--metrics-interval',
+        type=float,
+        default=5.0,
+        help='Seconds between the rewrites of the metrics textfile'
+    )
+    parser.add_argument('--checkpoint-dir', default=None, help='Path to the directory to write checkpoints to')
+    parser.add_argument('--checkpoint-every', type=int, default=100, help='Checkpoint every Nth generation')
+    parser.add_argument(
+        '--checkpoint-full-every',
+        type=int,
+        default=10,
+        help='Write full checkpoint every Nth checkpoint and delta checkpoints in between'
+    )
+    parser.add_argument(
+        '--output-policy',
+        default='block',
+        choices=['block', 'drop'],
+        help='Whether the run waits for the writer or drops checkpoints when too many wait (see OutputPipeline)'
+    )
+    parser.add_argument('--output-queue', type=int, default=8, help='Maximum number of checkpoints waiting')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    arguments = parse_arguments()
+    RuleTables.activate(RuleSet.load(arguments.rules).compile())
+    batch_runner = AutomatonBatchRunner(arguments.world, arguments.seed, arguments.engine)
+    run_metrics = None
+    checkpoint_pipeline = None
+
+    # Timing the generations costs every generation, so the metrics are enabled only when they are exported
+    if arguments.metrics_port is not None or arguments.metrics_textfile is not None:
+        run_metrics = batch_runner.automaton.enable_metrics()
+
+    if arguments.checkpoint_dir is not None:
+        # Imported here since numpy is only required for the array based features
+        from export.output_pipeline import OutputPipeline, CheckpointWriter
+
+        checkpoint_pipeline = OutputPipeline(
+            CheckpointWriter(arguments.checkpoint_dir, arguments.checkpoint_full_every),
+            max_pending=arguments.output_queue,
+            policy=arguments.output_policy,
+            metrics=run_metrics,
+            kind='checkpoint'
+        )
+
+    with nullcontext() if run_metrics is None else MetricsExporter(
+        run_metrics,
+        arguments.metrics_port,
+        arguments.metrics_textfile,
+        interval=arguments.metrics_interval
+    ):
+        summary = batch_runner.run(
+            arguments.generations,
+            stop_on_cycle=arguments.stop_on_cycle,
+            fast_forward=arguments.fast_forward,
+            stop_conditions=arguments.stop_when,
+            output_pipeline=checkpoint_pipeline,
+            output_every=arguments.checkpoint_every
+        )
+
+        if checkpoint_pipeline is not None:
+            checkpoint_pipeline.close()
+            summary['checkpoints'] = checkpoint_pipeline.stats()
+
+        print(dumps(summary))
@@ -0,0 +1,191 @@
+import gc
+import sys
+import tracemalloc
+from argparse import ArgumentParser
+from json import dumps
+from os import environ
+from random import seed as random_seed
+from time import perf_counter
+
+# The allocations of the compiled kernels are counted only when enabled before numba is imported
+environ.setdefault('NUMBA_NRT_STATS', '1')
+
+from engines.engine import ENGINES  # noqa: E402
+from rules import RuleSet, RuleTables  # noqa: E402
+from settings import LogicSettings  # noqa: E402
+
+
+def compiled_allocations():
+    """
+    Returns the number of allocations made by the compiled kernels so far
+
+    :return: Number of allocations, or None if numba is not installed or doesn't count them
+    """
+    try:
+        from numba.core.runtime import rtsys
+
+        return rtsys.get_allocation_stats().alloc
+    except (ImportError, RuntimeError):
+        return None
+
+
+def measure_allocations(world_file_path, engine, num_generations, warmup_generations, use_advance, seed):
+    """
+    Measures the allocations of passing generations in the steady state, after warmup generations which compile
+    the kernels and allocate the reused buffers
+
+    :param world_file_path: Path to world file
+    :param engine: Name of the engine which passes the generations
+    :param num_generations: Number of generations to measure
+    :param warmup_generations: Number of generations to pass before measuring
+    :param use_advance: Whether the generations are passed by advance, or by next_generation one by one
+    :param seed: Seed for the random initial conditions
+    :return: Dictionary of the Python allocations (bytes still allocated and peak above the start, and per
+             generation), the allocations of the compiled kernels, the garbage collections and the time per generation
+    """
+    # Imported here so the import time is not part of the measurements
+    from cellular_automaton import CellularAutomaton
+
+    random_seed(seed)
+    automaton = CellularAutomaton(world_file_path, engine)
+    pass_generations = automaton.advance if use_advance else \
+        lambda generations: [automaton.next_generation() for _ in range(generations)]
+    pass_generations(warmup_generations)
+
+    gc.collect()
+    start_collections = sum(generation_stats['collections'] for generation_stats in gc.get_stats())
+    start_compiled_allocations = compiled_allocations()
+    tracemalloc.start()
+    (start_size, _) = tracemalloc.get_traced_memory()
+
+    try:
+        start_time = perf_counter()
+        pass_generations(num_generations)
+        seconds = perf_counter() - start_time
+        (end_size, peak_size) = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    end_compiled_allocations = compiled_allocations()
+
+    return {
+        'generations': num_generations,
+        'retained_bytes': end_size - start_size,
+        'peak_bytes': peak_size - start_size,
+        'peak_bytes_per_generation': (peak_size - start_size) / num_generations,
+        'compiled_allocations': None if start_compiled_allocations is None else
+        end_compiled_allocations - start_compiled_allocations,
+        'gc_collections': sum(generation_stats['collections'] for generation_stats in gc.get_stats()) -
+        start_collections,
+        'seconds_per_generation': seconds / num_generations
+    }
+
+
+def steady_state_allocations(world_file_path, engine, num_generations, warmup_generations, use_advance, seed):
+    """
+    Measures the allocations of runs of number of generations and of twice as many generations, so the allocations
+    which grow with the generations are told apart from the allocations of each call (see measure_allocations)
+
+    :param world_file_path: Path to world file
+    :param engine: Name of the engine which passes the generations
+    :param num_generations: Number of generations of the shorter run
+    :param warmup_generations: Number of generations to pass before measuring
+    :param use_advance: Whether the generations are passed by advance, or by next_generation one by one
+    :param seed: Seed for the random initial conditions
+    :return: Dictionary of the measurements of the longer run, and the growth of each of them per generation
+             (zero when nothing is allocated per generation)
+    """
+    (short_run, long_run) = [
+        measure_allocations(world_file_path, engine, run_generations, warmup_generations, use_advance, seed)
+        for run_generations in [num_generations, 2 * num_generations]
+    ]
+
+    return {
+        **long_run,
+        'per_generation': {
+            measurement: None if short_run[measurement] is None else
+            (long_run[measurement] - short_run[measurement]) / num_generations
+            for measurement in ['retained_bytes', 'peak_bytes', 'compiled_allocations', 'gc_collections']
+        }
+    }
+
+
+def steady_state_failures(allocations):
+    """
+    Checks that nothing is allocated per generation in the steady state: no allocations of the compiled kernels,
+    and no Python memory which grows with the generations (less than a byte per generation is left for the
+    bookkeeping of the measurements themselves)
+
+    :param allocations: Steady state allocations (see steady_state_allocations)
+    :return: List of the texts of the failed checks, empty if all of them passed
+    """
+    per_generation = allocations['per_generation']
+    failures = []
+
+    if per_generation['compiled_allocations'] is None:
+        failures.append('The allocations of the compiled kernels are not counted (is numba installed?).')
+    elif per_generation['compiled_allocations'] != 0:
+        failures.append(f'Compiled allocations per generation: {per_generation["compiled_allocations"]}')
+
+    if per_generation['retained_bytes'] >= 1:
+        failures.append(f'Retained Python bytes per generation: {per_generation["retained_bytes"]}')
+
+    return failures
+
+
+def parse_arguments():
+    """
+    Parses the command line arguments of the allocations benchmark
+
+    :return: Parsed arguments
+    """
+    parser = ArgumentParser(description='Measures the steady state allocations of passing generations.')
+    parser.add_argument('--world', default=LogicSettings.WORLD_FILE_PATH, help='Path to world file')
+    parser.add_argument('--rules', default=LogicSettings.RULES_FILE_PATH, help='Path to rules file')
+    parser.add_argument('--generations', type=int, default=1000, help='Number of generations to measure')
+    parser.add_argument('--warmup', type=int, default=10, help='Number of generations to pass before measuring')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for the random initial conditions')
+    parser.add_argument(
+        '--engines',
+        default=','.join(ENGINES),
+        help='Comma separated engines to measure'
+    )
+    parser.add_argument(
+        '--check',
+        action='store_true',
+        help='Measure only advance of the jit engine, and exit with error if it allocates per generation'
+    )
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    arguments = parse_arguments()
+    RuleTables.activate(RuleSet.load(arguments.rules).compile())
+
+    if arguments.check:
+        jit_allocations = steady_state_allocations(
+            arguments.world,
+            'jit',
+            arguments.generations,
+            arguments.warmup,
+            True,
+            arguments.seed
+        )
+        check_failures = steady_state_failures(jit_allocations)
+        print(dumps({'jit': {'advance': jit_allocations}, 'failures': check_failures}, indent=4))
+        sys.exit(1 if check_failures else 0)
+
+    print(dumps({
+        engine: {
+            method: steady_state_allocations(
+                arguments.world,
+                engine,
+                arguments.generations,
+                arguments.warmup,
+                method == 'advance',
+                arguments.seed
+            )
+            for method in ['next_generation', 'advance']
+        }
+        for engine in arguments.engines.split(',')
+    }, indent=4))
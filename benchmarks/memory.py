@@ -0,0 +1,70 @@
+from argparse import ArgumentParser
+from json import dumps
+from random import seed as random_seed
+
+from engines.engine import ENGINES
+from rules import RuleSet, RuleTables
+from settings import LogicSettings
+
+
+def measure_engine_memory(world_file_path, engine, num_generations, seed):
+    """
+    Measures the memory of automaton by subsystem and the peak allocation of its generation phases
+
+    :param world_file_path: Path to world file
+    :param engine: Name of the engine which passes the generations
+    :param num_generations: Number of generations to run before the memory is reported
+    :param seed: Seed for the random initial conditions
+    :return: Dictionary of the memory report, with the bytes per cell of each world representation
+    """
+    # Imported here so the import time is not part of the measurements
+    from cellular_automaton import CellularAutomaton
+
+    random_seed(seed)
+    automaton = CellularAutomaton(world_file_path, engine)
+    automaton.enable_memory_profiling()
+
+    try:
+        for _ in range(num_generations):
+            automaton.next_generation()
+
+        report = automaton.memory_report()
+    finally:
+        automaton.disable_memory_profiling()
+
+    num_cells = sum(report['num_cells_by_type'].values())
+    report['bytes_per_cell'] = {
+        'world_cells': (report['subsystems']['grid_cells'] + report['subsystems']['environment']) / num_cells,
+        'world_arrays': report['observers_by_type'].get('WorldArrays', 0) / num_cells,
+        'array_state': report['subsystems']['array_state'] / num_cells
+    }
+
+    return report
+
+
+def parse_arguments():
+    """
+    Parses the command line arguments of the memory benchmark
+
+    :return: Parsed arguments
+    """
+    parser = ArgumentParser(description='Measures the memory of the automaton subsystems and generation phases.')
+    parser.add_argument('--world', default=LogicSettings.WORLD_FILE_PATH, help='Path to world file')
+    parser.add_argument('--rules', default=LogicSettings.RULES_FILE_PATH, help='Path to rules file')
+    parser.add_argument('--generations', type=int, default=20, help='Number of generations to run')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for the random initial conditions')
+    parser.add_argument(
+        '--engines',
+        default=','.join(ENGINES),
+        help='Comma separated engines to measure'
+    )
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    arguments = parse_arguments()
+    RuleTables.activate(RuleSet.load(arguments.rules).compile())
+    print(dumps({
+        engine: measure_engine_memory(arguments.world, engine, arguments.generations, arguments.seed)
+        for engine in arguments.engines.split(',')
+    }, indent=4))
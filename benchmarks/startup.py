@@ -0,0 +1,81 @@
+from argparse import ArgumentParser
+from json import dumps
+from os.path import dirname, abspath
+from statistics import median
+from subprocess import run
+from sys import executable
+from time import perf_counter
+
+from settings import LogicSettings
+
+REPOSITORY_PATH = dirname(dirname(abspath(__file__)))
+
+# Each measured statement runs in a fresh interpreter, as it runs in a newly spawned worker process
+STARTUP_STATEMENTS = {
+    'python': 'pass',
+    'import_cellular_automaton': 'import cellular_automaton',
+    'import_batch_runner': 'import batch_runner',
+    'import_main': 'import main',
+    'create_automaton': 'from cellular_automaton import CellularAutomaton; CellularAutomaton()'
+}
+
+
+def measure_statement(statement, num_repeats):
+    """
+    Measures the median time of running statement in a fresh interpreter
+
+    :param statement: Python statement to run
+    :param num_repeats: Number of times to run the statement
+    :return: Median time in seconds
+    """
+    times = []
+
+    for _ in range(num_repeats):
+        start_time = perf_counter()
+        run([executable, '-c', statement], cwd=REPOSITORY_PATH, check=True)
+        times.append(perf_counter() - start_time)
+
+    return median(times)
+
+
+def measure_world_load(world_file_path, num_repeats):
+    """
+    Measures the median time of loading the world in the current interpreter
+
+    :param world_file_path: Path to world file
+    :param num_repeats: Number of times to load the world
+    :return: Median time in seconds
+    """
+    # Imported here so the import time is not part of the load time
+    from cellular_automaton import CellularAutomaton
+
+    times = []
+
+    for _ in range(num_repeats):
+        start_time = perf_counter()
+        CellularAutomaton(world_file_path)
+        times.append(perf_counter() - start_time)
+
+    return median(times)
+
+
+def parse_arguments():
+    """
+    Parses the command line arguments of the startup benchmark
+
+    :return: Parsed arguments
+    """
+    parser = ArgumentParser(description='Measures the startup time of the automaton modules.')
+    parser.add_argument('--world', default=LogicSettings.WORLD_FILE_PATH, help='Path to world file')
+    parser.add_argument('--repeats', type=int, default=10, help='Number of times to repeat each measurement')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    arguments = parse_arguments()
+    results = {
+        f'{name}_seconds': measure_statement(statement, arguments.repeats)
+        for name, statement in STARTUP_STATEMENTS.items()
+    }
+    results['world_load_seconds'] = measure_world_load(arguments.world, arguments.repeats)
+    print(dumps(results, indent=4))
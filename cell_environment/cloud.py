@@ -1,12 +1,12 @@
 from random import randint
 
+from rules import RuleTables
+
 
 class Cloud:
     """
     Represent cloud capability for specific cell in the world.
     """
-    __max_precipitation = 100
-    __precipitation_grow_factor = 10
 
     def __init__(self, cloud_instance=None, precipitation=None):
         if isinstance(cloud_instance, Cloud):
@@ -39,26 +39,31 @@ class Cloud:
 
         :return: Random generated precipitation percentage
         """
-        return randint(0, Cloud.__max_precipitation)
+        return randint(0, RuleTables.active().cloud_max_precipitation)
 
-    def should_rain(self):
+    def should_rain(self, rules=None):
         """
         Returns if the cloud should rain right now.
 
+        :param rules: Rule tables of the clouds, None for the active rule tables
         :return: True if the cloud should rain right now, Otherwise false.
         """
-        return self.__precipitation == Cloud.__max_precipitation
+        return self.__precipitation == (rules or RuleTables.active()).cloud_max_precipitation
 
-    def next_generation(self):
+    def next_generation(self, rules=None):
         """
         Updates the cloud properties as generation passed.
         Each generation the precipitation of the grow by 10%.
         If the precipitation was 100% in the last generation, it resets to 0%.
+
+        :param rules: Rule tables of the clouds, None for the active rule tables
         """
-        if self.__precipitation >= Cloud.__max_precipitation:
+        rules = rules or RuleTables.active()
+
+        if self.__precipitation >= rules.cloud_max_precipitation:
             self.__precipitation = 0
         else:
-            self.__precipitation += Cloud.__precipitation_grow_factor
+            self.__precipitation += rules.cloud_precipitation_grow_factor
 
     def _copy_values(self, cloud_instance):
         """
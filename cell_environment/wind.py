@@ -1,13 +1,13 @@
 from random import randint, choice
 
 from direction_matrix import DirectionMatrix
+from rules import RuleTables
 
 
 class Wind:
     """
     Represent wind capability for specific cell in the world.
     """
-    __affect_speed_factor = 5
     __chance_direction_change = 0.25
     __chance_speed_change = 0.15
 
@@ -127,7 +127,7 @@ class Wind:
         chainer = lambda func1, func2: lambda *args: func1(*func2(*args))
 
         # Calculating number of cells need to update
-        num_cells_update = self.__speed // Wind.__affect_speed_factor
+        num_cells_update = self.__speed // RuleTables.active().wind_affect_speed_factor
         curr_affected_loc_func = getattr(DirectionMatrix, self.__direction)
         affected_locations = [curr_affected_loc_func]
 
@@ -1,5 +1,6 @@
 from cells.world_cell import WorldCell
 from settings import LogicSettings, CellTypes
+from rules import RuleTables
 
 
 class CityCell(WorldCell):
@@ -8,10 +9,6 @@ class CityCell(WorldCell):
     """
     _cell_type = CellTypes.CITY
 
-    _temp_earth_cell_factor = 95
-    _temp_neighbors_increase_factor = 0.02
-    _air_pollution_grow_factor = 0.08
-
     def __init__(self, temp=None, air_pollution=None, wind_instance=None, cloud_instance=None):
         super().__init__(
             temp=temp,
@@ -20,7 +17,7 @@ class CityCell(WorldCell):
             cloud_instance=cloud_instance
         )
 
-    def next_generation(self):
+    def next_generation(self, rules=None, rule_counts=None):
         """
         Updates the city cell properties as generation passed.
         Does all the things default world cell does, but including:
@@ -29,22 +26,20 @@ class CityCell(WorldCell):
         - Each generation the city cell heats the neighbors cells' temperature by predefined heat factor.
         - Produces air pollution each generation.
 
+        :param rules: Rule tables to apply, None for the active rule tables
+        :param rule_counts: List of rule counts to count the rules fired into (see RuleCounters), None for not counting
         :return: Object of changes which occurs outside the cell (wind properties and more)
         """
-        generation_changes = super().next_generation()
+        rules = rules or RuleTables.active()
+        generation_changes = super().next_generation(rules, rule_counts)
 
         # If the temperature reach predefined celsius factor, city cells become Earth Cells.
-        if self.temp >= CityCell._temp_earth_cell_factor:
-            generation_changes['cell_change'] = CellTypes.EARTH
+        self._check_transitions(generation_changes, rules, rule_counts)
 
         # Each generation, city cells heat temperature in their neighborhood by predefined temperature heat factor
-        generation_changes['apply_changes_locations'] = {
-            'field': 'air_pollution',
-            'locations': self._get_all_neighbors_directions(),
-            'value': CityCell._temp_neighbors_increase_factor
-        }
+        self._add_neighbors_changes(generation_changes, rules, rule_counts)
 
         # Produces air pollution each generation.
-        self.air_pollution += CityCell._air_pollution_grow_factor
+        self.set_air_pollution(self.air_pollution + rules.air_pollution_grow_factor[CityCell._cell_type.value], rules)
 
         return generation_changes
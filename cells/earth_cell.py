@@ -1,5 +1,7 @@
 from cells.world_cell import WorldCell
 from settings import LogicSettings, CellTypes
+from rules import RuleTables
+from analytics.rule_counters import RAIN_TRANSITIONS_MET
 
 
 class EarthCell(WorldCell):
@@ -8,8 +10,6 @@ class EarthCell(WorldCell):
     """
     _cell_type = CellTypes.EARTH
 
-    _air_pollution_forest_cell_factor = 0.05
-
     def __init__(self, temp=None, air_pollution=None, wind_instance=None, cloud_instance=None):
         super().__init__(
             temp=temp,
@@ -18,24 +18,36 @@ class EarthCell(WorldCell):
             cloud_instance=cloud_instance
         )
 
-    def next_generation(self):
+    def next_generation(self, rules=None, rule_counts=None):
         """
         Updates the earth cell properties as generation passed.
         Does all the things default world cell does, but including:
 
         - When there's rain with less than air pollution factor, earth cells become Forest Cells.
 
+        :param rules: Rule tables to apply, None for the active rule tables
+        :param rule_counts: List of rule counts to count the rules fired into (see RuleCounters), None for not counting
         :return: Object of changes which occurs outside the cell (wind properties and more)
         """
+        rules = rules or RuleTables.active()
+        rain_air_pollution_max = rules.rain_transition_air_pollution_max[EarthCell._cell_type.value]
+
         # If there's rain with less than air pollution factor, earth cells become Forest Cells
         should_become_forest = \
+            rain_air_pollution_max is not None and \
             self.cloud is not None and \
-            self.cloud.should_rain() and \
-            self.air_pollution <= EarthCell._air_pollution_forest_cell_factor
+            self.cloud.should_rain(rules) and \
+            self.air_pollution <= rain_air_pollution_max
+
+        if rule_counts is not None and should_become_forest:
+            rule_counts[RAIN_TRANSITIONS_MET] += 1
 
         generation_changes = {
-            **super().next_generation(),
-            **({'cell_change': CellTypes.FOREST} if should_become_forest else {}),
+            **super().next_generation(rules, rule_counts),
+            **(
+                {'cell_change': rules.rain_transition_cell_type[EarthCell._cell_type.value]}
+                if should_become_forest else {}
+            ),
         }
 
         return generation_changes
@@ -1,5 +1,6 @@
 from cells.world_cell import WorldCell
 from settings import LogicSettings, CellTypes
+from rules import RuleTables
 
 
 class ForestCell(WorldCell):
@@ -8,10 +9,6 @@ class ForestCell(WorldCell):
     """
     _cell_type = CellTypes.FOREST
 
-    _temp_earth_cell_factor = 60
-    _air_pollution_earth_cell_factor = 0.8
-    _air_pollution_neighbors_decrease_factor = -0.03
-
     def __init__(self, temp=None, air_pollution=None, wind_instance=None, cloud_instance=None):
         super().__init__(
             temp=temp,
@@ -20,7 +17,7 @@ class ForestCell(WorldCell):
             cloud_instance=cloud_instance
         )
 
-    def next_generation(self):
+    def next_generation(self, rules=None, rule_counts=None):
         """
         Updates the forest cell properties as generation passed.
         Does all the things default world cell does, but including:
@@ -29,23 +26,17 @@ class ForestCell(WorldCell):
         - When the temperature reach temperature factor (or more), forest cells become Earth Cells.
         - When the air pollution reach air pollution factor (or more), forest cells become Earth Cells.
 
+        :param rules: Rule tables to apply, None for the active rule tables
+        :param rule_counts: List of rule counts to count the rules fired into (see RuleCounters), None for not counting
         :return: Object of changes which occurs outside the cell (wind properties and more)
         """
-        generation_changes = super().next_generation()
+        rules = rules or RuleTables.active()
+        generation_changes = super().next_generation(rules, rule_counts)
 
         # Each generation, forest cells reduce air pollution in their neighborhood
-        generation_changes['apply_changes_locations'] = {
-            'field': 'air_pollution',
-            'locations': self._get_all_neighbors_directions(),
-            'value': ForestCell._air_pollution_neighbors_decrease_factor
-        }
-
-        # If the temperature reach temperature factor (or more), forest cells become Earth Cells
-        if self.temp >= ForestCell._temp_earth_cell_factor:
-            generation_changes['cell_change'] = CellTypes.EARTH
-
-        # If the air pollution reach air pollution factor (or more), forest cells become Earth Cells
-        if self.air_pollution >= ForestCell._air_pollution_earth_cell_factor:
-            generation_changes['cell_change'] = CellTypes.EARTH
+        self._add_neighbors_changes(generation_changes, rules, rule_counts)
+
+        # If the temperature or the air pollution reach their factors (or more), forest cells become Earth Cells
+        self._check_transitions(generation_changes, rules, rule_counts)
 
         return generation_changes
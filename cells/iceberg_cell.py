@@ -1,5 +1,6 @@
 from cells.world_cell import WorldCell
 from settings import LogicSettings, CellTypes
+from rules import RuleTables
 
 
 class IcebergCell(WorldCell):
@@ -8,9 +9,6 @@ class IcebergCell(WorldCell):
     """
     _cell_type = CellTypes.ICEBERG
 
-    _temp_sea_cell_factor = 0
-    _temp_neighbors_decrease_factor = -0.025
-
     def __init__(self, temp=None, air_pollution=None, wind_instance=None, cloud_instance=None):
         super().__init__(
             temp=temp,
@@ -19,7 +17,7 @@ class IcebergCell(WorldCell):
             cloud_instance=cloud_instance
         )
 
-    def next_generation(self):
+    def next_generation(self, rules=None, rule_counts=None):
         """
         Updates the iceberg cell properties as generation passed.
         Does all the things default world cell does, but including:
@@ -27,19 +25,17 @@ class IcebergCell(WorldCell):
         - When the temperature reach 0 (or more) celsius, iceberg cells become Sea Cells.
         - Each generation, iceberg cells cools temperature in their neighborhood by temperature factor.
 
+        :param rules: Rule tables to apply, None for the active rule tables
+        :param rule_counts: List of rule counts to count the rules fired into (see RuleCounters), None for not counting
         :return: Object of changes which occurs outside the cell (wind properties and more)
         """
-        generation_changes = super().next_generation()
+        rules = rules or RuleTables.active()
+        generation_changes = super().next_generation(rules, rule_counts)
 
         # If the temperature reach 0 (or more) celsius, iceberg cells become Sea Cells
-        if self.temp >= IcebergCell._temp_sea_cell_factor:
-            generation_changes['cell_change'] = CellTypes.SEA
+        self._check_transitions(generation_changes, rules, rule_counts)
 
         # Iceberg cells cools temperature in their neighborhood by temperature factor
-        generation_changes['apply_changes_locations'] = {
-            'field': 'temp',
-            'locations': self._get_all_neighbors_directions(),
-            'value': IcebergCell._temp_neighbors_decrease_factor
-        }
+        self._add_neighbors_changes(generation_changes, rules, rule_counts)
 
         return generation_changes
@@ -1,5 +1,6 @@
 from cells.world_cell import WorldCell
 from settings import LogicSettings, CellTypes
+from rules import RuleTables
 
 
 class SeaCell(WorldCell):
@@ -8,9 +9,6 @@ class SeaCell(WorldCell):
     """
     _cell_type = CellTypes.SEA
 
-    _temp_earth_cell_factor = 100
-    _temp_iceberg_cell_factor = -1
-
     def __init__(self, temp=None, air_pollution=None, wind_instance=None, cloud_instance=None):
         super().__init__(
             temp=temp,
@@ -19,7 +17,7 @@ class SeaCell(WorldCell):
             cloud_instance=cloud_instance
         )
 
-    def next_generation(self):
+    def next_generation(self, rules=None, rule_counts=None):
         """
         Updates the sea cell properties as generation passed.
         Does all the things default world cell does, but including:
@@ -27,16 +25,15 @@ class SeaCell(WorldCell):
         - When the temperature reach 100 celsius (or more), sea cells become Earth Cells.
         - When the temperature reach -1 celsius (or less), sea cells become Iceberg Cells.
 
+        :param rules: Rule tables to apply, None for the active rule tables
+        :param rule_counts: List of rule counts to count the rules fired into (see RuleCounters), None for not counting
         :return: Object of changes which occurs outside the cell (wind properties and more)
         """
-        generation_changes = super().next_generation()
+        rules = rules or RuleTables.active()
+        generation_changes = super().next_generation(rules, rule_counts)
 
         # If the temperature reach 100 celsius (or more), sea cells become Earth Cells
-        if self.temp >= SeaCell._temp_earth_cell_factor:
-            generation_changes['cell_change'] = CellTypes.EARTH
-
         # If the temperature reach -1 celsius (or less), sea cells become Iceberg Cells
-        if self.temp <= SeaCell._temp_iceberg_cell_factor:
-            generation_changes['cell_change'] = CellTypes.ICEBERG
+        self._check_transitions(generation_changes, rules, rule_counts)
 
         return generation_changes
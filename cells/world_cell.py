@@ -1,7 +1,20 @@
+from copy import copy
 from random import randint
 
 from settings import LogicSettings
 from direction_matrix import DirectionMatrix
+from cell_environment.wind import Wind
+from cell_environment.cloud import Cloud
+from rules import RuleTables
+from analytics.rule_counters import (
+    CLOUD_GENERATIONS,
+    CLOUD_RAINS,
+    WIND_GENERATIONS,
+    AIR_POLLUTION_COOLS,
+    AIR_POLLUTION_HEATS,
+    TRANSITIONS_MET,
+    NEIGHBORS_CHANGES_EMITTED
+)
 
 
 class WorldCell:
@@ -9,13 +22,6 @@ class WorldCell:
     Represent an abstraction for cell in the world.
     """
     _cell_type = None
-    _air_pollution_heat_bound = 0.60
-    _air_pollution_cool_bound = 0.25
-    _air_pollution_heat_temp_factor = 0.35
-    _air_pollution_cool_temp_factor = -0.05
-    _wind_air_pollution_percentage_factor = 0.35
-    _cloud_rain_temp_cool_factor = -1.5
-    _cloud_rain_air_pollution_drop_percentage_factor = -0.25
 
     def __init__(self, temp=None, air_pollution=None, wind_instance=None, cloud_instance=None):
         """
@@ -28,6 +34,8 @@ class WorldCell:
         self._air_pollution = air_pollution or 0
         self._wind_instance = wind_instance
         self._cloud_instance = cloud_instance
+        self._observer = None
+        self._location = None
 
     @property
     def type(self):
@@ -52,13 +60,28 @@ class WorldCell:
 
         :param new_temp: New temp value.
         """
-        if new_temp > 150:
-            self._temp = 150
-        elif new_temp < -50:
-            self._temp = -50
+        self.set_temp(new_temp, RuleTables.active())
+
+    def set_temp(self, new_temp, rules):
+        """
+        Sets the temperature within the bounds of the rule tables, like the temp setter does with the active
+        rule tables (the generations look the rule tables up once and set the temperatures with them).
+
+        :param new_temp: New temp value.
+        :param rules: Rule tables of the temperature bounds.
+        """
+        old_temp = self._temp
+
+        if new_temp > rules.temp_max:
+            self._temp = rules.temp_max
+        elif new_temp < rules.temp_min:
+            self._temp = rules.temp_min
         else:
             self._temp = new_temp
 
+        if self._observer is not None and self._temp != old_temp:
+            self._observer.cell_changed(self._location, 'temp', old_temp, self._temp)
+
     @property
     def air_pollution(self):
         """
@@ -75,13 +98,28 @@ class WorldCell:
 
         :param new_air_pollution: New air pollution value.
         """
-        if new_air_pollution > 1:
-            self._air_pollution = 1
-        elif new_air_pollution < 0:
-            self._air_pollution = 0
+        self.set_air_pollution(new_air_pollution, RuleTables.active())
+
+    def set_air_pollution(self, new_air_pollution, rules):
+        """
+        Sets the air pollution within the bounds of the rule tables, like the air pollution setter does with
+        the active rule tables.
+
+        :param new_air_pollution: New air pollution value.
+        :param rules: Rule tables of the air pollution bounds.
+        """
+        old_air_pollution = self._air_pollution
+
+        if new_air_pollution > rules.air_pollution_max:
+            self._air_pollution = rules.air_pollution_max
+        elif new_air_pollution < rules.air_pollution_min:
+            self._air_pollution = rules.air_pollution_min
         else:
             self._air_pollution = new_air_pollution
 
+        if self._observer is not None and self._air_pollution != old_air_pollution:
+            self._observer.cell_changed(self._location, 'air_pollution', old_air_pollution, self._air_pollution)
+
     @property
     def wind(self):
         """
@@ -98,8 +136,12 @@ class WorldCell:
 
         :param new_wind: New wind instance value.
         """
+        old_wind = self._wind_instance
         self._wind_instance = new_wind
 
+        if self._observer is not None and new_wind is not old_wind:
+            self._observer.cell_changed(self._location, 'wind', old_wind, new_wind)
+
     @property
     def cloud(self):
         """
@@ -116,9 +158,54 @@ class WorldCell:
 
         :param new_cloud: New cloud instance value.
         """
+        old_cloud = self._cloud_instance
         self._cloud_instance = new_cloud
 
-    def next_generation(self):
+        if self._observer is not None and new_cloud is not old_cloud:
+            self._observer.cell_changed(self._location, 'cloud', old_cloud, new_cloud)
+
+    @property
+    def location(self):
+        """
+        Getter for location of the cell in the world grid.
+
+        :return: (row, col) location of the cell, or None if the cell is not attached to a world.
+        """
+        return self._location
+
+    def attach_observer(self, observer, location):
+        """
+        Attaches observer which will be notified about every change of the cell properties.
+
+        :param observer: World observer instance to notify
+        :param location: (row, col) location of the cell in the world grid
+        """
+        self._observer = observer
+        self._location = location
+
+    def detach_observer(self):
+        """
+        Detaches the observer of the cell, so changes will not be notified anymore.
+        """
+        self._observer = None
+
+    def copy(self):
+        """
+        Creates copy of the cell with copies of its wind and cloud, which is not attached to any observer.
+        Unlike CellFactory.change_cell_type, no value of the copy is randomized.
+
+        :return: New cell of the same type and values
+        """
+        cell_copy = copy(self)
+        cell_copy._wind_instance = None if self._wind_instance is None else Wind(wind_instance=self._wind_instance)
+        cell_copy._cloud_instance = \
+            None if self._cloud_instance is None else Cloud(cloud_instance=self._cloud_instance)
+        cell_copy._observer = None
+        cell_copy._location = None
+
+        return cell_copy
+
+    def next_generation(self, rules=None, rule_counts=None):
         """
         Updates the world cell properties as generation passed.
         As defaults:
@@ -127,36 +214,60 @@ class WorldCell:
         - If air pollution above heat bound - temperature grows by heat factor.
         - If air pollution below cool bound - temperature drops by cool factor.
 
+        :param rules: Rule tables to apply, None for the active rule tables
+        :param rule_counts: List of rule counts to count the rules fired into (see RuleCounters), None for not counting
         :return: Object of changes which occurs outside the cell (wind properties and more)
         """
-
+        rules = rules or RuleTables.active()
         generation_changes = {}
 
         # If cloud exists, update the properties of the cell accordingly
         if self.cloud is not None:
-            if self.cloud.should_rain():
-                self.temp += WorldCell._cloud_rain_temp_cool_factor
-                self.air_pollution += self.air_pollution * WorldCell._cloud_rain_air_pollution_drop_percentage_factor
+            if rule_counts is not None:
+                rule_counts[CLOUD_GENERATIONS] += 1
+
+            if self.cloud.should_rain(rules):
+                if rule_counts is not None:
+                    rule_counts[CLOUD_RAINS] += 1
+
+                self.set_temp(self.temp + rules.cloud_rain_temp_cool_factor, rules)
+                self.set_air_pollution(
+                    self.air_pollution + self.air_pollution * rules.cloud_rain_air_pollution_drop_percentage_factor,
+                    rules
+                )
 
             # Continue in the next generation of the cloud
-            self.cloud.next_generation()
+            old_precipitation = self.cloud.precipitation
+            self.cloud.next_generation(rules)
+
+            if self._observer is not None:
+                self._observer.cell_changed(self._location, 'precipitation', old_precipitation, self.cloud.precipitation)
 
         # If wind exists, update the properties of the cell accordingly
         if self.wind is not None:
+            if rule_counts is not None:
+                rule_counts[WIND_GENERATIONS] += 1
+
             generation_changes['environment'] = {
                 **self.wind.next_generation(),
                 'wind_instance': self.wind,
                 'cloud_instance': self.cloud,
-                'air_pollution_passed': self.air_pollution * WorldCell._wind_air_pollution_percentage_factor
+                'air_pollution_passed': self.air_pollution * rules.wind_air_pollution_percentage_factor
             }
 
         # If the air pollution is below the cooling bound, the cell can be cooled
-        if self.air_pollution <= WorldCell._air_pollution_cool_bound:
-            self.temp += WorldCell._air_pollution_cool_temp_factor
+        if self.air_pollution <= rules.air_pollution_cool_bound:
+            if rule_counts is not None:
+                rule_counts[AIR_POLLUTION_COOLS] += 1
+
+            self.set_temp(self.temp + rules.air_pollution_cool_temp_factor, rules)
 
         # If the air pollution is above the heating bound, the cell can be heated
-        if self.air_pollution >= WorldCell._air_pollution_heat_bound:
-            self.temp += WorldCell._air_pollution_heat_temp_factor
+        if self.air_pollution >= rules.air_pollution_heat_bound:
+            if rule_counts is not None:
+                rule_counts[AIR_POLLUTION_HEATS] += 1
+
+            self.set_temp(self.temp + rules.air_pollution_heat_temp_factor, rules)
 
         return generation_changes
 
@@ -174,6 +285,45 @@ class WorldCell:
 
         return 0
 
+    def _check_transitions(self, generation_changes, rules, rule_counts=None):
+        """
+        Checks the cell type transitions rules of the cell type, and adds cell change
+        to the generation changes for the last transition met.
+
+        :param generation_changes: Object of generation changes to add the cell change to
+        :param rules: Rule tables to check the transitions by
+        :param rule_counts: List of rule counts to count the rules fired into, None for not counting
+        """
+        is_transition_met = False
+
+        for (field, _, operator, threshold, new_cell_type) in rules.transitions[self._cell_type.value]:
+            if operator(getattr(self, field), threshold):
+                generation_changes['cell_change'] = new_cell_type
+                is_transition_met = True
+
+        if rule_counts is not None and is_transition_met:
+            rule_counts[TRANSITIONS_MET] += 1
+
+    def _add_neighbors_changes(self, generation_changes, rules, rule_counts=None):
+        """
+        Adds the change the cell type applies on its neighbors to the generation changes
+
+        :param generation_changes: Object of generation changes to add the neighbors changes to
+        :param rules: Rule tables of the neighbors changes
+        :param rule_counts: List of rule counts to count the rules fired into, None for not counting
+        """
+        if rules.neighbors_change_field[self._cell_type.value] is None:
+            return
+
+        if rule_counts is not None:
+            rule_counts[NEIGHBORS_CHANGES_EMITTED] += 1
+
+        generation_changes['apply_changes_locations'] = {
+            'field': rules.neighbors_change_field[self._cell_type.value],
+            'locations': self._get_all_neighbors_directions(),
+            'value': rules.neighbors_change_value[self._cell_type.value]
+        }
+
     def _get_all_neighbors_directions(self):
         """
         Returns all the possible neighbors directions (Basically all directions possible)
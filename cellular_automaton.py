@@ -1,11 +1,29 @@
+from contextlib import nullcontext
 from csv import reader
-from random import randint, sample
+from random import randint, sample, choices
+from time import perf_counter
+from weakref import finalize
 
 from settings import LogicSettings, CellTypes
 from cells.cell_factory import CellFactory
 from cell_environment.wind import Wind
 from cell_environment.cloud import Cloud
 from direction_matrix import DirectionMatrix
+from world_observer import WorldObserverGroup
+from world_tiles import WorldTiles
+from analytics.world_statistics import WorldStatistics
+from engines.engine import create_engine
+from rules import RuleTables
+from analytics.rule_counters import (
+    WIND_MOVES,
+    WIND_REFLECTIONS,
+    WIND_STUCK,
+    WIND_RAYS_APPLIED,
+    WIND_RAYS_CLIPPED,
+    NEIGHBORS_CHANGES_APPLIED,
+    NEIGHBORS_CHANGES_CLIPPED,
+    CELL_CHANGES
+)
 
 
 class CellularAutomaton:
@@ -16,17 +34,57 @@ class CellularAutomaton:
     __environment_dist_min = 10
     __environment_dist_max = 15
     __cell_data_delimiter = ';'
-    __wind_dist_map = [
-        {25: (0, 0)},
-        {60: (5, 10)},
-        {10: (10, 15)},
-        {5: (16, 20)}
-    ]
-
-    def __init__(self, world_file_path=LogicSettings.WORLD_FILE_PATH):
+
+    def __init__(self, world_file_path=LogicSettings.WORLD_FILE_PATH, engine='reference'):
+        """
+        Creates cellular automaton of a world.
+
+        The reference engine passes the generations over the world cells. The array engines (vectorized and jit)
+        pass the generations over array state of the world, and the world cells (and so the world observers)
+        are synced with it lazily, only when they are accessed. Then the per generation statistics (like
+        the generation transitions) count the changes of all the generations since the last sync.
+
+        :param world_file_path: Path to world file
+        :param engine: Name of the engine which passes the generations (one of ENGINES) or engine instance
+        """
+        self.__engine = create_engine(engine)
         self.__environment_dist = CellularAutomaton.generate_environment_dist()
         self.__generation = 0
+        self.__observers = WorldObserverGroup()
+        self.__stats = None
+        self.__world_arrays = None
+        self.__region_index = None
+        self.__state_hasher = None
+        self.__rule_counters = None
+        self.__metrics = None
+        self.__memory_profiler = None
+        self.__pyramid = None
+        self.__pyramid_key = None
+        self.__array_state = None
+        self.__array_transitions = 0
+        self.__array_quiet_generations = 0
+        self.__world_grid_synced = True
+        self.__edited_locations = set()
         self.__read_world_file(world_file_path)
+        self.__world_tiles = WorldTiles(len(self.__world_grid), len(self.__world_grid[0]), self.__observers)
+        finalize(self, self.__world_tiles.release)
+        self.__attach_world_grid_observers()
+        self.__observers.generation_passed(self.__generation)
+
+        if self.__engine.uses_arrays:
+            # Imported here since numpy is only required for the array based features
+            from engines.array_kernels import ArrayWorldState
+
+            self.__array_state = ArrayWorldState.from_world_arrays([self.world_arrays])
+
+    @property
+    def engine(self):
+        """
+        Getter for the engine which passes the generations
+
+        :return: Engine instance
+        """
+        return self.__engine
 
     @property
     def generation(self):
@@ -44,16 +102,462 @@ class CellularAutomaton:
 
         :return: World grid matrix
         """
+        self.__sync_world_grid()
         return self.__world_grid
 
+    @property
+    def stats(self):
+        """
+        Getter for the world statistics, which are maintained incrementally as generations pass from the first time
+        they are accessed (see enable_statistics)
+
+        :return: World statistics instance
+        """
+        self.__sync_world_grid()
+        return self.enable_statistics()
+
+    def enable_statistics(self):
+        """
+        Enables the world statistics, which are maintained incrementally from now on. Every change of the world cells
+        updates them, so they are enabled only once needed (by accessing stats, or ahead of time for the history
+        of all the generations)
+
+        :return: World statistics instance
+        """
+        if self.__stats is None:
+            self.__stats = WorldStatistics(generation=self.__generation)
+            self.add_observer(self.__stats)
+            self.__stats.generation_passed(self.__generation)
+
+        return self.__stats
+
+    def array_stats(self):
+        """
+        Returns the statistics of the current generation calculated from the array state of the array engines,
+        without syncing the world cells (see ArrayStatistics, each statistic is array of the single world).
+        The cell type transitions are counted by next_generation, advance restarts the generations without them.
+
+        :return: Array statistics instance, or None for the reference engine
+        """
+        if self.__array_state is None:
+            return None
+
+        # Imported here since numpy is only required for the array based features
+        from numpy import array
+        from analytics.array_statistics import ArrayStatistics
+
+        self.__apply_edited_locations()
+
+        return ArrayStatistics(
+            self.__array_state,
+            array([self.__generation]),
+            array([self.__array_transitions]),
+            array([self.__array_quiet_generations])
+        )
+
+    @property
+    def world_arrays(self):
+        """
+        Getter for the world state as arrays, which are created on first use and kept in sync
+        with the world cells from then on
+
+        :return: World arrays instance
+        """
+        if self.__world_arrays is None:
+            # Imported here since numpy is only required for the array based features
+            from world_arrays import WorldArrays
+
+            self.__world_arrays = WorldArrays(len(self.__world_grid), len(self.__world_grid[0]))
+            self.add_observer(self.__world_arrays)
+
+        self.__sync_world_grid()
+        return self.__world_arrays
+
+    def field_array(self, field):
+        """
+        Returns read only view of a field of the world state (one of WorldArrays.fields), without copying it.
+        The array engines don't sync the world cells for it, and the view changes as the generations pass.
+
+        :param field: Name of the field
+        :return: Array of the field values, in the shape of the world
+        """
+        # Imported here since numpy is only required for the array based features
+        from world_arrays import WorldArrays
+
+        if field not in WorldArrays.fields:
+            raise ValueError(f'Unknown world field given "{field}".')
+
+        if self.__array_state is None:
+            field_values = getattr(self.world_arrays, field).view()
+        else:
+            # Changes made through writable_cell are part of the state as soon as they're made
+            self.__apply_edited_locations()
+            field_values = getattr(self.__array_state, field)[0]
+
+        field_values.flags.writeable = False
+        return field_values
+
+    def iter_generations(self, num_generations, every=1, fields=None, include_current=False):
+        """
+        Runs number of generations and yields read only view of every Nth of them, as arrays of the requested
+        fields only (see field_array). The views are not copies, so consumers which keep a view beyond its
+        generation should keep copy of it. The generations are passed only as the views are consumed, so slow
+        consumers hold back the run rather than views piling up.
+
+        :param num_generations: Number of generations to run
+        :param every: Yield only generations which are multiple of it
+        :param fields: List of the fields of the views (of WorldArrays.fields), None for all the fields
+        :param include_current: Whether to yield the current generation first (when it's multiple of every)
+        :return: Iterator of generation views
+        """
+        # Imported here since numpy is only required for the array based features
+        from world_arrays import WorldArrays
+
+        fields = fields or list(WorldArrays.fields)
+
+        # The fields are checked right away, rather than once the iteration starts
+        for field in fields:
+            self.field_array(field)
+
+        return self.__iter_generations(num_generations, every, fields, include_current)
+
+    def snapshot(self, fields=None):
+        """
+        Creates snapshot of the current generation, copies of the requested fields which don't change as the
+        generations pass, so it can be handed to other threads and processes (such as OutputPipeline)
+
+        :param fields: List of the fields of the snapshot (of WorldArrays.fields), None for all the fields
+        :return: Generation view with copies of the arrays
+        """
+        # Imported here since numpy is only required for the array based features
+        from world_arrays import WorldArrays, GenerationView
+
+        return GenerationView(
+            self.__generation,
+            {field: self.field_array(field) for field in fields or WorldArrays.fields}
+        ).copy()
+
+    @property
+    def region_index(self):
+        """
+        Getter for the region index of the world
+
+        :return: Region index instance, or None if the region index is not enabled
+        """
+        self.__sync_world_grid()
+        return self.__region_index
+
+    def enable_region_index(self):
+        """
+        Enables region index for constant time rectangular region queries over the world
+
+        :return: Region index instance
+        """
+        if self.__region_index is None:
+            from analytics.region_index import RegionIndex
+
+            self.__region_index = RegionIndex(self.world_arrays)
+
+        return self.__region_index
+
+    @property
+    def pyramid(self):
+        """
+        Getter for the state pyramid of the world, which is updated (only where cells changed) when it's accessed
+        after the world changed
+
+        :return: State pyramid instance, or None if the state pyramid is not enabled
+        """
+        if self.__pyramid is not None:
+            pyramid_state = self.__pyramid_state()
+
+            if self.__pyramid_key != (self.__generation, self.__world_arrays.version):
+                self.__pyramid.update(pyramid_state)
+                self.__pyramid_key = (self.__generation, self.__world_arrays.version)
+
+        return self.__pyramid
+
+    def enable_pyramid(self):
+        """
+        Enables multi resolution pyramid of the world state, for overviews and analytics of blocks of cells
+
+        :return: State pyramid instance
+        """
+        if self.__pyramid is None:
+            from analytics.state_pyramid import StatePyramid
+
+            self.__pyramid = StatePyramid(self.__pyramid_state())
+            self.__pyramid_key = (self.__generation, self.__world_arrays.version)
+
+        return self.__pyramid
+
+    @property
+    def state_hasher(self):
+        """
+        Getter for the world state hasher
+
+        :return: State hasher instance, or None if state hashing is not enabled
+        """
+        self.__sync_world_grid()
+        return self.__state_hasher
+
+    def enable_state_hashing(self):
+        """
+        Enables incremental hashing of the world state, used for detecting fixed points and cycles
+
+        :return: State hasher instance
+        """
+        if self.__state_hasher is None:
+            from analytics.state_hash import StateHasher
+
+            self.__state_hasher = StateHasher()
+            self.add_observer(self.__state_hasher)
+
+        return self.__state_hasher
+
+    @property
+    def rule_counters(self):
+        """
+        Getter for the rule counters of the world
+
+        :return: Rule counters instance, or None if the rule counting is not enabled
+        """
+        self.__sync_world_grid()
+        return self.__rule_counters
+
+    def enable_rule_counters(self):
+        """
+        Enables counting how many times each rule fires and the cell type transitions of each generation
+
+        :return: Rule counters instance
+        """
+        if self.__rule_counters is None:
+            from analytics.rule_counters import RuleCounters
+
+            self.__rule_counters = RuleCounters()
+            self.add_observer(self.__rule_counters)
+            self.__observers.rule_counters = self.__rule_counters
+
+        return self.__rule_counters
+
+    def disable_rule_counters(self):
+        """
+        Disables the rule counting, so the rules don't count anything at all
+        """
+        if self.__rule_counters is not None:
+            self.__observers.rule_counters = None
+            self.remove_observer(self.__rule_counters)
+            self.__rule_counters = None
+
+    @property
+    def metrics(self):
+        """
+        Getter for the live metrics of the run
+
+        :return: Run metrics instance, or None if the metrics are not enabled
+        """
+        return self.__metrics
+
+    def enable_metrics(self, window_size=1000):
+        """
+        Enables live metrics of the run, fed by the timings of the generations
+
+        :param window_size: Number of recent generations the rate and the latency quantiles are calculated over
+        :return: Run metrics instance
+        """
+        if self.__metrics is None:
+            from analytics.run_metrics import RunMetrics
+
+            self.__metrics = RunMetrics(window_size)
+
+        return self.__metrics
+
+    @property
+    def memory_profiler(self):
+        """
+        Getter for the memory profiler of the automaton
+
+        :return: Memory profiler instance, or None if the memory profiling is not enabled
+        """
+        return self.__memory_profiler
+
+    def enable_memory_profiling(self):
+        """
+        Enables profiling the memory of the automaton, tracing the allocations of the generation phases
+
+        :return: Memory profiler instance
+        """
+        if self.__memory_profiler is None:
+            from analytics.memory_profile import MemoryProfiler
+
+            self.__memory_profiler = MemoryProfiler()
+
+        return self.__memory_profiler
+
+    def disable_memory_profiling(self):
+        """
+        Disables profiling the memory of the automaton, and stops tracing the allocations
+        """
+        if self.__memory_profiler is not None:
+            self.__memory_profiler.stop()
+            self.__memory_profiler = None
+
+    def memory_report(self, canvas=None):
+        """
+        Creates report of the memory of the automaton by subsystem, see MemoryProfiler.report
+
+        :param canvas: Canvas of GUI which draws the automaton, None for no GUI
+        :return: Dictionary of the memory report
+        """
+        if self.__memory_profiler is None:
+            raise ValueError('Memory profiling is not enabled.')
+
+        with self.memory_phase('sync'):
+            self.__sync_world_grid()
+
+        return self.__memory_profiler.report(
+            self.__generation,
+            self.__world_grid,
+            self.__observers.observers,
+            self.__array_state,
+            canvas
+        )
+
+    def memory_phase(self, name):
+        """
+        Returns context which traces the peak allocation of a phase when the memory profiling is enabled
+
+        :param name: Name of the phase
+        :return: Context manager of the phase
+        """
+        if self.__memory_profiler is None:
+            return nullcontext()
+
+        return self.__memory_profiler.phase(name)
+
+    def fork(self):
+        """
+        Creates branch of the automaton at its current generation, for trying changes (like changing cell types)
+        and comparing the branches. The branches share the world cells at tile granularity, and each branch copies
+        a tile only right before it writes to it, so forking costs memory proportional to what the branches change.
+
+        The branch has its own statistics, state hashing, region index, rule counters and state pyramid
+        (when enabled),
+        other observers are not carried to it.
+
+        :return: Cellular automaton instance of the branch
+        """
+        self.__sync_world_grid()
+
+        branch = CellularAutomaton.__new__(CellularAutomaton)
+        branch.__initialize_branch(self)
+
+        return branch
+
+    def writable_cell(self, cell_location):
+        """
+        Returns cell for changing it, copying its tile first when the tile is shared with other branches.
+        Changes to cells of automaton with array engine are applied to its array state on the next generation.
+
+        :param cell_location: (row, col) location of the cell
+        :return: The cell instance at the location
+        """
+        self.__sync_world_grid()
+
+        (cell_row, cell_col) = cell_location
+        self.__world_tiles.own(cell_row, cell_col, self.__world_grid)
+
+        if self.__array_state is not None:
+            self.__edited_locations.add(cell_location)
+
+        return self.__world_grid[cell_row][cell_col]
+
+    def change_cell_type(self, cell_location, new_cell_type):
+        """
+        Replaces cell with new cell of the given type, which has the same properties
+
+        :param cell_location: (row, col) location of the cell
+        :param new_cell_type: The cell type to change to
+        """
+        self.writable_cell(cell_location)
+        self.__change_cell_type(cell_location, new_cell_type, self.__world_grid)
+
+    def add_observer(self, observer):
+        """
+        Adds observer to the world cells changes.
+        The observer is notified about all the existing cells as they were just added.
+
+        :param observer: World observer instance to add
+        """
+        self.__sync_world_grid()
+
+        for row_index in range(len(self.__world_grid)):
+            for col_index in range(len(self.__world_grid[row_index])):
+                observer.cell_added((row_index, col_index), self.__world_grid[row_index][col_index])
+
+        self.__observers.add(observer)
+
+    def remove_observer(self, observer):
+        """
+        Removes observer from the world cells changes
+
+        :param observer: World observer instance to remove
+        """
+        self.__observers.remove(observer)
+
     def next_generation(self):
         """
         Updates the whole world cells, wind and clouds as generation passed.
 
+        """
+        if self.__metrics is None:
+            self.__pass_generation()
+            return
+
+        start_time = perf_counter()
+        self.__pass_generation()
+        step_seconds = perf_counter() - start_time
+
+        # The statistics of the array engines are synced only when accessed, so their state is counted instead
+        if self.__array_state is not None:
+            # Imported here since numpy is only required for the array based features
+            from numpy import count_nonzero
+
+            num_winds = int(count_nonzero(self.__array_state.wind_direction[0] >= 0))
+            num_clouds = int(count_nonzero(self.__array_state.cloud_precipitation[0] >= 0))
+        else:
+            (num_winds, num_clouds) = (self.stats.num_winds, self.stats.num_clouds)
+
+        self.__metrics.record_generation(
+            self.__generation,
+            step_seconds,
+            len(self.__world_grid) * len(self.__world_grid[0]),
+            num_winds,
+            num_clouds
+        )
+
+    def __pass_generation(self):
+        """
+        Passes single generation by the engine of the automaton
         """
         # Update the generation counter
         self.__generation += 1
 
+        # The array engines update only the array state, the world cells are synced when accessed
+        if self.__array_state is not None:
+            with self.memory_phase('step_arrays'):
+                self.__apply_edited_locations()
+                changed_type = self.__engine.step_arrays(self.__array_state, self.__get_array_rules())
+
+            # The transitions are counted for the array statistics, which don't sync the world cells
+            self.__array_transitions = int(changed_type.sum())
+            self.__array_quiet_generations = 0 if self.__array_transitions > 0 else self.__array_quiet_generations + 1
+            self.__world_grid_synced = False
+            return
+
+        # All the cells may change, so tiles shared with other branches are copied first
+        self.__world_tiles.own_all(self.__world_grid)
+
         # Copy the world grid to apply inline cell generation transitions
         copy_world_grid = list(self.__world_grid)
 
@@ -63,41 +567,119 @@ class CellularAutomaton:
         # Generation changes list, containing the changes needed for the cell or its environment
         generation_changes = []
 
+        # The rules each cell fires are counted apart, since cells with exterior changes pass the generation twice
+        # and only the changes of the second time are applied (and counted)
+        rule_counters = self.__observers.rule_counters
+        cell_rule_counts = None if rule_counters is None else [0] * len(rule_counters.counts)
+
+        # The rule tables are looked up once for all the cells
+        rules = RuleTables.active()
+
         # Apply inline cell generation transitions
-        for row_index in range(len(copy_world_grid)):
-            for col_index in range(len(copy_world_grid[row_index])):
-                cell_next_generation_changes = copy_world_grid[row_index][col_index].next_generation()
+        with self.memory_phase('cell_transitions'):
+            for row_index in range(len(copy_world_grid)):
+                for col_index in range(len(copy_world_grid[row_index])):
+                    cell_next_generation_changes = \
+                        copy_world_grid[row_index][col_index].next_generation(rules, cell_rule_counts)
+
+                    # If the generation changes actually contains exterior changes
+                    if len(cell_next_generation_changes) > 0:
+                        if cell_rule_counts is not None:
+                            cell_rule_counts[:] = [0] * len(cell_rule_counts)
 
-                # If the generation changes actually contains exterior changes
-                if len(cell_next_generation_changes) > 0:
-                    generation_changes.append(
-                        {(row_index, col_index): copy_world_grid[row_index][col_index].next_generation()}
-                    )
+                        generation_changes.append({
+                            (row_index, col_index):
+                                copy_world_grid[row_index][col_index].next_generation(rules, cell_rule_counts)
+                        })
+
+                    if cell_rule_counts is not None:
+                        rule_counters.move_counts(cell_rule_counts)
+
+        if self.__memory_profiler is not None:
+            self.__memory_profiler.record_generation_changes(generation_changes)
 
         # Apply generation changes on the cells
-        for generation_change_obj in generation_changes:
-            (row_index, col_index) = list(generation_change_obj.keys())[0]
-
-            # Applying the generation change
-            self.apply_generation_change(
-                (row_index, col_index),
-                generation_change_obj[(row_index, col_index)],
-                copy_world_grid
-            )
+        with self.memory_phase('generation_changes'):
+            for generation_change_obj in generation_changes:
+                (row_index, col_index) = list(generation_change_obj.keys())[0]
+
+                # Applying the generation change
+                self.apply_generation_change(
+                    (row_index, col_index),
+                    generation_change_obj[(row_index, col_index)],
+                    copy_world_grid,
+                    rules
+                )
 
         # Set the new world grid as result of the generation changes
         self.__world_grid = copy_world_grid
 
-    def apply_generation_change(self, cell_location, generation_change, curr_generation_cells):
+        with self.memory_phase('generation_passed'):
+            self.__observers.generation_passed(self.__generation)
+
+    def advance(self, num_generations):
+        """
+        Passes number of generations in single loop of the engine, without the per generation work of
+        next_generation. The jit engine passes them in single compiled loop over scratch arrays which are allocated
+        once, so long runs allocate nothing per generation. Per generation metrics and memory phases need the
+        generations one by one, so when they're enabled (and for the reference engine) it's same as calling
+        next_generation number of times.
+
+        :param num_generations: Number of generations to pass
+        """
+        if self.__array_state is None or self.__metrics is not None or self.__memory_profiler is not None:
+            for _ in range(num_generations):
+                self.next_generation()
+
+            return
+
+        if num_generations <= 0:
+            return
+
+        self.__apply_edited_locations()
+        self.__engine.advance_arrays(self.__array_state, self.__get_array_rules(), num_generations)
+        self.__generation += num_generations
+
+        # The transitions of the generations passed in the loop of the engine are not counted
+        self.__array_transitions = 0
+        self.__array_quiet_generations = 0
+        self.__world_grid_synced = False
+
+    def fast_forward(self, num_generations, cycle_length):
+        """
+        Passes number of generations when the world state is known to repeat itself in a cycle,
+        by simulating only the generations which are not whole cycles.
+
+        :param num_generations: Number of generations to pass
+        :param cycle_length: The length of the cycle the world state is in
+        """
+        num_generations_left = num_generations % cycle_length
+
+        # Whole cycles bring the world to the same state, so only the generation counter is affected
+        self.__generation += num_generations - num_generations_left
+
+        for _ in range(num_generations_left):
+            self.next_generation()
+
+        if num_generations_left == 0:
+            if self.__array_state is not None:
+                self.__world_grid_synced = False
+            else:
+                self.__observers.generation_passed(self.__generation)
+
+    def apply_generation_change(self, cell_location, generation_change, curr_generation_cells, rules=None):
         """
         Applies current generation changes to current given generation cells
 
         :param cell_location: The location of the cell the generation change belongs to
         :param generation_change: Object of generation change for a given location
         :param curr_generation_cells: List of current generation cells
+        :param rules: Rule tables of the cells values bounds, None for the active rule tables
         """
+        rules = rules or RuleTables.active()
         (cell_row, cell_col) = cell_location
         curr_cell_instance = curr_generation_cells[cell_row][cell_col]
+        rule_counts = None if self.__observers.rule_counters is None else self.__observers.rule_counters.counts
 
         # Iterate over the keys which defined the types of generation changes need to perform
         for generation_change_key in generation_change.keys():
@@ -126,12 +708,25 @@ class CellularAutomaton:
                     # Calculate the next cell location of the moving wind
                     (wind_next_row, wind_next_col) = update_location_func(cell_row, cell_col)
 
+                    if rule_counts is not None:
+                        rule_counts[WIND_MOVES] += 1
+
                     # If the next location is not valid, need to opposite the direction of the wind
                     if not self.is_valid_location((wind_next_row, wind_next_col)):
                         wind_instance.set_opposite_direction()
                         (wind_next_row, wind_next_col) = \
                             getattr(DirectionMatrix, wind_instance.direction)(cell_row, cell_col)
 
+                        if rule_counts is not None:
+                            rule_counts[WIND_REFLECTIONS] += 1
+
+                        # Next to the corners both directions may lead outside the world, so the wind stays
+                        if not self.is_valid_location((wind_next_row, wind_next_col)):
+                            (wind_next_row, wind_next_col) = (cell_row, cell_col)
+
+                            if rule_counts is not None:
+                                rule_counts[WIND_STUCK] += 1
+
                     # Set the wind at the new location
                     curr_generation_cells[wind_next_row][wind_next_col].wind = wind_instance
 
@@ -144,19 +739,27 @@ class CellularAutomaton:
 
                         # Update only if the location is valid
                         if self.is_valid_location((curr_affect_row, curr_affect_col)):
-                            curr_generation_cells[curr_affect_row][curr_affect_col].air_pollution += air_pollution_passed
+                            affected_cell = curr_generation_cells[curr_affect_row][curr_affect_col]
+                            affected_cell.set_air_pollution(affected_cell.air_pollution + air_pollution_passed, rules)
+
+                            if rule_counts is not None:
+                                rule_counts[WIND_RAYS_APPLIED] += 1
+                        elif rule_counts is not None:
+                            rule_counts[WIND_RAYS_CLIPPED] += 1
 
             # Deal with cell type change
             if generation_change_key == 'cell_change':
-                new_cell_type = generation_change[generation_change_key]
-                curr_generation_cells[cell_row][cell_col] = \
-                    CellFactory.change_cell_type(curr_cell_instance, new_cell_type)
+                if rule_counts is not None:
+                    rule_counts[CELL_CHANGES] += 1
+
+                self.__change_cell_type(cell_location, generation_change[generation_change_key], curr_generation_cells)
 
             # Deal with area generation changes in results of the current cell
             if generation_change_key == 'apply_changes_locations':
                 changes_obj = generation_change[generation_change_key]
                 field = changes_obj['field']
                 value = changes_obj['value']
+                set_field = f'set_{field}'
 
                 # Apply the property change in each of the given locations
                 for location_funcs in changes_obj['locations']:
@@ -164,11 +767,225 @@ class CellularAutomaton:
 
                     # Apply only if it valid location of cell
                     if self.is_valid_location((curr_row, curr_col)):
-                        setattr(
-                            curr_generation_cells[curr_row][curr_col],
-                            field,
-                            getattr(curr_generation_cells[curr_row][curr_col], field) + value
-                        )
+                        neighbor_cell = curr_generation_cells[curr_row][curr_col]
+                        getattr(neighbor_cell, set_field)(getattr(neighbor_cell, field) + value, rules)
+
+                        if rule_counts is not None:
+                            rule_counts[NEIGHBORS_CHANGES_APPLIED] += 1
+                    elif rule_counts is not None:
+                        rule_counts[NEIGHBORS_CHANGES_CLIPPED] += 1
+
+    def __change_cell_type(self, cell_location, new_cell_type, curr_generation_cells):
+        """
+        Replaces cell with new cell of the given type, which has the same properties
+
+        :param cell_location: The location of the cell to replace
+        :param new_cell_type: The cell type to change to
+        :param curr_generation_cells: List of current generation cells
+        """
+        (cell_row, cell_col) = cell_location
+        self.__world_tiles.own(cell_row, cell_col, curr_generation_cells)
+        curr_cell_instance = curr_generation_cells[cell_row][cell_col]
+        new_cell_instance = CellFactory.change_cell_type(curr_cell_instance, new_cell_type)
+        curr_generation_cells[cell_row][cell_col] = new_cell_instance
+
+        # Move the observing of the location to the new cell instance
+        curr_cell_instance.detach_observer()
+        new_cell_instance.attach_observer(self.__observers, cell_location)
+        self.__observers.cell_replaced(cell_location, curr_cell_instance, new_cell_instance)
+
+    @staticmethod
+    def __get_array_rules():
+        """
+        Returns the array rules of the active rule tables, for the array engines
+
+        :return: Array rules instance
+        """
+        from engines.array_kernels import ArrayRules
+
+        return ArrayRules.for_rule_tables(RuleTables.active())
+
+    def __sync_world_grid(self):
+        """
+        Syncs the world cells with the array state of the array engines, through the cells setters
+        so the world observers are notified as well. Only the cells which changed are updated.
+        """
+        if self.__world_grid_synced:
+            return
+
+        self.__world_grid_synced = True
+
+        # The world arrays always reflect the world cells, so comparing them to the array state gives the changes
+        world_arrays = self.__world_arrays
+        directions = DirectionMatrix.get_all_directions()
+
+        for (row_index, col_index, new_temp) in self.__array_state_changes(world_arrays, 'temp'):
+            self.__own_cell(row_index, col_index).temp = new_temp
+
+        for (row_index, col_index, new_air_pollution) in self.__array_state_changes(world_arrays, 'air_pollution'):
+            self.__own_cell(row_index, col_index).air_pollution = new_air_pollution
+
+        for (row_index, col_index, new_precipitation) in \
+                self.__array_state_changes(world_arrays, 'cloud_precipitation'):
+            cloud_instance = self.__own_cell(row_index, col_index).cloud
+            old_precipitation = cloud_instance.precipitation
+            cloud_instance.precipitation = new_precipitation
+            self.__observers.cell_changed((row_index, col_index), 'precipitation', old_precipitation, new_precipitation)
+
+        # Moving winds always have speed, so creating them never randomizes their speed
+        wind_changes = zip(
+            self.__array_state_changes(world_arrays, 'wind_direction', 'wind_speed'),
+            self.__array_state_changes(world_arrays, 'wind_speed', 'wind_direction')
+        )
+
+        for ((row_index, col_index, new_direction), (_, _, new_speed)) in wind_changes:
+            self.__own_cell(row_index, col_index).wind = \
+                None if new_direction < 0 else Wind(direction=directions[new_direction], speed=new_speed)
+
+        for (row_index, col_index, new_cell_type) in self.__array_state_changes(world_arrays, 'cell_type'):
+            self.__change_cell_type((row_index, col_index), CellTypes(new_cell_type), self.__world_grid)
+
+        self.__observers.generation_passed(self.__generation)
+
+    def __iter_generations(self, num_generations, every, fields, include_current):
+        """
+        Runs number of generations and yields view of every Nth of them, see iter_generations
+
+        :param num_generations: Number of generations to run
+        :param every: Yield only generations which are multiple of it
+        :param fields: List of the fields of the views
+        :param include_current: Whether to yield the current generation first
+        :return: Iterator of generation views
+        """
+        from world_arrays import GenerationView
+
+        target_generation = self.__generation + num_generations
+
+        if include_current and self.__generation % every == 0:
+            yield GenerationView(self.__generation, {field: self.field_array(field) for field in fields})
+
+        while self.__generation < target_generation:
+            self.next_generation()
+
+            if self.__generation % every == 0:
+                yield GenerationView(self.__generation, {field: self.field_array(field) for field in fields})
+
+    def __pyramid_state(self):
+        """
+        Returns view of the fields of the world state which the state pyramid aggregates
+
+        :return: Generation view of the cell_type, temp and air_pollution fields
+        """
+        from world_arrays import GenerationView
+
+        return GenerationView(
+            self.__generation,
+            {field: self.field_array(field) for field in ['cell_type', 'temp', 'air_pollution']}
+        )
+
+    def __own_cell(self, row_index, col_index):
+        """
+        Returns cell for changing it while syncing, copying its tile first when the tile is shared
+
+        :param row_index: Row of the cell
+        :param col_index: Column of the cell
+        :return: The cell instance at the location
+        """
+        self.__world_tiles.own(row_index, col_index, self.__world_grid)
+        return self.__world_grid[row_index][col_index]
+
+    def __apply_edited_locations(self):
+        """
+        Applies the changes made to cells through writable_cell to the array state of the array engines
+        """
+        if not self.__edited_locations:
+            return
+
+        # writable_cell synced the world cells, so the world arrays already hold the edited values
+        world_arrays = self.__world_arrays
+
+        for (row_index, col_index) in self.__edited_locations:
+            for field in world_arrays.fields:
+                array_values = getattr(self.__array_state, field)
+                array_values[0, row_index, col_index] = getattr(world_arrays, field)[row_index, col_index]
+
+        self.__edited_locations.clear()
+
+    def __initialize_branch(self, parent):
+        """
+        Initializes new branch of parent automaton, which shares the world cells of the parent
+
+        :param parent: The automaton the branch is forked from
+        """
+        self.__engine = parent.__engine
+        self.__environment_dist = parent.__environment_dist
+        self.__generation = parent.__generation
+        self.__observers = WorldObserverGroup()
+        self.__stats = None
+        self.__world_arrays = None
+        self.__region_index = None
+        self.__state_hasher = None
+        self.__rule_counters = None
+        self.__metrics = None
+        self.__memory_profiler = None
+        self.__pyramid = None
+        self.__pyramid_key = None
+        self.__array_state = None
+        self.__array_transitions = 0
+        self.__array_quiet_generations = 0
+        self.__world_grid_synced = True
+        self.__edited_locations = set()
+        self.__world_grid = [list(row) for row in parent.__world_grid]
+        self.__world_tiles = parent.__world_tiles.share(self.__observers)
+        finalize(self, self.__world_tiles.release)
+
+        # The shared cells stay attached to the observers of their branch, until this branch writes to their tile
+        for row_index in range(len(self.__world_grid)):
+            for col_index in range(len(self.__world_grid[row_index])):
+                self.__observers.cell_added((row_index, col_index), self.__world_grid[row_index][col_index])
+
+        self.__observers.generation_passed(self.__generation)
+
+        if parent.__state_hasher is not None:
+            self.enable_state_hashing()
+
+        if parent.__region_index is not None:
+            self.enable_region_index()
+
+        if parent.__rule_counters is not None:
+            self.enable_rule_counters()
+
+        if parent.__stats is not None:
+            self.enable_statistics()
+
+        if parent.__array_state is not None:
+            parent.__apply_edited_locations()
+            self.world_arrays
+            self.__array_state = parent.__array_state.copy()
+
+        if parent.__pyramid is not None:
+            self.enable_pyramid()
+
+    def __array_state_changes(self, world_arrays, field, *other_fields):
+        """
+        Returns the cells where the array state differs from the world arrays
+
+        :param world_arrays: World arrays of the world cells
+        :param field: Name of the field to return the new values of
+        :param other_fields: Names of other fields which differences count as changes as well
+        :return: List of (row, col, new value) of the changed cells, in the cells order
+        """
+        # Imported here since numpy is only required for the array based features
+        from numpy import nonzero
+
+        new_values = getattr(self.__array_state, field)[0]
+        changed = getattr(world_arrays, field) != new_values
+
+        for other_field in other_fields:
+            changed |= getattr(world_arrays, other_field) != getattr(self.__array_state, other_field)[0]
+
+        (row_indices, col_indices) = nonzero(changed)
+        return list(zip(row_indices.tolist(), col_indices.tolist(), new_values[changed].tolist()))
 
     @staticmethod
     def generate_environment_dist():
@@ -179,6 +996,17 @@ class CellularAutomaton:
         """
         return randint(CellularAutomaton.__environment_dist_min, CellularAutomaton.__environment_dist_max)
 
+    @staticmethod
+    def random_wind_speed_range():
+        """
+        Draws wind speed range by the wind speed distribution of the active rules, for single wind
+
+        :return: (min speed, max speed) range
+        """
+        (percentages, speed_ranges) = zip(*RuleTables.active().wind_speed_distribution)
+
+        return choices(speed_ranges, weights=percentages)[0]
+
     def is_valid_location(self, location):
         """
         Checks if the location is valid (in the world grid)
@@ -207,17 +1035,17 @@ class CellularAutomaton:
     def generate_wind_speed_dist(self, location_list):
         """
         Generates the wind speed distribution across the wind instances locations
-        by the predefined wind speed distribution
+        by the wind speed distribution of the active rules
 
         :param location_list: List of locations for the wind instances
         :return: Dictionary of the locations as keys and temperature for each location as value
         """
         dist_wind_speed = {}
         curr_location_list = location_list
+        wind_speed_distribution = RuleTables.active().wind_speed_distribution
 
         # For each distribution, calculate number of locations to extract
-        for wind_dist_obj in self.__wind_dist_map:
-            percentage, speed_range = list(wind_dist_obj.items())[0]
+        for percentage, speed_range in wind_speed_distribution:
             num_to_select = int((percentage / 100) * len(location_list))
 
             selected_locations = sample(
@@ -231,7 +1059,7 @@ class CellularAutomaton:
 
         # If there's some leftovers, append them as first speed range selection
         if len(curr_location_list) > 0:
-            speed_range = list(self.__wind_dist_map[0].values())[0]
+            (_, speed_range) = wind_speed_distribution[0]
             dist_wind_speed = {**dist_wind_speed, **{loc: speed_range for loc in curr_location_list}}
 
         return dist_wind_speed
@@ -295,6 +1123,16 @@ class CellularAutomaton:
                 curr_row += 1
                 curr_col = 0
 
+    def __attach_world_grid_observers(self):
+        """
+        Attaches the world observers to all the cells in the world grid
+        """
+        for row_index in range(len(self.__world_grid)):
+            for col_index in range(len(self.__world_grid[row_index])):
+                cell_instance = self.__world_grid[row_index][col_index]
+                cell_instance.attach_observer(self.__observers, (row_index, col_index))
+                self.__observers.cell_added((row_index, col_index), cell_instance)
+
     @classmethod
     def __extract_cell_data(cls, cell):
         """
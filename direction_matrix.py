@@ -48,14 +48,16 @@ class DirectionMatrix:
         return cls.__opposite_directions[direction]
 
     @classmethod
-    def get_possible_direction_from_location(cls, location, border_size):
+    def get_possible_direction_from_location(cls, location, border_size, num_cols=None):
         """
         Returns all the possible directions from a given location
 
         :param location: Location to move from
         :param border_size: The border size bounds
-        :return: List of possible directions from the given location
+        :param num_cols: The columns bound of world which is not square, None for the border size
+        :return: List of possible directions from the given location (in the order of all the directions)
         """
+        num_cols = border_size if num_cols is None else num_cols
         curr_possible_directions = set(cls.get_all_directions())
         location_row, location_col = location
 
@@ -74,10 +76,11 @@ class DirectionMatrix:
 
         # If the location is on the border size column
         # means we can't move right, so all the right directions are removed
-        if location_col == border_size - 1:
+        if location_col == num_cols - 1:
             curr_possible_directions -= {'right', 'up_right', 'down_right'}
 
-        return list(curr_possible_directions)
+        # Keep the directions order fixed, so seeded random choice of direction is reproducible
+        return [direction for direction in cls.get_all_directions() if direction in curr_possible_directions]
 
     @staticmethod
     def up(row, col):
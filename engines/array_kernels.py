@@ -0,0 +1,398 @@
+from random import randint
+
+import numpy as np
+
+from settings import LogicSettings, CellTypes
+from direction_matrix import DirectionMatrix
+from world_arrays import WorldArrays
+
+
+class ArrayWorldState:
+    """
+    Represent the state of one or more worlds of the same dimensions as arrays,
+    where the first axis of each array is the world index (the batch axis).
+    """
+
+    def __init__(self, cell_type, temp, air_pollution, wind_direction, wind_speed, cloud_precipitation):
+        self.cell_type = cell_type
+        self.temp = temp
+        self.air_pollution = air_pollution
+        self.wind_direction = wind_direction
+        self.wind_speed = wind_speed
+        self.cloud_precipitation = cloud_precipitation
+
+    @classmethod
+    def from_world_arrays(cls, world_arrays_list):
+        """
+        Creates state of batch of worlds from their world arrays
+
+        :param world_arrays_list: List of world arrays instances, all in the same dimensions
+        :return: State of the worlds batch
+        """
+        return cls(*[
+            np.stack([getattr(world_arrays, field) for world_arrays in world_arrays_list])
+            for field in WorldArrays.fields
+        ])
+
+    @property
+    def shape(self):
+        """
+        Getter for the shape of the state arrays
+
+        :return: (num_worlds, num_rows, num_cols)
+        """
+        return self.temp.shape
+
+    def copy(self):
+        """
+        Copies the state
+
+        :return: New state with copied arrays
+        """
+        return ArrayWorldState(*[getattr(self, field).copy() for field in WorldArrays.fields])
+
+
+class ArrayRules:
+    """
+    Represent the active rule tables as arrays indexed by cell type value, used by the array kernels.
+    """
+    _cached = None
+
+    def __init__(self, rule_tables):
+        """
+        Creates array rules from rule tables
+
+        :param rule_tables: Compiled rule tables
+        """
+        self.rule_tables = rule_tables
+        self.temp_min = rule_tables.temp_min
+        self.temp_max = rule_tables.temp_max
+        self.air_pollution_min = rule_tables.air_pollution_min
+        self.air_pollution_max = rule_tables.air_pollution_max
+
+        # Transitions as (cell type value, field, operator, threshold, new cell type value)
+        self.transitions = [
+            (cell_type_value, field, operator, threshold, new_cell_type.value)
+            for cell_type_value, cell_type_transitions in enumerate(rule_tables.transitions)
+            for (field, _, operator, threshold, new_cell_type) in cell_type_transitions
+        ]
+        self.rain_transitions = [
+            (cell_type_value, air_pollution_max, rule_tables.rain_transition_cell_type[cell_type_value].value)
+            for cell_type_value, air_pollution_max in enumerate(rule_tables.rain_transition_air_pollution_max)
+            if air_pollution_max is not None
+        ]
+
+        # Neighbors change field as code (0 - none, 1 - temp, 2 - air pollution)
+        self.neighbors_change_field = np.array([
+            {None: 0, 'temp': 1, 'air_pollution': 2}[field] for field in rule_tables.neighbors_change_field
+        ], dtype=np.int8)
+        self.neighbors_change_value = np.array(rule_tables.neighbors_change_value, dtype=np.float64)
+        self.air_pollution_grow_factor = np.array(rule_tables.air_pollution_grow_factor, dtype=np.float64)
+
+        # Range of the random temperature given to new cell with temperature of 0
+        self.random_temp_range = [
+            (LogicSettings.TEMP[cell_type]['START'], LogicSettings.TEMP[cell_type]['END']) for cell_type in CellTypes
+        ]
+
+        directions = DirectionMatrix.get_all_directions()
+        self.direction_deltas = np.array([getattr(DirectionMatrix, direction)(0, 0) for direction in directions])
+        self.opposite_directions = np.array([
+            directions.index(DirectionMatrix.get_opposite_direction(direction)) for direction in directions
+        ])
+
+        # The wind ray (direction index, distance) which reaches from a source to a target at offset
+        self.ray_by_offset = {}
+
+        for direction_index, (row_delta, col_delta) in enumerate(self.direction_deltas):
+            for distance in range(1, max(LogicSettings.NUM_CELLS, 1) + 1):
+                self.ray_by_offset[(-row_delta * distance, -col_delta * distance)] = (direction_index, distance)
+
+    @classmethod
+    def for_rule_tables(cls, rule_tables):
+        """
+        Returns the array rules of rule tables, reusing the last compiled array rules when possible
+
+        :param rule_tables: Compiled rule tables
+        :return: Array rules of the rule tables
+        """
+        if cls._cached is None or cls._cached.rule_tables is not rule_tables:
+            cls._cached = cls(rule_tables)
+
+        return cls._cached
+
+
+def step_arrays(state, array_rules, active_worlds=None):
+    """
+    Passes a generation in all the worlds of the state (in place), following the same rules
+    and the same order of applying changes as CellularAutomaton.next_generation.
+
+    :param state: Array world state to update
+    :param array_rules: Array rules to apply
+    :param active_worlds: Boolean array of the worlds to update, None for all the worlds
+    :return: Boolean array of the cells which changed their type
+    """
+    if active_worlds is None:
+        active_cells = np.ones(state.shape, dtype=bool)
+    else:
+        active_cells = np.broadcast_to(active_worlds[:, np.newaxis, np.newaxis], state.shape)
+
+    # The automaton calls the cell generation update a second time for cells with exterior changes,
+    # and applies only the changes of the second call
+    _, _, has_changes = update_cells(state, array_rules, active_cells)
+    new_cell_type, air_pollution_passed, _ = update_cells(state, array_rules, has_changes)
+
+    changed_type = apply_cells_changes(state, array_rules, has_changes, new_cell_type, air_pollution_passed)
+    move_winds(state, array_rules, has_changes)
+
+    return changed_type
+
+
+def update_cells(state, array_rules, cells_mask):
+    """
+    Updates the inner properties of the cells as WorldCell.next_generation (and its subclasses) does
+
+    :param state: Array world state to update
+    :param array_rules: Array rules to apply
+    :param cells_mask: Boolean array of the cells to update
+    :return: Tuple of (new cell type array (-1 for no change), air pollution passed by wind array,
+             boolean array of the cells which have exterior changes)
+    """
+    cell_type = state.cell_type
+    temp = state.temp
+    air_pollution = state.air_pollution
+    precipitation = state.cloud_precipitation
+    rule_tables = array_rules.rule_tables
+
+    has_cloud = cells_mask & (precipitation >= 0)
+    should_rain = has_cloud & (precipitation == rule_tables.cloud_max_precipitation)
+
+    # Rain transition is checked before the cell is updated
+    rain_cell_type = np.full(cell_type.shape, -1, dtype=np.int8)
+
+    for (cell_type_value, air_pollution_max, new_cell_type_value) in array_rules.rain_transitions:
+        rain_cell_type[should_rain & (cell_type == cell_type_value) & (air_pollution <= air_pollution_max)] = \
+            new_cell_type_value
+
+    # Rain cools the cell and drops its air pollution
+    temp[should_rain] = _clip_temp(temp[should_rain] + rule_tables.cloud_rain_temp_cool_factor, array_rules)
+    air_pollution[should_rain] = _clip_air_pollution(
+        air_pollution[should_rain] +
+        air_pollution[should_rain] * rule_tables.cloud_rain_air_pollution_drop_percentage_factor,
+        array_rules
+    )
+
+    # Continue in the next generation of the clouds
+    cloud_precipitation = precipitation[has_cloud]
+    precipitation[has_cloud] = np.where(
+        cloud_precipitation >= rule_tables.cloud_max_precipitation,
+        0,
+        cloud_precipitation + rule_tables.cloud_precipitation_grow_factor
+    )
+
+    air_pollution_passed = air_pollution * rule_tables.wind_air_pollution_percentage_factor
+
+    should_cool = cells_mask & (air_pollution <= rule_tables.air_pollution_cool_bound)
+    temp[should_cool] = _clip_temp(temp[should_cool] + rule_tables.air_pollution_cool_temp_factor, array_rules)
+
+    should_heat = cells_mask & (air_pollution >= rule_tables.air_pollution_heat_bound)
+    temp[should_heat] = _clip_temp(temp[should_heat] + rule_tables.air_pollution_heat_temp_factor, array_rules)
+
+    # Cell type transitions, the last met transition wins
+    new_cell_type = np.full(cell_type.shape, -1, dtype=np.int8)
+
+    for (cell_type_value, field, operator, threshold, new_cell_type_value) in array_rules.transitions:
+        new_cell_type[
+            cells_mask & (cell_type == cell_type_value) & operator(getattr(state, field), threshold)
+        ] = new_cell_type_value
+
+    new_cell_type = np.where(rain_cell_type >= 0, rain_cell_type, new_cell_type)
+
+    # Cells which produce air pollution each generation
+    air_pollution_grow_factor = array_rules.air_pollution_grow_factor[cell_type]
+    should_grow = cells_mask & (air_pollution_grow_factor != 0)
+    air_pollution[should_grow] = _clip_air_pollution(
+        air_pollution[should_grow] + air_pollution_grow_factor[should_grow],
+        array_rules
+    )
+
+    has_changes = cells_mask & (
+        (state.wind_direction >= 0) |
+        (array_rules.neighbors_change_field[cell_type] != 0) |
+        (new_cell_type >= 0)
+    )
+
+    return new_cell_type, air_pollution_passed, has_changes
+
+
+def apply_cells_changes(state, array_rules, cells_mask, new_cell_type, air_pollution_passed):
+    """
+    Applies the exterior changes of the cells on their neighbors and themselves.
+
+    The automaton applies the changes cell by cell, clamping the values after each change.
+    To get the same values, the changes are applied by the offset of the source cell from the target cell,
+    in the order the source cells are iterated, so each target gets its changes in the same order.
+
+    :param state: Array world state to update
+    :param array_rules: Array rules to apply
+    :param cells_mask: Boolean array of the cells which have exterior changes
+    :param new_cell_type: New cell type array (-1 for no change)
+    :param air_pollution_passed: Air pollution passed by the wind array
+    :return: Boolean array of the cells which changed their type
+    """
+    num_rows, num_cols = state.shape[1:]
+    rule_tables = array_rules.rule_tables
+
+    # Each moving wind affects at least one cell in its direction
+    moving_winds = cells_mask & (state.wind_direction >= 0) & (state.wind_speed > 0)
+    ray_length = np.where(moving_winds, np.maximum(1, state.wind_speed // rule_tables.wind_affect_speed_factor), 0)
+    max_distance = max(1, int(ray_length.max(initial=0)))
+
+    neighbors_change_field = np.where(cells_mask, array_rules.neighbors_change_field[state.cell_type], 0)
+    neighbors_change_value = array_rules.neighbors_change_value[state.cell_type]
+    changed_type = cells_mask & (new_cell_type >= 0)
+
+    for row_offset in range(-max_distance, max_distance + 1):
+        for col_offset in range(-max_distance, max_distance + 1):
+            if row_offset == 0 and col_offset == 0:
+                _change_cells_type(state, array_rules, changed_type, new_cell_type)
+                continue
+
+            if abs(row_offset) >= num_rows or abs(col_offset) >= num_cols:
+                continue
+
+            targets = (
+                slice(None),
+                slice(max(0, -row_offset), num_rows - max(0, row_offset)),
+                slice(max(0, -col_offset), num_cols - max(0, col_offset))
+            )
+            sources = (
+                slice(None),
+                slice(max(0, row_offset), num_rows - max(0, -row_offset)),
+                slice(max(0, col_offset), num_cols - max(0, -col_offset))
+            )
+
+            # Air pollution passed with the wind of the source cell
+            ray = array_rules.ray_by_offset.get((row_offset, col_offset))
+
+            if ray is not None and ray[1] <= max_distance:
+                direction_index, distance = ray
+                is_affected = (state.wind_direction[sources] == direction_index) & (ray_length[sources] >= distance)
+                _add_clipped(
+                    state.air_pollution[targets],
+                    air_pollution_passed[sources],
+                    is_affected,
+                    array_rules.air_pollution_min,
+                    array_rules.air_pollution_max
+                )
+
+            # Change the source cell type applies on its neighbors
+            if max(abs(row_offset), abs(col_offset)) == 1:
+                source_field = neighbors_change_field[sources]
+                _add_clipped(
+                    state.temp[targets],
+                    neighbors_change_value[sources],
+                    source_field == 1,
+                    array_rules.temp_min,
+                    array_rules.temp_max
+                )
+                _add_clipped(
+                    state.air_pollution[targets],
+                    neighbors_change_value[sources],
+                    source_field == 2,
+                    array_rules.air_pollution_min,
+                    array_rules.air_pollution_max
+                )
+
+    return changed_type
+
+
+def move_winds(state, array_rules, cells_mask):
+    """
+    Moves the winds of the cells by their directions, reflecting winds which reach the world borders.
+    When multiple winds move to the same cell, the last of them (in the cells order) wins.
+
+    :param state: Array world state to update
+    :param array_rules: Array rules to apply
+    :param cells_mask: Boolean array of the cells which have exterior changes
+    """
+    num_rows, num_cols = state.shape[1:]
+    moving_winds = cells_mask & (state.wind_direction >= 0) & (state.wind_speed > 0)
+    world_indices, row_indices, col_indices = np.nonzero(moving_winds)
+
+    directions = state.wind_direction[moving_winds].astype(np.intp)
+    speeds = state.wind_speed[moving_winds]
+
+    next_rows = row_indices + array_rules.direction_deltas[directions, 0]
+    next_cols = col_indices + array_rules.direction_deltas[directions, 1]
+    is_invalid = (next_rows < 0) | (next_rows >= num_rows) | (next_cols < 0) | (next_cols >= num_cols)
+
+    # Winds reaching the border move to the opposite direction
+    directions[is_invalid] = array_rules.opposite_directions[directions[is_invalid]]
+    next_rows[is_invalid] = row_indices[is_invalid] + array_rules.direction_deltas[directions[is_invalid], 0]
+    next_cols[is_invalid] = col_indices[is_invalid] + array_rules.direction_deltas[directions[is_invalid], 1]
+
+    # Next to the corners both directions may lead outside the world, so the wind stays
+    is_invalid = (next_rows < 0) | (next_rows >= num_rows) | (next_cols < 0) | (next_cols >= num_cols)
+    next_rows[is_invalid] = row_indices[is_invalid]
+    next_cols[is_invalid] = col_indices[is_invalid]
+
+    state.wind_direction[moving_winds] = -1
+    state.wind_speed[moving_winds] = 0
+
+    # Assigning with repeated indices keeps the last assigned value, same as the automaton
+    state.wind_direction[world_indices, next_rows, next_cols] = directions
+    state.wind_speed[world_indices, next_rows, next_cols] = speeds
+
+
+def _change_cells_type(state, array_rules, changed_type, new_cell_type):
+    """
+    Changes the type of the cells, new cells with temperature of 0 get random temperature
+    as CellFactory.change_cell_type does
+
+    :param state: Array world state to update
+    :param array_rules: Array rules to apply
+    :param changed_type: Boolean array of the cells which change their type
+    :param new_cell_type: New cell type array
+    """
+    for location in zip(*np.nonzero(changed_type & (state.temp == 0))):
+        state.temp[location] = randint(*array_rules.random_temp_range[new_cell_type[location]])
+
+    state.cell_type[changed_type] = new_cell_type[changed_type]
+
+
+def _add_clipped(target_values, added_values, mask, min_value, max_value):
+    """
+    Adds values to target values (in place) where the mask is set, clamping the results
+
+    :param target_values: Array view of the values to update
+    :param added_values: Array of values to add
+    :param mask: Boolean array of where to add
+    :param min_value: Minimum value of the results
+    :param max_value: Maximum value of the results
+    """
+    # Adding zero and clamping values which are already in bounds keeps them, so it's faster
+    # to update the whole view than gathering the masked values
+    if mask.any():
+        np.clip(target_values + np.where(mask, added_values, 0), min_value, max_value, out=target_values)
+
+
+def _clip_temp(temp, array_rules):
+    """
+    Clamps temperatures to the temperature bounds of the rules
+
+    :param temp: Array of temperatures
+    :param array_rules: Array rules of the bounds
+    :return: Clamped temperatures
+    """
+    return np.clip(temp, array_rules.temp_min, array_rules.temp_max)
+
+
+def _clip_air_pollution(air_pollution, array_rules):
+    """
+    Clamps air pollution values to the air pollution bounds of the rules
+
+    :param air_pollution: Array of air pollution values
+    :param array_rules: Array rules of the bounds
+    :return: Clamped air pollution values
+    """
+    return np.clip(air_pollution, array_rules.air_pollution_min, array_rules.air_pollution_max)
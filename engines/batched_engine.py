@@ -0,0 +1,180 @@
+from random import seed as random_seed
+
+import numpy as np
+
+from cellular_automaton import CellularAutomaton
+from analytics.array_statistics import ArrayStatistics
+from engines.array_kernels import ArrayWorldState, ArrayRules
+from engines.engine import create_engine
+from rules import RuleTables
+from settings import LogicSettings
+
+
+class BatchedEngine:
+    """
+    Runs batch of worlds of the same dimensions at once, by passing the generations of all of them
+    in single vectorized call over their array state.
+    """
+
+    def __init__(self, state, engine='vectorized'):
+        """
+        Creates batched engine of the worlds in the state.
+
+        :param state: Array world state of the worlds
+        :param engine: Name of the array engine which passes the generations (vectorized or jit) or engine instance
+        """
+        num_worlds = state.shape[0]
+
+        self.__state = state
+        self.__engine = create_engine(engine)
+
+        if not self.__engine.uses_arrays:
+            raise ValueError(f'The {self.__engine.name} engine can not pass generations of batch of worlds.')
+
+        self.__generations = np.zeros(num_worlds, dtype=np.int64)
+        self.__active = np.ones(num_worlds, dtype=bool)
+        self.__generation_transitions = np.zeros(num_worlds, dtype=np.int64)
+        self.__generations_without_transitions = np.zeros(num_worlds, dtype=np.int64)
+        self.__stop_reasons = [None] * num_worlds
+
+    @classmethod
+    def from_automatons(cls, automatons, engine='vectorized'):
+        """
+        Creates batched engine from the current state of automatons
+
+        :param automatons: List of cellular automaton instances, all in the same dimensions
+        :param engine: Name of the array engine which passes the generations (vectorized or jit) or engine instance
+        :return: Batched engine of the automatons worlds
+        """
+        return cls(
+            ArrayWorldState.from_world_arrays([automaton.world_arrays for automaton in automatons]),
+            engine
+        )
+
+    @classmethod
+    def from_world_file(cls, seeds, world_file_path=LogicSettings.WORLD_FILE_PATH, engine='vectorized'):
+        """
+        Creates batched engine of worlds from the same world file, which differ by the seed of
+        their random initial conditions
+
+        :param seeds: List of seeds, one for each world
+        :param world_file_path: Path to world file
+        :param engine: Name of the array engine which passes the generations (vectorized or jit) or engine instance
+        :return: Batched engine of the worlds
+        """
+        automatons = []
+
+        for seed in seeds:
+            random_seed(seed)
+            automatons.append(CellularAutomaton(world_file_path))
+
+        return cls.from_automatons(automatons, engine)
+
+    @property
+    def num_worlds(self):
+        """
+        Getter for the number of worlds in the batch
+
+        :return: Number of worlds
+        """
+        return self.__state.shape[0]
+
+    @property
+    def state(self):
+        """
+        Getter for the array state of the worlds
+
+        :return: Array world state
+        """
+        return self.__state
+
+    @property
+    def generations(self):
+        """
+        Getter for the generation of each world
+
+        :return: Array of generation numbers
+        """
+        return self.__generations
+
+    @property
+    def active(self):
+        """
+        Getter for which worlds are still running (didn't meet a stop condition)
+
+        :return: Boolean array of the active worlds
+        """
+        return self.__active
+
+    @property
+    def stop_reasons(self):
+        """
+        Getter for the stop condition met by each world
+
+        :return: List of the stop condition text of each world, or None for worlds which are still running
+        """
+        return list(self.__stop_reasons)
+
+    @property
+    def stats(self):
+        """
+        Getter for the statistics of all the worlds
+
+        :return: Array statistics of the worlds
+        """
+        return ArrayStatistics(
+            self.__state,
+            self.__generations,
+            self.__generation_transitions,
+            self.__generations_without_transitions
+        )
+
+    def step(self, num_generations=1, stop_conditions=None):
+        """
+        Passes number of generations in all the active worlds.
+        Worlds which meet one of the stop conditions stop, while the rest continue.
+
+        :param num_generations: Number of generations to pass
+        :param stop_conditions: List of stop conditions, evaluated for all the worlds after each generation
+        :return: Array statistics of the worlds
+        """
+        array_rules = ArrayRules.for_rule_tables(RuleTables.active())
+
+        for _ in range(num_generations):
+            if not self.__active.any():
+                break
+
+            changed_type = self.__engine.step_arrays(self.__state, array_rules, self.__active)
+
+            self.__generations[self.__active] += 1
+            self.__generation_transitions = np.where(
+                self.__active,
+                changed_type.sum(axis=(1, 2)),
+                self.__generation_transitions
+            )
+            self.__generations_without_transitions = np.where(
+                self.__active,
+                np.where(self.__generation_transitions == 0, self.__generations_without_transitions + 1, 0),
+                self.__generations_without_transitions
+            )
+
+            if stop_conditions:
+                self.__stop_met_conditions(stop_conditions)
+
+        return self.stats
+
+    def __stop_met_conditions(self, stop_conditions):
+        """
+        Stops the active worlds which meet one of the stop conditions
+
+        :param stop_conditions: List of stop conditions
+        """
+        stats = self.stats
+
+        for stop_condition in stop_conditions:
+            met_worlds = self.__active & np.asarray(stop_condition.is_met(stats), dtype=bool)
+
+            for world_index in np.nonzero(met_worlds)[0]:
+                self.__stop_reasons[world_index] = str(stop_condition)
+
+            self.__active &= ~met_worlds
@@ -0,0 +1,128 @@
+from warnings import warn
+
+
+class Engine:
+    """
+    Represent an abstraction for engine which passes the generations of the automaton.
+
+    The reference engine passes the generations over the world cells themselves (the rules of WorldCell and
+    its subclasses, Wind, Cloud and CellularAutomaton.apply_generation_change), while array engines pass them
+    over array world state, where the first axis is the world index.
+    """
+    name = None
+    uses_arrays = True
+
+    @classmethod
+    def create(cls):
+        """
+        Creates instance of the engine
+
+        :return: Engine instance
+        """
+        return cls()
+
+    def step_arrays(self, state, array_rules, active_worlds=None):
+        """
+        Passes a generation in all the worlds of the array state (in place)
+
+        :param state: Array world state to update
+        :param array_rules: Array rules to apply
+        :param active_worlds: Boolean array of the worlds to update, None for all the worlds
+        :return: Boolean array of the cells which changed their type
+        """
+        raise AssertionError(f'The {self.name} engine does not pass generations over array state.')
+
+    def advance_arrays(self, state, array_rules, num_generations):
+        """
+        Passes number of generations in all the worlds of the array state (in place)
+
+        :param state: Array world state to update
+        :param array_rules: Array rules to apply
+        :param num_generations: Number of generations to pass
+        """
+        for _ in range(num_generations):
+            self.step_arrays(state, array_rules)
+
+
+class ReferenceEngine(Engine):
+    """
+    Represent the reference engine, which passes the generations over the world cells.
+    """
+    name = 'reference'
+    uses_arrays = False
+
+
+class VectorizedEngine(Engine):
+    """
+    Represent engine which passes the generations with numpy operations over whole arrays.
+    """
+    name = 'vectorized'
+
+    def __init__(self):
+        # Imported here since numpy is only required for the array based features
+        from engines.array_kernels import step_arrays
+
+        self.__step_arrays = step_arrays
+
+    def step_arrays(self, state, array_rules, active_worlds=None):
+        return self.__step_arrays(state, array_rules, active_worlds)
+
+
+class JitEngine(Engine):
+    """
+    Represent engine which passes the generations cell by cell with kernels compiled by numba.
+    """
+    name = 'jit'
+
+    def __init__(self):
+        from engines.jit_kernels import step_arrays_jit, advance_arrays_jit
+
+        self.__step_arrays = step_arrays_jit
+        self.__advance_arrays = advance_arrays_jit
+        self.__scratch = None
+
+    @classmethod
+    def create(cls):
+        """
+        Creates instance of the engine, or vectorized engine instead when numba is not installed
+
+        :return: Engine instance
+        """
+        from engines.jit_kernels import JIT_AVAILABLE
+
+        if not JIT_AVAILABLE:
+            warn('numba is not installed, falling back to the vectorized engine.')
+            return VectorizedEngine()
+
+        return cls()
+
+    def step_arrays(self, state, array_rules, active_worlds=None):
+        return self.__step_arrays(state, array_rules, active_worlds)
+
+    def advance_arrays(self, state, array_rules, num_generations):
+        # The scratch arrays are allocated once for each shape of worlds, and reused by all the generations
+        if self.__scratch is None or self.__scratch.shape != state.shape[1:]:
+            from engines.jit_kernels import JitScratch
+
+            self.__scratch = JitScratch(state.shape[1:])
+
+        self.__advance_arrays(state, array_rules, num_generations, self.__scratch)
+
+
+ENGINES = {engine_class.name: engine_class for engine_class in [ReferenceEngine, VectorizedEngine, JitEngine]}
+
+
+def create_engine(engine):
+    """
+    Creates engine by its name
+
+    :param engine: Name of the engine (one of ENGINES), or engine instance which is returned as is
+    :return: Engine instance
+    """
+    if isinstance(engine, Engine):
+        return engine
+
+    if engine not in ENGINES:
+        raise ValueError(f'Unknown engine given "{engine}".')
+
+    return ENGINES[engine].create()
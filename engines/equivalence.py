@@ -0,0 +1,221 @@
+from argparse import ArgumentParser
+from json import dumps
+from random import seed as random_seed, getstate, setstate
+
+import numpy as np
+
+from cellular_automaton import CellularAutomaton
+from engines.engine import ENGINES
+from rules import RuleSet, RuleTables
+from settings import LogicSettings, CellTypes
+from world_arrays import WorldArrays
+from direction_matrix import DirectionMatrix
+
+
+class EngineEquivalenceHarness:
+    """
+    Runs engines side by side from identical seeded states, and compares the full world state of each engine
+    to the state of the first engine (the reference) after every generation.
+
+    Each engine gets its own random state, so the random values the engines draw while passing generations
+    are the same for all of them, as if each one ran alone.
+    """
+    __float_fields = ['temp', 'air_pollution']
+
+    def __init__(
+            self,
+            engines=('reference', 'vectorized', 'jit'),
+            world_file_path=LogicSettings.WORLD_FILE_PATH,
+            seed=0,
+            tolerance=1e-9
+    ):
+        """
+        Creates equivalence harness of engines.
+
+        :param engines: Names of the engines to compare, the first is the reference the others are compared to
+        :param world_file_path: Path to world file
+        :param seed: Seed for the random initial conditions of the worlds
+        :param tolerance: Maximum absolute difference allowed between temperatures and air pollution values
+        """
+        self.__seed = seed
+        self.__tolerance = tolerance
+        self.__automatons = []
+        self.__random_states = []
+
+        outer_random_state = getstate()
+
+        for engine in engines:
+            random_seed(seed)
+            self.__automatons.append(CellularAutomaton(world_file_path, engine))
+            self.__random_states.append(getstate())
+
+        setstate(outer_random_state)
+
+    @property
+    def automatons(self):
+        """
+        Getter for the automatons of the engines, in the order of the engines
+
+        :return: List of cellular automaton instances
+        """
+        return list(self.__automatons)
+
+    def step(self):
+        """
+        Passes a generation in all the engines
+        """
+        outer_random_state = getstate()
+
+        for automaton_index, automaton in enumerate(self.__automatons):
+            setstate(self.__random_states[automaton_index])
+            automaton.next_generation()
+
+            # Accessing the world arrays syncs the world cells of the array engines, so it's done here as well
+            automaton.world_arrays
+            self.__random_states[automaton_index] = getstate()
+
+        setstate(outer_random_state)
+
+    def compare(self):
+        """
+        Compares the current state of the engines to the reference engine
+
+        :return: Dictionary describing the first divergent cell and field, or None if all the engines are equal
+        """
+        reference_automaton = self.__automatons[0]
+
+        for automaton in self.__automatons[1:]:
+            divergence = self.__first_divergence(reference_automaton.world_arrays, automaton.world_arrays)
+
+            if divergence is not None:
+                return {
+                    'generation': automaton.generation,
+                    'reference_engine': reference_automaton.engine.name,
+                    'engine': automaton.engine.name,
+                    **divergence
+                }
+
+        return None
+
+    def run(self, num_generations):
+        """
+        Runs the engines side by side until they diverge or for number of generations
+
+        :param num_generations: Number of generations to run
+        :return: Dictionary summarizing the run, with the first divergence found (or None)
+        """
+        divergence = self.compare()
+
+        for _ in range(num_generations):
+            if divergence is not None:
+                break
+
+            self.step()
+            divergence = self.compare()
+
+        return {
+            'seed': self.__seed,
+            'engines': [automaton.engine.name for automaton in self.__automatons],
+            'generation': self.__automatons[0].generation,
+            'divergence': divergence
+        }
+
+    def __first_divergence(self, expected_arrays, actual_arrays):
+        """
+        Finds the first divergent cell (in the cells order) between world arrays, and its first divergent field
+
+        :param expected_arrays: World arrays of the reference engine
+        :param actual_arrays: World arrays of the compared engine
+        :return: Dictionary of the divergent location, field and values, or None if the arrays are equal
+        """
+        first_divergence = None
+
+        for field in WorldArrays.fields:
+            expected_values = getattr(expected_arrays, field)
+            actual_values = getattr(actual_arrays, field)
+
+            if field in EngineEquivalenceHarness.__float_fields:
+                is_divergent = np.abs(actual_values - expected_values) > self.__tolerance
+            else:
+                is_divergent = actual_values != expected_values
+
+            divergent_indices = np.flatnonzero(is_divergent)
+
+            # Fields are checked in order, so on the same cell the earlier field is kept
+            if len(divergent_indices) > 0 and (first_divergence is None or divergent_indices[0] < first_divergence[0]):
+                first_divergence = (divergent_indices[0], field)
+
+        if first_divergence is None:
+            return None
+
+        (flat_index, field) = first_divergence
+        location = np.unravel_index(flat_index, expected_arrays.shape)
+
+        return {
+            'location': [int(location[0]), int(location[1])],
+            'field': field,
+            'expected': EngineEquivalenceHarness.__describe_value(field, getattr(expected_arrays, field)[location]),
+            'actual': EngineEquivalenceHarness.__describe_value(field, getattr(actual_arrays, field)[location])
+        }
+
+    @staticmethod
+    def __describe_value(field, value):
+        """
+        Converts array value to readable value for the report
+
+        :param field: Name of the field of the value
+        :param value: Array value
+        :return: Readable value
+        """
+        if field == 'cell_type':
+            return CellTypes(int(value)).name
+
+        if field == 'wind_direction':
+            return None if value < 0 else DirectionMatrix.get_all_directions()[value]
+
+        return value.item()
+
+
+def parse_arguments():
+    """
+    Parses the command line arguments of the equivalence harness
+
+    :return: Parsed arguments
+    """
+    parser = ArgumentParser(description='Runs engines side by side and reports the first divergence between them.')
+    parser.add_argument('--world', default=LogicSettings.WORLD_FILE_PATH, help='Path to world file')
+    parser.add_argument('--rules', default=LogicSettings.RULES_FILE_PATH, help='Path to rules file')
+    parser.add_argument('--generations', type=int, default=100, help='Number of generations to run')
+    parser.add_argument('--seeds', default='0', help='Comma separated seeds to run')
+    parser.add_argument(
+        '--engines',
+        default=','.join(ENGINES),
+        help='Comma separated engines to compare, the first is the reference'
+    )
+    parser.add_argument(
+        '--tolerance',
+        type=float,
+        default=1e-9,
+        help='Maximum absolute difference allowed between temperatures and air pollution values'
+    )
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    arguments = parse_arguments()
+    RuleTables.activate(RuleSet.load(arguments.rules).compile())
+    is_equivalent = True
+
+    for run_seed in [int(seed) for seed in arguments.seeds.split(',')]:
+        harness = EngineEquivalenceHarness(
+            engines=arguments.engines.split(','),
+            world_file_path=arguments.world,
+            seed=run_seed,
+            tolerance=arguments.tolerance
+        )
+        harness_result = harness.run(arguments.generations)
+        is_equivalent = is_equivalent and harness_result['divergence'] is None
+        print(dumps(harness_result))
+
+    if not is_equivalent:
+        raise SystemExit(1)
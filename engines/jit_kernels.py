@@ -0,0 +1,500 @@
+from random import randint
+
+import numpy as np
+
+from settings import LogicSettings, CellTypes
+
+# Numba is optional, without it the kernels still run as plain (slow) Python.
+# The compiled kernels are cached on disk (in __pycache__), so the compile cost is paid once.
+try:
+    from numba import njit, objmode
+
+    JIT_AVAILABLE = True
+except ImportError:
+    JIT_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """
+        Replaces numba.njit when numba is not installed, keeping the function as is
+        """
+        return lambda func: func
+
+    class objmode:
+        """
+        Replaces numba.objmode when numba is not installed, the block simply runs as Python
+        """
+
+        def __init__(self, **kwargs):
+            pass
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args):
+            return False
+
+# Indices of the scalar rules in the scalars array
+TEMP_MIN = 0
+TEMP_MAX = 1
+AIR_POLLUTION_MIN = 2
+AIR_POLLUTION_MAX = 3
+AIR_POLLUTION_HEAT_BOUND = 4
+AIR_POLLUTION_COOL_BOUND = 5
+AIR_POLLUTION_HEAT_TEMP_FACTOR = 6
+AIR_POLLUTION_COOL_TEMP_FACTOR = 7
+WIND_AIR_POLLUTION_PERCENTAGE_FACTOR = 8
+CLOUD_RAIN_TEMP_COOL_FACTOR = 9
+CLOUD_RAIN_AIR_POLLUTION_DROP_PERCENTAGE_FACTOR = 10
+WIND_AFFECT_SPEED_FACTOR = 11
+CLOUD_MAX_PRECIPITATION = 12
+CLOUD_PRECIPITATION_GROW_FACTOR = 13
+
+# Codes of the fields and operators in the transitions arrays
+FIELD_TEMP = 1
+FIELD_AIR_POLLUTION = 2
+OPERATOR_CODES = {'>=': 0, '>': 1, '<=': 2, '<': 3}
+
+
+class JitRules:
+    """
+    Represent the rule tables as flat arrays, which can be passed to the JIT compiled kernels.
+    """
+    _cached = None
+
+    def __init__(self, array_rules):
+        """
+        Creates JIT rules from array rules
+
+        :param array_rules: Array rules of the rule tables
+        """
+        rule_tables = array_rules.rule_tables
+        self.array_rules = array_rules
+
+        self.scalars = np.array([
+            rule_tables.temp_min,
+            rule_tables.temp_max,
+            rule_tables.air_pollution_min,
+            rule_tables.air_pollution_max,
+            rule_tables.air_pollution_heat_bound,
+            rule_tables.air_pollution_cool_bound,
+            rule_tables.air_pollution_heat_temp_factor,
+            rule_tables.air_pollution_cool_temp_factor,
+            rule_tables.wind_air_pollution_percentage_factor,
+            rule_tables.cloud_rain_temp_cool_factor,
+            rule_tables.cloud_rain_air_pollution_drop_percentage_factor,
+            rule_tables.wind_affect_speed_factor,
+            rule_tables.cloud_max_precipitation,
+            rule_tables.cloud_precipitation_grow_factor
+        ], dtype=np.float64)
+
+        # Transitions as rows of (cell type value, field code, operator code, threshold, new cell type value)
+        transitions = [
+            (cell_type_value, FIELD_TEMP if field == 'temp' else FIELD_AIR_POLLUTION,
+             OPERATOR_CODES[operator_text], threshold, new_cell_type.value)
+            for cell_type_value, cell_type_transitions in enumerate(rule_tables.transitions)
+            for (field, operator_text, _, threshold, new_cell_type) in cell_type_transitions
+        ]
+        self.transitions = np.array(transitions, dtype=np.float64).reshape(len(transitions), 5)
+
+        # Rain transition of each cell type as (air pollution max, new cell type value), new type -1 for none
+        self.rain_transitions = np.array([
+            (air_pollution_max, rule_tables.rain_transition_cell_type[cell_type_value].value)
+            if air_pollution_max is not None else (0, -1)
+            for cell_type_value, air_pollution_max in enumerate(rule_tables.rain_transition_air_pollution_max)
+        ], dtype=np.float64)
+
+        self.neighbors_change_field = array_rules.neighbors_change_field.astype(np.int64)
+        self.neighbors_change_value = array_rules.neighbors_change_value
+        self.air_pollution_grow_factor = array_rules.air_pollution_grow_factor
+        self.direction_deltas = array_rules.direction_deltas.astype(np.int64)
+        self.opposite_directions = array_rules.opposite_directions.astype(np.int64)
+
+    @classmethod
+    def for_array_rules(cls, array_rules):
+        """
+        Returns the JIT rules of array rules, reusing the last created JIT rules when possible
+
+        :param array_rules: Array rules
+        :return: JIT rules of the array rules
+        """
+        if cls._cached is None or cls._cached.array_rules is not array_rules:
+            cls._cached = cls(array_rules)
+
+        return cls._cached
+
+
+class JitScratch:
+    """
+    Represent the scratch arrays of the JIT compiled kernel for worlds of single shape, which are allocated once and
+    reused (reset by the kernel) by all the generations passed with them.
+    """
+
+    def __init__(self, shape):
+        """
+        Creates scratch arrays for worlds of a shape
+
+        :param shape: (num_rows, num_cols) of the worlds
+        """
+        num_cells = shape[0] * shape[1]
+
+        self.shape = shape
+        self.changed_type = np.zeros(shape, dtype=np.bool_)
+        self.has_changes = np.zeros(num_cells, dtype=np.bool_)
+        self.new_cell_types = np.full(num_cells, -1, dtype=np.int64)
+        self.air_pollution_passed = np.zeros(num_cells, dtype=np.float64)
+        self.wind_ids = np.full(num_cells, -1, dtype=np.int64)
+        self.start_wind_direction = np.empty(num_cells, dtype=np.int64)
+        self.start_wind_speed = np.empty(num_cells, dtype=np.int64)
+
+    def arrays(self):
+        """
+        Returns the scratch arrays in the order of the kernels parameters
+
+        :return: Tuple of the scratch arrays
+        """
+        return (
+            self.has_changes,
+            self.new_cell_types,
+            self.air_pollution_passed,
+            self.wind_ids,
+            self.start_wind_direction,
+            self.start_wind_speed
+        )
+
+
+def step_arrays_jit(state, array_rules, active_worlds=None):
+    """
+    Passes a generation in all the worlds of the state (in place) with the JIT compiled kernel,
+    which applies the changes cell by cell exactly as CellularAutomaton.next_generation does.
+
+    :param state: Array world state to update
+    :param array_rules: Array rules to apply
+    :param active_worlds: Boolean array of the worlds to update, None for all the worlds
+    :return: Boolean array of the cells which changed their type
+    """
+    jit_rules = JitRules.for_array_rules(array_rules)
+    changed_type = np.zeros(state.shape, dtype=np.bool_)
+    scratch = JitScratch(state.shape[1:])
+
+    for world_index in range(state.shape[0]):
+        if active_worlds is not None and not active_worlds[world_index]:
+            continue
+
+        step_world_kernel(
+            state.cell_type[world_index],
+            state.temp[world_index],
+            state.air_pollution[world_index],
+            state.wind_direction[world_index],
+            state.wind_speed[world_index],
+            state.cloud_precipitation[world_index],
+            changed_type[world_index],
+            *scratch.arrays(),
+            jit_rules.scalars,
+            jit_rules.transitions,
+            jit_rules.rain_transitions,
+            jit_rules.neighbors_change_field,
+            jit_rules.neighbors_change_value,
+            jit_rules.air_pollution_grow_factor,
+            jit_rules.direction_deltas,
+            jit_rules.opposite_directions
+        )
+
+    return changed_type
+
+
+def advance_arrays_jit(state, array_rules, num_generations, scratch):
+    """
+    Passes number of generations in all the worlds of the state (in place) with the JIT compiled kernel, in single
+    compiled loop over the generations which reuses the scratch arrays, so nothing is allocated per generation.
+
+    :param state: Array world state to update
+    :param array_rules: Array rules to apply
+    :param num_generations: Number of generations to pass
+    :param scratch: JIT scratch of the shape of the worlds
+    :return: Boolean array of the cells of the last world which changed their type in any of the generations
+             (the array of the scratch, which is reset by the next advance)
+    """
+    jit_rules = JitRules.for_array_rules(array_rules)
+
+    for world_index in range(state.shape[0]):
+        scratch.changed_type[:] = False
+
+        advance_world_kernel(
+            num_generations,
+            state.cell_type[world_index],
+            state.temp[world_index],
+            state.air_pollution[world_index],
+            state.wind_direction[world_index],
+            state.wind_speed[world_index],
+            state.cloud_precipitation[world_index],
+            scratch.changed_type,
+            *scratch.arrays(),
+            jit_rules.scalars,
+            jit_rules.transitions,
+            jit_rules.rain_transitions,
+            jit_rules.neighbors_change_field,
+            jit_rules.neighbors_change_value,
+            jit_rules.air_pollution_grow_factor,
+            jit_rules.direction_deltas,
+            jit_rules.opposite_directions
+        )
+
+    return scratch.changed_type
+
+
+def random_temp(cell_type_value):
+    """
+    Generates random temperature for new cell of the given type, same as WorldCell._random_temp
+
+    :param cell_type_value: Value of the cell type
+    :return: Random temperature
+    """
+    temp_range = LogicSettings.TEMP[CellTypes(cell_type_value)]
+    return randint(temp_range['START'], temp_range['END'])
+
+
+@njit(cache=True)
+def clip(value, min_value, max_value):
+    """
+    Clamps value to bounds, same as the cells properties setters do
+
+    :param value: Value to clamp
+    :param min_value: Minimum value
+    :param max_value: Maximum value
+    :return: Clamped value
+    """
+    if value > max_value:
+        return max_value
+    if value < min_value:
+        return min_value
+    return value
+
+
+@njit(cache=True)
+def compare(value, operator_code, threshold):
+    """
+    Compares value to threshold by operator code of OPERATOR_CODES
+
+    :param value: Value to compare
+    :param operator_code: Code of the comparison operator
+    :param threshold: Threshold to compare to
+    :return: Comparison result
+    """
+    if operator_code == 0:
+        return value >= threshold
+    if operator_code == 1:
+        return value > threshold
+    if operator_code == 2:
+        return value <= threshold
+    return value < threshold
+
+
+@njit(cache=True)
+def advance_world_kernel(num_generations, cell_type, temp, air_pollution, wind_direction, wind_speed,
+                         cloud_precipitation, changed_type, has_changes, new_cell_types, air_pollution_passed,
+                         wind_ids, start_wind_direction, start_wind_speed, scalars, transitions, rain_transitions,
+                         neighbors_change_field, neighbors_change_value, air_pollution_grow_factor, direction_deltas,
+                         opposite_directions):
+    """
+    Passes number of generations in single world (in place), reusing the scratch arrays for all of them
+    """
+    for _ in range(num_generations):
+        step_world_kernel(
+            cell_type, temp, air_pollution, wind_direction, wind_speed, cloud_precipitation, changed_type,
+            has_changes, new_cell_types, air_pollution_passed, wind_ids, start_wind_direction, start_wind_speed,
+            scalars, transitions, rain_transitions, neighbors_change_field, neighbors_change_value,
+            air_pollution_grow_factor, direction_deltas, opposite_directions
+        )
+
+
+@njit(cache=True)
+def step_world_kernel(cell_type, temp, air_pollution, wind_direction, wind_speed, cloud_precipitation, changed_type,
+                      has_changes, new_cell_types, air_pollution_passed, wind_ids, start_wind_direction,
+                      start_wind_speed, scalars, transitions, rain_transitions, neighbors_change_field,
+                      neighbors_change_value, air_pollution_grow_factor, direction_deltas, opposite_directions):
+    """
+    Passes a generation in single world (in place), cell by cell as CellularAutomaton.next_generation does.
+    The scratch arrays (of the size of the world) are reset here, so they can be reused by the next generations.
+    """
+    num_rows, num_cols = temp.shape
+
+    for row in range(num_rows):
+        for col in range(num_cols):
+            cell_index = row * num_cols + col
+            has_changes[cell_index] = False
+
+            # Winds are identified by the cell they were at in the beginning of the generation
+            wind_ids[cell_index] = cell_index if wind_direction[row, col] >= 0 else -1
+
+            start_wind_direction[cell_index] = wind_direction[row, col]
+            start_wind_speed[cell_index] = wind_speed[row, col]
+
+            # The automaton calls the cell generation update a second time for cells with exterior changes,
+            # and applies only the changes of the second call.
+            # The update is written inline since calling helper with the arrays is costly in the loop.
+            for num_updates in range(1, 3):
+                curr_type = cell_type[row, col]
+                precipitation = cloud_precipitation[row, col]
+                has_cloud = precipitation >= 0
+                should_rain = has_cloud and precipitation == scalars[CLOUD_MAX_PRECIPITATION]
+
+                # Rain transition is checked before the cell is updated
+                rain_cell_type = -1
+
+                if should_rain and rain_transitions[curr_type, 1] >= 0 and \
+                        air_pollution[row, col] <= rain_transitions[curr_type, 0]:
+                    rain_cell_type = int(rain_transitions[curr_type, 1])
+
+                if should_rain:
+                    temp[row, col] = clip(
+                        temp[row, col] + scalars[CLOUD_RAIN_TEMP_COOL_FACTOR],
+                        scalars[TEMP_MIN],
+                        scalars[TEMP_MAX]
+                    )
+                    air_pollution[row, col] = clip(
+                        air_pollution[row, col] +
+                        air_pollution[row, col] * scalars[CLOUD_RAIN_AIR_POLLUTION_DROP_PERCENTAGE_FACTOR],
+                        scalars[AIR_POLLUTION_MIN],
+                        scalars[AIR_POLLUTION_MAX]
+                    )
+
+                # Continue in the next generation of the cloud
+                if has_cloud:
+                    if precipitation >= scalars[CLOUD_MAX_PRECIPITATION]:
+                        cloud_precipitation[row, col] = 0
+                    else:
+                        cloud_precipitation[row, col] = precipitation + int(scalars[CLOUD_PRECIPITATION_GROW_FACTOR])
+
+                passed = air_pollution[row, col] * scalars[WIND_AIR_POLLUTION_PERCENTAGE_FACTOR]
+
+                if air_pollution[row, col] <= scalars[AIR_POLLUTION_COOL_BOUND]:
+                    temp[row, col] = clip(
+                        temp[row, col] + scalars[AIR_POLLUTION_COOL_TEMP_FACTOR],
+                        scalars[TEMP_MIN],
+                        scalars[TEMP_MAX]
+                    )
+
+                if air_pollution[row, col] >= scalars[AIR_POLLUTION_HEAT_BOUND]:
+                    temp[row, col] = clip(
+                        temp[row, col] + scalars[AIR_POLLUTION_HEAT_TEMP_FACTOR],
+                        scalars[TEMP_MIN],
+                        scalars[TEMP_MAX]
+                    )
+
+                # Cell type transitions, the last met transition wins
+                new_cell_type = -1
+
+                for transition_index in range(transitions.shape[0]):
+                    if int(transitions[transition_index, 0]) != curr_type:
+                        continue
+
+                    if int(transitions[transition_index, 1]) == FIELD_TEMP:
+                        field_value = temp[row, col]
+                    else:
+                        field_value = air_pollution[row, col]
+
+                    if compare(field_value, int(transitions[transition_index, 2]), transitions[transition_index, 3]):
+                        new_cell_type = int(transitions[transition_index, 4])
+
+                if rain_cell_type >= 0:
+                    new_cell_type = rain_cell_type
+
+                # Cells which produce air pollution each generation
+                if air_pollution_grow_factor[curr_type] != 0:
+                    air_pollution[row, col] = clip(
+                        air_pollution[row, col] + air_pollution_grow_factor[curr_type],
+                        scalars[AIR_POLLUTION_MIN],
+                        scalars[AIR_POLLUTION_MAX]
+                    )
+
+                cell_has_changes = wind_direction[row, col] >= 0 or neighbors_change_field[curr_type] != 0 or \
+                    new_cell_type >= 0
+
+                if not cell_has_changes:
+                    break
+
+            if num_updates == 2:
+                has_changes[cell_index] = True
+                new_cell_types[cell_index] = new_cell_type
+                air_pollution_passed[cell_index] = passed
+
+    for row in range(num_rows):
+        for col in range(num_cols):
+            cell_index = row * num_cols + col
+
+            if not has_changes[cell_index]:
+                continue
+
+            # Move the wind of the cell and pass air pollution in its direction
+            direction = start_wind_direction[cell_index]
+            speed = start_wind_speed[cell_index]
+
+            if direction >= 0 and speed > 0:
+                if wind_ids[cell_index] == cell_index:
+                    wind_ids[cell_index] = -1
+                    wind_direction[row, col] = -1
+                    wind_speed[row, col] = 0
+
+                next_row = row + direction_deltas[direction, 0]
+                next_col = col + direction_deltas[direction, 1]
+                next_direction = direction
+
+                if next_row < 0 or next_row >= num_rows or next_col < 0 or next_col >= num_cols:
+                    next_direction = opposite_directions[direction]
+                    next_row = row + direction_deltas[next_direction, 0]
+                    next_col = col + direction_deltas[next_direction, 1]
+
+                    # Next to the corners both directions may lead outside the world, so the wind stays
+                    if next_row < 0 or next_row >= num_rows or next_col < 0 or next_col >= num_cols:
+                        next_row = row
+                        next_col = col
+
+                wind_ids[next_row * num_cols + next_col] = cell_index
+                wind_direction[next_row, next_col] = next_direction
+                wind_speed[next_row, next_col] = speed
+
+                num_affected = max(1, speed // int(scalars[WIND_AFFECT_SPEED_FACTOR]))
+
+                for distance in range(1, num_affected + 1):
+                    affected_row = row + direction_deltas[direction, 0] * distance
+                    affected_col = col + direction_deltas[direction, 1] * distance
+
+                    if 0 <= affected_row < num_rows and 0 <= affected_col < num_cols:
+                        air_pollution[affected_row, affected_col] = clip(
+                            air_pollution[affected_row, affected_col] + air_pollution_passed[cell_index],
+                            scalars[AIR_POLLUTION_MIN], scalars[AIR_POLLUTION_MAX]
+                        )
+
+            # The change on the neighbors is of the cell type before the cell type change
+            field = neighbors_change_field[cell_type[row, col]]
+            change_value = neighbors_change_value[cell_type[row, col]]
+
+            # Change the cell type, new cell with temperature of 0 gets random temperature
+            new_cell_type = new_cell_types[cell_index]
+
+            if new_cell_type >= 0:
+                if temp[row, col] == 0:
+                    with objmode(new_temp='int64'):
+                        new_temp = random_temp(new_cell_type)
+                    temp[row, col] = new_temp
+
+                cell_type[row, col] = new_cell_type
+                changed_type[row, col] = True
+
+            # Apply the change the cell type applies on its neighbors
+            if field != 0:
+                for direction_index in range(direction_deltas.shape[0]):
+                    neighbor_row = row + direction_deltas[direction_index, 0]
+                    neighbor_col = col + direction_deltas[direction_index, 1]
+
+                    if 0 <= neighbor_row < num_rows and 0 <= neighbor_col < num_cols:
+                        if field == FIELD_TEMP:
+                            temp[neighbor_row, neighbor_col] = clip(
+                                temp[neighbor_row, neighbor_col] + change_value,
+                                scalars[TEMP_MIN], scalars[TEMP_MAX]
+                            )
+                        else:
+                            air_pollution[neighbor_row, neighbor_col] = clip(
+                                air_pollution[neighbor_row, neighbor_col] + change_value,
+                                scalars[AIR_POLLUTION_MIN], scalars[AIR_POLLUTION_MAX]
+                            )
@@ -0,0 +1,284 @@
+from argparse import ArgumentParser
+from json import dumps
+from random import seed as random_seed
+from time import perf_counter
+
+import numpy as np
+
+from analytics.state_pyramid import StatePyramid
+from cellular_automaton import CellularAutomaton
+from engines.array_kernels import ArrayWorldState, ArrayRules
+from engines.engine import ENGINES, create_engine
+from rules import RuleSet, RuleTables
+from settings import LogicSettings, CellTypes
+from world_arrays import GenerationView
+
+
+class CoarsePreview:
+    """
+    Runs rough preview of automaton at reduced resolution, for screening scenarios before running them in full.
+    The world is downsampled to blocks of block size by block size cells: each block gets the dominant cell type and
+    the mean temperature and air pollution of its cells (see StatePyramid), and the wind and cloud of its middle
+    cell, so the density of the winds and clouds stays as it was. The blocks are stepped with the array kernels
+    of the engine (the vectorized kernels for the reference engine), which follow the same rules as the world cells.
+
+    The rules which reach across cells are rescaled to the block size: the wind rays are shortened to blocks, and
+    the neighbors changes are kept per block, since inside regions of the same type each cell and each block get
+    the changes of their 8 neighbors alike (scaling them down by the share of the cells of a block which border
+    a neighbor block more than triples the temperature error on the bundled world). The winds still move a block
+    each generation, so they cross the world block size times faster.
+    """
+    __default_block_size = 4
+
+    def __init__(self, automaton, block_size=__default_block_size, rule_set=None, engine='vectorized'):
+        """
+        Creates coarse preview of the current generation of automaton.
+
+        :param automaton: Cellular automaton to preview
+        :param block_size: Size in cells of the square blocks, power of 2
+        :param rule_set: Rule set of the automaton, None for the default rules file
+        :param engine: Name of the engine which passes the generations of the blocks (one of ENGINES)
+        """
+        level = block_size.bit_length() - 1
+
+        if block_size < 1 or 2 ** level != block_size:
+            raise ValueError(f'Unknown preview block size given "{block_size}".')
+
+        pyramid = StatePyramid(GenerationView(
+            automaton.generation,
+            {field: automaton.field_array(field) for field in ['cell_type', 'temp', 'air_pollution']}
+        ))
+
+        # The environment of each block is of its middle cell (or the last cell of partial blocks)
+        (num_rows, num_cols) = automaton.field_array('temp').shape
+        middle_rows = np.minimum(np.arange(block_size // 2, num_rows + block_size - 1, block_size), num_rows - 1)
+        middle_cols = np.minimum(np.arange(block_size // 2, num_cols + block_size - 1, block_size), num_cols - 1)
+        middle_cells = np.ix_(middle_rows, middle_cols)
+
+        self.__block_size = block_size
+        self.__generation = automaton.generation
+        self.__engine = create_engine(engine)
+
+        # The reference engine passes generations only over world cells, so the blocks are passed by numpy instead
+        if not self.__engine.uses_arrays:
+            self.__engine = create_engine('vectorized')
+
+        self.__array_rules = ArrayRules(CoarsePreview.rescaled_rules(rule_set or RuleSet.load(), block_size).compile())
+        self.__state = ArrayWorldState(*[
+            values[np.newaxis].copy()
+            for values in [
+                pyramid.dominant_types(level),
+                pyramid.means('temp', level),
+                pyramid.means('air_pollution', level),
+                automaton.field_array('wind_direction')[middle_cells],
+                automaton.field_array('wind_speed')[middle_cells],
+                automaton.field_array('cloud_precipitation')[middle_cells]
+            ]
+        ])
+
+    @property
+    def block_size(self):
+        """
+        Getter for the size in cells of the blocks
+
+        :return: Block size
+        """
+        return self.__block_size
+
+    @property
+    def generation(self):
+        """
+        Getter for the generation of the preview
+
+        :return: Generation number
+        """
+        return self.__generation
+
+    @property
+    def state(self):
+        """
+        Getter for the array state of the blocks
+
+        :return: Array world state of single world
+        """
+        return self.__state
+
+    def step(self, num_generations=1):
+        """
+        Passes number of generations of the blocks
+
+        :param num_generations: Number of generations to pass
+        """
+        self.__engine.advance_arrays(self.__state, self.__array_rules, num_generations)
+        self.__generation += num_generations
+
+    def summary(self):
+        """
+        Summarizes the current generation of the preview
+
+        :return: Dictionary of the generation outcomes (see summarize)
+        """
+        return CoarsePreview.summarize(self.__state.cell_type[0], self.__state.temp[0], self.__state.air_pollution[0])
+
+    @staticmethod
+    def summarize(cell_type, temp, air_pollution):
+        """
+        Summarizes the outcomes of a generation, comparable between resolutions
+
+        :param cell_type: Array of the cell type values
+        :param temp: Array of the temperatures
+        :param air_pollution: Array of the air pollutions
+        :return: Dictionary of the fraction of the world of each cell type, the mean temperature and
+                 the mean air pollution
+        """
+        type_counts = np.bincount(cell_type.reshape(-1), minlength=len(CellTypes))
+
+        return {
+            'type_fractions': {
+                cell_type_name: type_counts[cell_type_value] / cell_type.size
+                for (cell_type_name, cell_type_value) in [(each_type.name, each_type.value) for each_type in CellTypes]
+            },
+            'mean_temp': float(temp.mean()),
+            'mean_air_pollution': float(air_pollution.mean())
+        }
+
+    @staticmethod
+    def rescaled_rules(rule_set, block_size):
+        """
+        Rescales the rules which reach across cells to blocks of block size (see CoarsePreview)
+
+        :param rule_set: Rule set of the cells
+        :param block_size: Size in cells of the square blocks
+        :return: Rule set of the blocks
+        """
+        # The wind rays reach speed // affect speed factor cells, so block size times the factor reaches as many blocks
+        return rule_set.with_overrides({
+            'wind.affect_speed_factor': rule_set.get('wind.affect_speed_factor') * block_size
+        })
+
+
+def calibrate(world_file_path, rule_set, seeds, num_generations, block_size=4, engine='vectorized', every=10):
+    """
+    Runs the preview next to full run of the same initial conditions for each seed, and measures the calibration
+    error of the preview outcomes against the full run outcomes and the cost of each
+
+    :param world_file_path: Path to world file
+    :param rule_set: Rule set of the runs (which is activated for the full runs)
+    :param seeds: List of seeds for the random initial conditions
+    :param num_generations: Number of generations of each run
+    :param block_size: Size in cells of the square blocks of the preview
+    :param engine: Name of the engine of the full runs and of the previews
+    :param every: Compare the outcomes every Nth generation (and at the last generation)
+    :return: Dictionary of the preview and full outcomes and the errors of each seed, the mean errors and the costs
+    """
+    RuleTables.activate(rule_set.compile())
+    runs = []
+    (preview_seconds, full_seconds) = (0.0, 0.0)
+
+    # The first generations compile the kernels of the jit engine, so they are passed before the timed runs
+    warmup_automaton = CellularAutomaton(world_file_path, engine)
+    CoarsePreview(warmup_automaton, block_size, rule_set, engine).step()
+    warmup_automaton.advance(1)
+
+    for seed in seeds:
+        random_seed(seed)
+        automaton = CellularAutomaton(world_file_path, engine)
+        preview = CoarsePreview(automaton, block_size, rule_set, engine)
+        trajectories = {'preview': [], 'full': []}
+
+        # The runs are compared at the same generations, and each is timed without the summaries
+        for target_generation in sorted({*range(every, num_generations, every), num_generations}):
+            start_time = perf_counter()
+            preview.step(target_generation - preview.generation)
+            preview_seconds += perf_counter() - start_time
+
+            start_time = perf_counter()
+            automaton.advance(target_generation - automaton.generation)
+            full_seconds += perf_counter() - start_time
+
+            trajectories['preview'].append(preview.summary())
+            trajectories['full'].append(CoarsePreview.summarize(
+                automaton.field_array('cell_type'),
+                automaton.field_array('temp'),
+                automaton.field_array('air_pollution')
+            ))
+
+        runs.append({
+            'seed': seed,
+            'preview': trajectories['preview'][-1],
+            'full': trajectories['full'][-1],
+            'errors': outcome_errors(trajectories['preview'], trajectories['full'])
+        })
+
+    return {
+        'block_size': block_size,
+        'generations': num_generations,
+        'runs': runs,
+        'mean_errors': {
+            error_name: float(np.mean([run['errors'][error_name] for run in runs]))
+            for error_name in runs[0]['errors']
+        } if runs else {},
+        'preview_seconds': preview_seconds,
+        'full_seconds': full_seconds,
+        'speedup': full_seconds / preview_seconds if preview_seconds > 0 else None
+    }
+
+
+def outcome_errors(preview_trajectory, full_trajectory):
+    """
+    Measures the errors of preview outcomes against full run outcomes of the same generations
+
+    :param preview_trajectory: List of the preview summaries (see CoarsePreview.summarize)
+    :param full_trajectory: List of the full run summaries of the same generations
+    :return: Dictionary of the absolute errors of the last generation (the cell types error is the fraction
+             of the world of different type), and the mean absolute errors over all the generations
+    """
+    (preview, full) = (preview_trajectory[-1], full_trajectory[-1])
+
+    return {
+        'type_fractions': 0.5 * sum(
+            abs(preview['type_fractions'][cell_type_name] - full['type_fractions'][cell_type_name])
+            for cell_type_name in full['type_fractions']
+        ),
+        'mean_temp': abs(preview['mean_temp'] - full['mean_temp']),
+        'mean_air_pollution': abs(preview['mean_air_pollution'] - full['mean_air_pollution']),
+        'trajectory_mean_temp': float(np.mean([
+            abs(preview_summary['mean_temp'] - full_summary['mean_temp'])
+            for (preview_summary, full_summary) in zip(preview_trajectory, full_trajectory)
+        ])),
+        'trajectory_mean_air_pollution': float(np.mean([
+            abs(preview_summary['mean_air_pollution'] - full_summary['mean_air_pollution'])
+            for (preview_summary, full_summary) in zip(preview_trajectory, full_trajectory)
+        ]))
+    }
+
+
+def parse_arguments():
+    """
+    Parses the command line arguments of the coarse preview
+
+    :return: Parsed arguments
+    """
+    parser = ArgumentParser(description='Runs coarse preview of the global warming automaton next to full runs.')
+    parser.add_argument('--world', default=LogicSettings.WORLD_FILE_PATH, help='Path to world file')
+    parser.add_argument('--rules', default=LogicSettings.RULES_FILE_PATH, help='Path to rules file')
+    parser.add_argument('--seeds', default='0,1,2', help='Comma separated seeds to run')
+    parser.add_argument('--generations', type=int, default=100, help='Number of generations of each run')
+    parser.add_argument('--block-size', type=int, default=4, help='Size in cells of the blocks, power of 2')
+    parser.add_argument('--engine', default='vectorized', choices=list(ENGINES), help='Engine of the runs')
+    parser.add_argument('--every', type=int, default=10, help='Compare the outcomes every Nth generation')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    arguments = parse_arguments()
+
+    print(dumps(calibrate(
+        arguments.world,
+        RuleSet.load(arguments.rules),
+        [int(seed) for seed in arguments.seeds.split(',')],
+        arguments.generations,
+        arguments.block_size,
+        arguments.engine,
+        arguments.every
+    ), indent=4))
@@ -0,0 +1,360 @@
+from argparse import ArgumentParser
+from csv import reader
+from json import dumps, loads
+from os import makedirs, replace
+from os.path import join
+from random import random, seed as random_seed
+from time import perf_counter
+
+import numpy as np
+
+from cells.cell_factory import CellFactory
+from cell_environment.cloud import Cloud
+from cell_environment.wind import Wind
+from cellular_automaton import CellularAutomaton
+from direction_matrix import DirectionMatrix
+from engines.array_kernels import ArrayWorldState, ArrayRules, step_arrays
+from rules import RuleSet, RuleTables
+from settings import LogicSettings, CellTypes
+from world_arrays import WorldArrays
+
+
+class TiledWorld:
+    """
+    Represent world state stored on disk as fixed size square tiles of state arrays, which is memory mapped
+    rather than loaded, so the size of the world is bounded by the disk rather than the memory.
+
+    Each field is stored in file of shape (tile rows, tile cols, tile size, tile size), so each tile is contiguous
+    on disk, and the index file keeps the shape, the generation and which of the two buffers holds the current
+    state. The generations are passed band of tile rows at a time: the band is read together with halo rows
+    above and below it (as wide as the farthest wind ray, so all the interactions of the band cells are in
+    the window), stepped with the array kernels, and its new state is written to the other buffer.
+    Only the window of the band is in memory at any time.
+
+    The cells are stepped in the same order as a whole world would be, so the generations match the array
+    engines, except the random temperatures of cells changing type with temperature of exactly 0 (which are
+    also drawn for the halo cells).
+    """
+    index_file_name = 'index.json'
+    __default_tile_size = 64
+    __empty_values = {'wind_direction': -1, 'cloud_precipitation': -1}
+
+    def __init__(self, path):
+        """
+        Opens tiled world.
+
+        :param path: Path to the directory of the tiled world
+        """
+        self.__path = path
+
+        with open(join(path, TiledWorld.index_file_name), 'r') as index_file:
+            index = loads(index_file.read())
+
+        self.__shape = tuple(index['shape'])
+        self.__tile_size = index['tile_size']
+        self.__generation = index['generation']
+        self.__buffer = index['buffer']
+        self.__max_wind_speed = index['max_wind_speed']
+        self.__buffers = [
+            {
+                field: np.load(join(path, f'{field}_{buffer}.npy'), mmap_mode='r+')
+                for field in WorldArrays.fields
+            }
+            for buffer in range(2)
+        ]
+
+    @classmethod
+    def create(cls, path, shape, tile_size=__default_tile_size):
+        """
+        Creates empty tiled world
+
+        :param path: Path to the directory of the tiled world
+        :param shape: (num_rows, num_cols) of the world
+        :param tile_size: Size in cells of the square tiles
+        :return: Tiled world instance
+        """
+        makedirs(path, exist_ok=True)
+        tiles_shape = (-(-shape[0] // tile_size), -(-shape[1] // tile_size), tile_size, tile_size)
+        empty_world_arrays = WorldArrays(1, 1)
+
+        for buffer in range(2):
+            for field in WorldArrays.fields:
+                field_values = np.lib.format.open_memmap(
+                    join(path, f'{field}_{buffer}.npy'),
+                    mode='w+',
+                    dtype=getattr(empty_world_arrays, field).dtype,
+                    shape=tiles_shape
+                )
+                field_values[...] = TiledWorld.__empty_values.get(field, 0)
+                field_values.flush()
+                del field_values
+
+        TiledWorld.__write_index(path, {
+            'shape': list(shape),
+            'tile_size': tile_size,
+            'generation': 0,
+            'buffer': 0,
+            'max_wind_speed': 0
+        })
+
+        return cls(path)
+
+    @property
+    def shape(self):
+        """
+        Getter for the shape of the world
+
+        :return: (num_rows, num_cols) of the world
+        """
+        return self.__shape
+
+    @property
+    def tile_size(self):
+        """
+        Getter for the size in cells of the tiles
+
+        :return: Tile size
+        """
+        return self.__tile_size
+
+    @property
+    def generation(self):
+        """
+        Getter for the generation of the world
+
+        :return: Generation number
+        """
+        return self.__generation
+
+    def read_rows(self, start_row, stop_row):
+        """
+        Reads rows of the current world state into memory
+
+        :param start_row: First row to read
+        :param stop_row: Row to stop before
+        :return: Array world state of the rows (single world)
+        """
+        return self.__read_rows(self.__buffers[self.__buffer], start_row, stop_row)
+
+    def write_rows(self, start_row, state):
+        """
+        Writes rows of the current world state, for initializing the world
+
+        :param start_row: First row to write, at the start of a tile row
+        :param state: Array world state of the rows (single world)
+        """
+        self.__write_rows(self.__buffers[self.__buffer], start_row, state)
+        self.__max_wind_speed = max(self.__max_wind_speed, int(state.wind_speed.max(initial=0)))
+
+    def step(self, num_generations=1):
+        """
+        Passes number of generations, band of tile rows at a time
+
+        :param num_generations: Number of generations to pass
+        """
+        array_rules = ArrayRules.for_rule_tables(RuleTables.active())
+        (num_rows, _) = self.__shape
+
+        for _ in range(num_generations):
+            curr_buffer = self.__buffers[self.__buffer]
+            next_buffer = self.__buffers[1 - self.__buffer]
+            max_wind_speed = 0
+
+            # The farthest wind ray reaches the band from the halo, and winds move a single cell further
+            max_ray_length = max(1, self.__max_wind_speed // array_rules.rule_tables.wind_affect_speed_factor)
+            halo_size = max_ray_length + 1
+
+            for band_start in range(0, num_rows, self.__tile_size):
+                band_stop = min(band_start + self.__tile_size, num_rows)
+                window_start = max(0, band_start - halo_size)
+                window = self.__read_rows(curr_buffer, window_start, min(num_rows, band_stop + halo_size))
+
+                step_arrays(window, array_rules)
+
+                band = ArrayWorldState(*[
+                    getattr(window, field)[:, band_start - window_start:band_stop - window_start]
+                    for field in WorldArrays.fields
+                ])
+                self.__write_rows(next_buffer, band_start, band)
+                max_wind_speed = max(max_wind_speed, int(band.wind_speed.max(initial=0)))
+
+            for field_values in next_buffer.values():
+                field_values.flush()
+
+            # The index switches to the new state only once it's fully written
+            self.__buffer = 1 - self.__buffer
+            self.__generation += 1
+            self.__max_wind_speed = max_wind_speed
+            self.flush()
+
+    def flush(self):
+        """
+        Writes the current state and the index to the disk
+        """
+        for field_values in self.__buffers[self.__buffer].values():
+            field_values.flush()
+
+        TiledWorld.__write_index(self.__path, {
+            'shape': list(self.__shape),
+            'tile_size': self.__tile_size,
+            'generation': self.__generation,
+            'buffer': self.__buffer,
+            'max_wind_speed': self.__max_wind_speed
+        })
+
+    def __read_rows(self, buffer, start_row, stop_row):
+        """
+        Reads rows of buffer into memory, from the tiles covering them
+
+        :param buffer: Dictionary of the tiled fields arrays by field name
+        :param start_row: First row to read
+        :param stop_row: Row to stop before
+        :return: Array world state of the rows (single world)
+        """
+        (first_tile_row, last_tile_row) = (start_row // self.__tile_size, -(-stop_row // self.__tile_size))
+        row_offset = first_tile_row * self.__tile_size
+        fields_rows = []
+
+        for field in WorldArrays.fields:
+            tiles = buffer[field][first_tile_row:last_tile_row]
+            field_rows = tiles.transpose(0, 2, 1, 3).reshape(-1, tiles.shape[1] * self.__tile_size)
+            fields_rows.append(
+                field_rows[start_row - row_offset:stop_row - row_offset, :self.__shape[1]][np.newaxis].copy()
+            )
+
+        return ArrayWorldState(*fields_rows)
+
+    def __write_rows(self, buffer, start_row, state):
+        """
+        Writes rows into the tiles of buffer
+
+        :param buffer: Dictionary of the tiled fields arrays by field name
+        :param start_row: First row to write, at the start of a tile row
+        :param state: Array world state of the rows (single world)
+        """
+        (_, num_state_rows, num_cols) = state.shape
+        first_tile_row = start_row // self.__tile_size
+
+        for field in WorldArrays.fields:
+            field_values = buffer[field]
+            (_, num_tile_cols, tile_size, _) = field_values.shape
+
+            # Pad to whole tiles, the padding cells are never part of the world
+            padded_rows = np.full(
+                (-(-num_state_rows // tile_size) * tile_size, num_tile_cols * tile_size),
+                TiledWorld.__empty_values.get(field, 0),
+                dtype=field_values.dtype
+            )
+            padded_rows[:num_state_rows, :num_cols] = getattr(state, field)[0]
+            tiles = padded_rows.reshape(-1, tile_size, num_tile_cols, tile_size).transpose(0, 2, 1, 3)
+            field_values[first_tile_row:first_tile_row + len(tiles)] = tiles
+
+    @staticmethod
+    def __write_index(path, index):
+        """
+        Writes the index of tiled world, atomically so the world is always consistent on disk
+
+        :param path: Path to the directory of the tiled world
+        :param index: Dictionary of the index
+        """
+        with open(join(path, f'{TiledWorld.index_file_name}.tmp'), 'w') as index_file:
+            index_file.write(dumps(index))
+
+        replace(join(path, f'{TiledWorld.index_file_name}.tmp'), join(path, TiledWorld.index_file_name))
+
+
+def convert_world_file(world_file_path, path, tile_size=64, delimiter=';'):
+    """
+    Converts world file to tiled world, reading it band of tile rows at a time.
+    The initial conditions (temperatures, winds and clouds) are randomized as the automaton randomizes them,
+    with the environment drawn for each cell by the environment distribution.
+
+    :param world_file_path: Path to world file
+    :param path: Path to the directory of the tiled world to create
+    :param tile_size: Size in cells of the square tiles
+    :param delimiter: Delimiter of the cell data in the world file
+    :return: Tiled world instance
+    """
+    # The shape is needed up front, so the file is read twice rather than loaded
+    with open(world_file_path, 'r') as world_file:
+        world_csv = reader(world_file, delimiter=',')
+        num_cols = len(next(world_csv))
+        num_rows = 1 + sum(1 for _ in world_csv)
+
+    tiled_world = TiledWorld.create(path, (num_rows, num_cols), tile_size)
+    environment_dist = CellularAutomaton.generate_environment_dist()
+
+    with open(world_file_path, 'r') as world_file:
+        band_start = 0
+        band_arrays = WorldArrays(tile_size, num_cols)
+
+        for row_index, row in enumerate(reader(world_file, delimiter=',')):
+            for col_index, cell in enumerate(row):
+                cell_data = cell.split(delimiter)
+                cell_data = [CellTypes(int(cell_data[0]))] + [int(cell_data_val) for cell_data_val in cell_data[1:]]
+
+                if random() < environment_dist / 100:
+                    (min_speed_range, max_speed_range) = CellularAutomaton.random_wind_speed_range()
+                    cell_instance = CellFactory.create_cell(
+                        *cell_data,
+                        wind_instance=Wind(
+                            min_speed_range=min_speed_range,
+                            max_speed_range=max_speed_range,
+                            possible_direction_list=DirectionMatrix.get_possible_direction_from_location(
+                                location=(row_index, col_index),
+                                border_size=num_rows,
+                                num_cols=num_cols
+                            )
+                        ),
+                        cloud_instance=Cloud()
+                    )
+                else:
+                    cell_instance = CellFactory.create_cell(*cell_data)
+
+                band_arrays.cell_added((row_index - band_start, col_index), cell_instance)
+
+            # Write each full band of tile rows, and the last partial one
+            if row_index - band_start == tile_size - 1 or row_index == num_rows - 1:
+                band = ArrayWorldState.from_world_arrays([band_arrays])
+                tiled_world.write_rows(band_start, ArrayWorldState(*[
+                    getattr(band, field)[:, :row_index - band_start + 1] for field in WorldArrays.fields
+                ]))
+                band_start = row_index + 1
+                band_arrays = WorldArrays(tile_size, num_cols)
+
+    tiled_world.flush()
+    return tiled_world
+
+
+def parse_arguments():
+    """
+    Parses the command line arguments of the tiled world runner
+
+    :return: Parsed arguments
+    """
+    parser = ArgumentParser(description='Runs the global warming automaton over memory mapped tiled world.')
+    parser.add_argument('path', help='Path to the directory of the tiled world')
+    parser.add_argument('--convert', default=None, help='Path to world file to convert to the tiled world first')
+    parser.add_argument('--tile-size', type=int, default=64, help='Size in cells of the tiles of converted world')
+    parser.add_argument('--seed', type=int, default=None, help='Seed for the random initial conditions')
+    parser.add_argument('--rules', default=LogicSettings.RULES_FILE_PATH, help='Path to rules file')
+    parser.add_argument('--generations', type=int, default=0, help='Number of generations to run')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    arguments = parse_arguments()
+    RuleTables.activate(RuleSet.load(arguments.rules).compile())
+    random_seed(arguments.seed)
+
+    start_time = perf_counter()
+    world = convert_world_file(arguments.convert, arguments.path, arguments.tile_size) if arguments.convert else \
+        TiledWorld(arguments.path)
+    world.step(arguments.generations)
+
+    print(dumps({
+        'shape': list(world.shape),
+        'tile_size': world.tile_size,
+        'generation': world.generation,
+        'seconds': perf_counter() - start_time
+    }))
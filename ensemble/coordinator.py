@@ -0,0 +1,393 @@
+import asyncio
+import sys
+from argparse import ArgumentParser
+from json import dumps
+from os.path import dirname, abspath
+from subprocess import Popen
+from time import perf_counter
+
+from ensemble.protocol import encode_message, decode_message, MAX_MESSAGE_SIZE
+from engines.engine import ENGINES
+from rules import RuleSet
+from settings import LogicSettings
+from sweep import SweepCache
+
+REPOSITORY_PATH = dirname(dirname(abspath(__file__)))
+
+
+class EnsembleCoordinator:
+    """
+    Hands out automaton run jobs to workers connected over TCP, and collects the statistics they stream back
+    for each generation and the final checkpoint of each run.
+
+    Jobs of workers which are lost (disconnected or silent for longer than the worker timeout) are handed out
+    again, up to the maximum attempts. Jobs left when no worker was connected for the worker timeout are reported
+    as failed. Each job has a single result: identical jobs share a single run, results
+    of jobs which already have a result are ignored, and only the statistics of the attempt whose result was
+    accepted are kept.
+    """
+
+    def __init__(self, host='127.0.0.1', port=8766, max_attempts=3, worker_timeout=60.0):
+        """
+        Creates ensemble coordinator.
+
+        :param host: Host to listen on, local only by default
+        :param port: Port to listen on, 0 for any free port
+        :param max_attempts: Maximum number of times a job is handed out before it's reported as failed
+        :param worker_timeout: Maximum seconds without any message from a worker running a job before it's lost
+        """
+        self.__host = host
+        self.__port = port
+        self.__max_attempts = max_attempts
+        self.__worker_timeout = worker_timeout
+        self.__server = None
+        self.__pending_jobs = None
+        self.__jobs = {}
+        self.__attempts = {}
+        self.__results = {}
+        self.__all_results = None
+        self.__worker_tasks = set()
+        self.__no_workers_since = None
+
+    @property
+    def port(self):
+        """
+        Getter for the port the coordinator listens on (the actual port once started when 0 was given)
+
+        :return: Port number
+        """
+        if self.__server is not None:
+            return self.__server.sockets[0].getsockname()[1]
+
+        return self.__port
+
+    @property
+    def num_workers(self):
+        """
+        Getter for the number of connected workers
+
+        :return: Number of workers
+        """
+        return len(self.__worker_tasks)
+
+    @staticmethod
+    def job(world_file_path, rule_set, seed, num_generations, engine='reference'):
+        """
+        Creates job of single automaton run, which carries everything needed to run it on any node
+
+        :param world_file_path: Path to world file
+        :param rule_set: Rule set of the run
+        :param seed: Seed for the random initial conditions
+        :param num_generations: Number of generations to run
+        :param engine: Name of the engine which passes the generations
+        :return: Job dictionary, identified by hash of everything which affects its result (including the engine)
+        """
+        with open(world_file_path, 'r') as world_file:
+            world_content = world_file.read()
+
+        return {
+            'job_id': SweepCache.key(world_file_path, rule_set, seed, num_generations, [], engine),
+            'world': world_content,
+            'rules': rule_set.to_json(),
+            'seed': seed,
+            'generations': num_generations,
+            'engine': engine
+        }
+
+    async def start(self):
+        """
+        Starts listening for workers
+        """
+        self.__pending_jobs = asyncio.Queue()
+        self.__all_results = asyncio.Event()
+        self.__server = await asyncio.start_server(
+            self.__handle_worker,
+            self.__host,
+            self.__port,
+            limit=MAX_MESSAGE_SIZE
+        )
+
+    async def run(self, jobs):
+        """
+        Hands out jobs to the workers and waits for all of their results
+
+        :param jobs: List of jobs (see job())
+        :return: List of results in the order of the jobs, failed jobs have their error in the "error" key
+        """
+        if self.__server is None:
+            await self.start()
+
+        self.__all_results.clear()
+        self.__no_workers_since = None if self.__worker_tasks else asyncio.get_running_loop().time()
+
+        for job in jobs:
+            # Identical jobs share a single run
+            if job['job_id'] not in self.__jobs and job['job_id'] not in self.__results:
+                self.__jobs[job['job_id']] = job
+                self.__attempts[job['job_id']] = 0
+                self.__pending_jobs.put_nowait(job['job_id'])
+
+        while self.__jobs:
+            try:
+                await asyncio.wait_for(self.__all_results.wait(), self.__worker_timeout)
+            except asyncio.TimeoutError:
+                # The jobs wait for workers to connect, but not forever once there are none
+                if self.__no_workers_since is not None and \
+                        asyncio.get_running_loop().time() - self.__no_workers_since >= self.__worker_timeout:
+                    self.__fail_jobs('No workers connected.')
+
+        return [self.__results[job['job_id']] for job in jobs]
+
+    async def close(self):
+        """
+        Tells the workers to shut down and stops listening
+        """
+        if self.__server is None:
+            return
+
+        self.__server.close()
+
+        for worker_task in list(self.__worker_tasks):
+            worker_task.cancel()
+
+        await asyncio.gather(*self.__worker_tasks, return_exceptions=True)
+        await self.__server.wait_closed()
+
+    async def __handle_worker(self, reader, writer):
+        """
+        Hands out jobs to a worker one at a time, as long as it's connected
+
+        :param reader: Stream reader of the worker connection
+        :param writer: Stream writer of the worker connection
+        """
+        task = asyncio.current_task()
+        self.__worker_tasks.add(task)
+        self.__no_workers_since = None
+        job_id = None
+
+        try:
+            hello = decode_message(await asyncio.wait_for(reader.readline(), self.__worker_timeout))
+            worker_name = hello.get('worker')
+
+            while True:
+                job_id = await self.__pending_jobs.get()
+
+                # The job may have been completed by another attempt meanwhile
+                if job_id not in self.__jobs:
+                    job_id = None
+                    continue
+
+                self.__attempts[job_id] += 1
+                writer.write(encode_message({'type': 'job', **self.__jobs[job_id]}))
+                await writer.drain()
+                self.__accept_result(job_id, worker_name, *await self.__receive_job_messages(reader, job_id))
+                job_id = None
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError, KeyError, ConnectionError) as error:
+            # The worker is lost, its job is handed out again
+            if job_id is not None:
+                self.__retry_job(job_id, error)
+        except asyncio.CancelledError:
+            if not writer.is_closing():
+                writer.write(encode_message({'type': 'shutdown'}))
+        finally:
+            self.__worker_tasks.discard(task)
+            writer.close()
+
+            if not self.__worker_tasks:
+                self.__no_workers_since = asyncio.get_running_loop().time()
+
+    async def __receive_job_messages(self, reader, job_id):
+        """
+        Receives the messages of a worker running a job until its result
+
+        :param reader: Stream reader of the worker connection
+        :param job_id: Identifier of the job the worker runs
+        :return: Tuple of the result (or error) message and the list of the statistics of the generations
+        """
+        aggregates = []
+
+        while True:
+            line = await asyncio.wait_for(reader.readline(), self.__worker_timeout)
+
+            if not line:
+                raise ConnectionError('Worker disconnected.')
+
+            message = decode_message(line)
+
+            if message['job_id'] != job_id:
+                raise ValueError(f'Unknown job id given "{message["job_id"]}".')
+
+            if message['type'] == 'generation':
+                aggregates.append({'generation': message['generation'], **message['stats']})
+            elif message['type'] in ['result', 'error']:
+                return message, aggregates
+            else:
+                raise ValueError(f'Unknown message type given "{message["type"]}".')
+
+    def __accept_result(self, job_id, worker_name, result_message, aggregates):
+        """
+        Keeps the result of a job, unless the job already has a result
+
+        :param job_id: Identifier of the job
+        :param worker_name: Name of the worker which ran the job
+        :param result_message: Result message of the worker, or error message if the job itself failed
+        :param aggregates: List of the statistics of the generations of the run
+        """
+        if job_id in self.__results:
+            return
+
+        job = self.__jobs.pop(job_id)
+
+        if result_message['type'] == 'error':
+            self.__results[job_id] = {
+                'job_id': job_id,
+                'seed': job['seed'],
+                'worker': worker_name,
+                'attempts': self.__attempts[job_id],
+                'error': result_message['error']
+            }
+            self.__check_all_results()
+            return
+
+        self.__results[job_id] = {
+            'job_id': job_id,
+            'seed': job['seed'],
+            'worker': worker_name,
+            'attempts': self.__attempts[job_id],
+            'generation': result_message['generation'],
+            'stats': result_message['stats'],
+            'aggregates': aggregates,
+            'checkpoint': result_message['checkpoint']
+        }
+        self.__check_all_results()
+
+    def __retry_job(self, job_id, error):
+        """
+        Hands out job of lost worker again, or reports it as failed once it reached the maximum attempts
+
+        :param job_id: Identifier of the job
+        :param error: The error which the worker was lost by
+        """
+        if job_id not in self.__jobs:
+            return
+
+        if self.__attempts[job_id] < self.__max_attempts:
+            self.__pending_jobs.put_nowait(job_id)
+            return
+
+        job = self.__jobs.pop(job_id)
+        self.__results[job_id] = {
+            'job_id': job_id,
+            'seed': job['seed'],
+            'attempts': self.__attempts[job_id],
+            'error': f'{type(error).__name__}: {error}'
+        }
+        self.__check_all_results()
+
+    def __fail_jobs(self, error):
+        """
+        Reports all the jobs left without result as failed
+
+        :param error: Description of the error the jobs failed by
+        """
+        for (job_id, job) in list(self.__jobs.items()):
+            self.__results[job_id] = {
+                'job_id': job_id,
+                'seed': job['seed'],
+                'attempts': self.__attempts[job_id],
+                'error': error
+            }
+
+        self.__jobs.clear()
+        self.__check_all_results()
+
+    def __check_all_results(self):
+        """
+        Wakes the run once no job is left without result
+        """
+        if not self.__jobs:
+            self.__all_results.set()
+
+
+def start_local_workers(num_workers, port, host='127.0.0.1', aggregate_every=1):
+    """
+    Starts workers as processes on this machine, standing in for workers on other nodes
+
+    :param num_workers: Number of workers to start
+    :param port: Port of the coordinator
+    :param host: Host of the coordinator
+    :param aggregate_every: Send the statistics of every Nth generation only
+    :return: List of the worker processes
+    """
+    return [
+        Popen(
+            [
+                sys.executable, '-m', 'ensemble.worker',
+                '--host', host,
+                '--port', str(port),
+                '--name', f'local-{worker_index}',
+                '--aggregate-every', str(aggregate_every)
+            ],
+            cwd=REPOSITORY_PATH
+        )
+        for worker_index in range(num_workers)
+    ]
+
+
+def parse_arguments():
+    """
+    Parses the command line arguments of the ensemble coordinator
+
+    :return: Parsed arguments
+    """
+    parser = ArgumentParser(description='Runs ensemble of global warming automaton runs over TCP workers.')
+    parser.add_argument('--world', default=LogicSettings.WORLD_FILE_PATH, help='Path to world file')
+    parser.add_argument('--rules', default=LogicSettings.RULES_FILE_PATH, help='Path to rules file')
+    parser.add_argument('--generations', type=int, default=100, help='Number of generations to run each seed')
+    parser.add_argument('--seeds', default='0', help='Comma separated seeds to run')
+    parser.add_argument('--engine', default='reference', choices=list(ENGINES), help='Engine which passes the generations')
+    parser.add_argument('--host', default='127.0.0.1', help='Host to listen on')
+    parser.add_argument('--port', type=int, default=8766, help='Port to listen on')
+    parser.add_argument('--local-workers', type=int, default=0, help='Number of workers to start on this machine')
+    parser.add_argument('--max-attempts', type=int, default=3, help='Maximum attempts of each job')
+    parser.add_argument('--worker-timeout', type=float, default=60.0, help='Seconds of silence before a worker is lost')
+    parser.add_argument('--aggregate-every', type=int, default=1, help='Statistics of every Nth generation of local workers')
+    parser.add_argument('--no-checkpoints', action='store_true', help='Leave the checkpoints out of the printed results')
+    return parser.parse_args()
+
+
+async def coordinate(arguments):
+    """
+    Runs the ensemble of the command line arguments and prints the result of each job
+
+    :param arguments: Parsed arguments
+    """
+    rule_set = RuleSet.load(arguments.rules)
+    jobs = [
+        EnsembleCoordinator.job(arguments.world, rule_set, int(seed), arguments.generations, arguments.engine)
+        for seed in arguments.seeds.split(',')
+    ]
+    coordinator = EnsembleCoordinator(arguments.host, arguments.port, arguments.max_attempts, arguments.worker_timeout)
+    await coordinator.start()
+    workers = start_local_workers(arguments.local_workers, coordinator.port, arguments.host, arguments.aggregate_every)
+    start_time = perf_counter()
+
+    try:
+        results = await coordinator.run(jobs)
+    finally:
+        await coordinator.close()
+
+        for worker in workers:
+            worker.wait()
+
+    for result in results:
+        if arguments.no_checkpoints:
+            result.pop('checkpoint', None)
+
+        print(dumps(result))
+
+    print(dumps({'jobs': len(jobs), 'seconds': perf_counter() - start_time}))
+
+
+if __name__ == '__main__':
+    asyncio.run(coordinate(parse_arguments()))
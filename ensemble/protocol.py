@@ -0,0 +1,32 @@
+from json import dumps, loads
+
+# Messages are JSON objects, one per line, so both sides can read them with readline
+MESSAGE_SEPARATOR = b'\n'
+
+# Checkpoints of large worlds are big single messages, so lines are allowed to be long
+MAX_MESSAGE_SIZE = 256 * 1024 * 1024
+
+
+def encode_message(message):
+    """
+    Encodes message as single line
+
+    :param message: Dictionary of the message, with its type in the "type" key
+    :return: Message line bytes
+    """
+    return dumps(message, separators=(',', ':')).encode('utf-8') + MESSAGE_SEPARATOR
+
+
+def decode_message(line):
+    """
+    Decodes message line
+
+    :param line: Message line bytes
+    :return: Dictionary of the message
+    """
+    message = loads(line)
+
+    if not isinstance(message, dict) or 'type' not in message:
+        raise ValueError(f'Unknown message given "{line[:100]}".')
+
+    return message
@@ -0,0 +1,212 @@
+from argparse import ArgumentParser
+from hashlib import sha256
+from json import loads
+from os import getpid, replace
+from os.path import join, exists
+from random import seed as random_seed
+from socket import create_connection, gethostname
+from tempfile import gettempdir
+from time import sleep, monotonic
+
+from cellular_automaton import CellularAutomaton
+from ensemble.protocol import encode_message, decode_message
+from rules import RuleSet, RuleTables
+from world_arrays import WorldArrays
+
+
+class EnsembleWorker:
+    """
+    Connects to ensemble coordinator and runs the jobs it hands out one at a time, streaming back the statistics
+    of the generations as they pass and the final checkpoint of the world.
+    """
+
+    def __init__(self, host='127.0.0.1', port=8766, name=None, aggregate_every=1, connect_timeout=30.0):
+        """
+        Creates ensemble worker.
+
+        :param host: Host of the coordinator
+        :param port: Port of the coordinator
+        :param name: Name of the worker in the results, None for host name and process id
+        :param aggregate_every: Send the statistics of every Nth generation only
+        :param connect_timeout: Seconds to keep retrying connecting to the coordinator, which may not be up yet
+        """
+        self.__host = host
+        self.__port = port
+        self.__name = name or f'{gethostname()}:{getpid()}'
+        self.__aggregate_every = aggregate_every
+        self.__connect_timeout = connect_timeout
+
+    @property
+    def name(self):
+        """
+        Getter for the name of the worker
+
+        :return: Worker name
+        """
+        return self.__name
+
+    def run(self):
+        """
+        Runs jobs until the coordinator closes the connection
+
+        :return: Number of jobs the worker ran
+        """
+        num_jobs = 0
+
+        with self.__connect() as connection, connection.makefile('rwb') as connection_file:
+            connection_file.write(encode_message({'type': 'hello', 'worker': self.__name}))
+            connection_file.flush()
+
+            for line in connection_file:
+                message = decode_message(line)
+
+                if message['type'] == 'shutdown':
+                    break
+
+                if message['type'] != 'job':
+                    raise ValueError(f'Unknown message type given "{message["type"]}".')
+
+                try:
+                    self.run_job(message, lambda reply: self.__send(connection_file, reply))
+                except ConnectionError:
+                    raise
+                except Exception as error:
+                    # Errors of the job itself would repeat on any worker, so they're reported instead of retried
+                    self.__send(connection_file, {
+                        'type': 'error',
+                        'job_id': message['job_id'],
+                        'error': f'{type(error).__name__}: {error}'
+                    })
+
+                num_jobs += 1
+
+        return num_jobs
+
+    def run_job(self, job, send):
+        """
+        Runs single job
+
+        :param job: Job message with the world file content, rules JSON, seed, number of generations and engine
+        :param send: Function which sends reply message to the coordinator
+        """
+        RuleTables.activate(RuleSet(loads(job['rules'])).compile())
+        random_seed(job['seed'])
+        automaton = CellularAutomaton(self.__world_file_path(job['world']), job['engine'])
+
+        # The statistics of the reference engine are maintained only once enabled, so they count all the transitions
+        if not automaton.engine.uses_arrays:
+            automaton.enable_statistics()
+
+        for _ in range(job['generations']):
+            automaton.next_generation()
+
+            if automaton.generation % self.__aggregate_every == 0:
+                send({
+                    'type': 'generation',
+                    'job_id': job['job_id'],
+                    'generation': automaton.generation,
+                    'stats': EnsembleWorker.stats_snapshot(automaton)
+                })
+
+        send({
+            'type': 'result',
+            'job_id': job['job_id'],
+            'worker': self.__name,
+            'generation': automaton.generation,
+            'stats': EnsembleWorker.stats_snapshot(automaton),
+            'checkpoint': EnsembleWorker.checkpoint(automaton)
+        })
+
+    @staticmethod
+    def stats_snapshot(automaton):
+        """
+        Creates snapshot of the statistics of automaton, from the array state of the array engines so the world
+        cells are not synced for it
+
+        :param automaton: Cellular automaton instance
+        :return: Dictionary of the statistics values (see WorldStatistics.snapshot)
+        """
+        array_stats = automaton.array_stats()
+
+        return automaton.stats.snapshot() if array_stats is None else array_stats.snapshot(0)
+
+    @staticmethod
+    def checkpoint(automaton):
+        """
+        Creates checkpoint of the world state of automaton
+
+        :param automaton: Cellular automaton instance
+        :return: Dictionary of the generation, the world shape and the world arrays as lists
+        """
+        # The field arrays of the array engines are read from their array state, without syncing the world cells
+        return {
+            'generation': automaton.generation,
+            'shape': list(automaton.field_array('cell_type').shape),
+            'arrays': {field: automaton.field_array(field).tolist() for field in WorldArrays.fields}
+        }
+
+    def __connect(self):
+        """
+        Connects to the coordinator, retrying until the connect timeout passes
+
+        :return: Connected socket
+        """
+        deadline = monotonic() + self.__connect_timeout
+
+        while True:
+            try:
+                return create_connection((self.__host, self.__port))
+            except ConnectionRefusedError:
+                if monotonic() >= deadline:
+                    raise
+
+                sleep(0.1)
+
+    @staticmethod
+    def __send(connection_file, message):
+        """
+        Sends message to the coordinator
+
+        :param connection_file: File of the coordinator connection
+        :param message: Dictionary of the message
+        """
+        connection_file.write(encode_message(message))
+        connection_file.flush()
+
+    @staticmethod
+    def __world_file_path(world_content):
+        """
+        Writes world file content to local file, once for each distinct world
+
+        :param world_content: Content of the world file
+        :return: Path to the local world file
+        """
+        world_file_path = join(gettempdir(), f'ensemble_world_{sha256(world_content.encode()).hexdigest()}.csv')
+
+        if not exists(world_file_path):
+            # Write to temporary file first, so workers sharing the directory never read partial world
+            with open(f'{world_file_path}.{getpid()}.tmp', 'w') as world_file:
+                world_file.write(world_content)
+
+            replace(f'{world_file_path}.{getpid()}.tmp', world_file_path)
+
+        return world_file_path
+
+
+def parse_arguments():
+    """
+    Parses the command line arguments of the ensemble worker
+
+    :return: Parsed arguments
+    """
+    parser = ArgumentParser(description='Runs global warming automaton jobs of an ensemble coordinator.')
+    parser.add_argument('--host', default='127.0.0.1', help='Host of the coordinator')
+    parser.add_argument('--port', type=int, default=8766, help='Port of the coordinator')
+    parser.add_argument('--name', default=None, help='Name of the worker, default is host name and process id')
+    parser.add_argument('--aggregate-every', type=int, default=1, help='Send statistics of every Nth generation')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    arguments = parse_arguments()
+    EnsembleWorker(arguments.host, arguments.port, arguments.name, arguments.aggregate_every).run()
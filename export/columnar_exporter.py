@@ -0,0 +1,291 @@
+from argparse import ArgumentParser
+from json import dumps
+from os import makedirs
+from os.path import join
+from random import seed as random_seed
+from time import perf_counter
+
+import numpy as np
+
+from cellular_automaton import CellularAutomaton
+from engines.engine import ENGINES
+from export.output_pipeline import OutputPipeline
+from rules import RuleSet, RuleTables
+from settings import LogicSettings, CellTypes
+from world_arrays import WorldArrays
+
+
+class ColumnarExporter:
+    """
+    Exports the world state of generations as columnar tables for offline analysis: cells table with row for
+    each (generation, cell) and the fields as columns, and summary table with row for each generation.
+
+    The tables are written as Parquet files when pyarrow is available (each group of generations is row group),
+    and as npz chunk files otherwise (each group of generations is chunk). The stepping thread only copies the
+    fields into the group buffers, the tables are built and written by a background writer (see OutputPipeline).
+    """
+    formats = ['parquet', 'npz']
+
+    def __init__(self, output_dir, fields=None, row_group_size=1 << 18, file_format=None, max_pending_groups=2):
+        """
+        Creates columnar exporter.
+
+        :param output_dir: Path to the directory to write the tables to
+        :param fields: List of the fields to export (of WorldArrays.fields), None for all the fields
+        :param row_group_size: Number of cells rows in each group, rounded down to whole generations
+        :param file_format: Format of the tables (one of formats), None for Parquet when pyarrow is available
+        :param max_pending_groups: Maximum number of groups waiting to be written, exporting waits for the writer
+                                   beyond it so memory stays bounded
+        """
+        self.__fields = fields or list(WorldArrays.fields)
+        self.__file_format = file_format or ('parquet' if ColumnarExporter.__has_pyarrow() else 'npz')
+
+        for field in self.__fields:
+            if field not in WorldArrays.fields:
+                raise ValueError(f'Unknown world field given "{field}".')
+
+        if self.__file_format not in ColumnarExporter.formats:
+            raise ValueError(f'Unknown file format given "{self.__file_format}".')
+
+        self.__output_dir = output_dir
+        self.__row_group_size = row_group_size
+        self.__group = None
+        self.__group_generations = None
+        self.__num_group_generations = 0
+        self.__num_groups = 0
+        self.__num_rows = 0
+        self.__cell_locations = None
+        self.__parquet_writers = {}
+        self.__output_pipeline = OutputPipeline(self.__write_group, max_pending=max_pending_groups)
+
+        makedirs(output_dir, exist_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def file_format(self):
+        """
+        Getter for the format of the tables
+
+        :return: File format
+        """
+        return self.__file_format
+
+    @property
+    def num_rows(self):
+        """
+        Getter for the number of cells rows exported so far
+
+        :return: Number of rows
+        """
+        return self.__num_rows
+
+    def export_generation(self, state, generation):
+        """
+        Exports the world state of single generation
+
+        :param state: World state with the exported fields as arrays (such as WorldArrays or GenerationView)
+        :param generation: The generation of the state
+        """
+        if self.__group is None:
+            self.__start_group(state)
+
+        # Copying the fields into the group is all the work done for each generation in the stepping thread
+        for field in self.__fields:
+            self.__group[field][self.__num_group_generations] = getattr(state, field)
+
+        self.__group_generations[self.__num_group_generations] = generation
+        self.__num_group_generations += 1
+        self.__num_rows += self.__cell_locations[0].size
+
+        if self.__num_group_generations == len(self.__group_generations):
+            self.__flush_group()
+
+    def export_run(self, automaton, num_generations, every=1):
+        """
+        Runs the automaton and exports every Nth generation of it (including the current generation)
+
+        :param automaton: Cellular automaton to run
+        :param num_generations: Number of generations to run
+        :param every: Export only generations which are multiple of it
+        """
+        for generation_view in automaton.iter_generations(num_generations, every, self.__fields, include_current=True):
+            self.export_generation(generation_view, generation_view.generation)
+
+    def close(self):
+        """
+        Writes the generations left and waits for the writer, raising the error of the writer if it failed
+        """
+        try:
+            if self.__group is not None and self.__num_group_generations > 0:
+                self.__flush_group()
+        finally:
+            try:
+                self.__output_pipeline.close()
+            finally:
+                for parquet_writer in self.__parquet_writers.values():
+                    parquet_writer.close()
+
+    def __start_group(self, state):
+        """
+        Allocates the buffers of new group of generations
+
+        :param state: World state the group is of
+        """
+        shape = getattr(state, self.__fields[0]).shape
+
+        if self.__cell_locations is None:
+            self.__cell_locations = [locations.ravel() for locations in np.indices(shape, dtype=np.int32)]
+
+        num_generations = max(1, self.__row_group_size // self.__cell_locations[0].size)
+        self.__group = {
+            field: np.empty((num_generations, *shape), dtype=getattr(state, field).dtype)
+            for field in self.__fields
+        }
+        self.__group_generations = np.empty(num_generations, dtype=np.int64)
+        self.__num_group_generations = 0
+
+    def __flush_group(self):
+        """
+        Hands the current group to the writer, waiting for it when too many groups are waiting
+        """
+        group = self.__group
+        self.__group = None
+        self.__output_pipeline.submit((
+            self.__num_groups,
+            self.__group_generations[:self.__num_group_generations],
+            {field: values[:self.__num_group_generations] for field, values in group.items()}
+        ))
+        self.__num_groups += 1
+
+    def __write_group(self, group_output):
+        """
+        Writes group of generations to the cells and summary tables (in the writer thread)
+
+        :param group_output: (index of the group, array of the generations in the group, dictionary of the fields
+                             arrays in the shape (generations, num_rows, num_cols))
+        """
+        (group_index, generations, group) = group_output
+        num_cells = self.__cell_locations[0].size
+        tables = {
+            'cells': {
+                'generation': np.repeat(generations, num_cells),
+                'row': np.tile(self.__cell_locations[0], len(generations)),
+                'col': np.tile(self.__cell_locations[1], len(generations)),
+                **{field: values.reshape(-1) for field, values in group.items()}
+            },
+            'summary': ColumnarExporter.summarize(generations, group)
+        }
+
+        for table_name, columns in tables.items():
+            if self.__file_format == 'npz':
+                np.savez(join(self.__output_dir, f'{table_name}_{group_index:06d}.npz'), **columns)
+                continue
+
+            # Imported here since pyarrow is optional
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.table(columns)
+
+            if table_name not in self.__parquet_writers:
+                self.__parquet_writers[table_name] = pq.ParquetWriter(
+                    join(self.__output_dir, f'{table_name}.parquet'),
+                    table.schema
+                )
+
+            self.__parquet_writers[table_name].write_table(table, row_group_size=table.num_rows)
+
+    @staticmethod
+    def summarize(generations, group):
+        """
+        Summarizes each generation of group of generations
+
+        :param generations: Array of the generations in the group
+        :param group: Dictionary of the fields arrays in the shape (generations, num_rows, num_cols)
+        :return: Dictionary of the summary columns, with row for each generation
+        """
+        summary = {'generation': generations}
+
+        if 'cell_type' in group:
+            cell_types = group['cell_type'].reshape(len(generations), -1)
+
+            for cell_type in CellTypes:
+                summary[f'num_{cell_type.name.lower()}'] = np.count_nonzero(cell_types == cell_type.value, axis=1)
+
+        for field in ['temp', 'air_pollution']:
+            if field in group:
+                summary[f'mean_{field}'] = group[field].reshape(len(generations), -1).mean(axis=1)
+
+        if 'temp' in group:
+            summary['max_temp'] = group['temp'].reshape(len(generations), -1).max(axis=1)
+
+        for (field, column) in [('wind_direction', 'num_winds'), ('cloud_precipitation', 'num_clouds')]:
+            if field in group:
+                summary[column] = np.count_nonzero(group[field].reshape(len(generations), -1) >= 0, axis=1)
+
+        return summary
+
+    @staticmethod
+    def __has_pyarrow():
+        """
+        Checks whether pyarrow is available for writing Parquet
+
+        :return: True if pyarrow can be imported
+        """
+        try:
+            import pyarrow.parquet  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+
+def parse_arguments():
+    """
+    Parses the command line arguments of the columnar exporter
+
+    :return: Parsed arguments
+    """
+    parser = ArgumentParser(description='Runs the global warming automaton and exports its generations as tables.')
+    parser.add_argument('--world', default=LogicSettings.WORLD_FILE_PATH, help='Path to world file')
+    parser.add_argument('--rules', default=LogicSettings.RULES_FILE_PATH, help='Path to rules file')
+    parser.add_argument('--seed', type=int, default=None, help='Seed for the random initial conditions')
+    parser.add_argument('--engine', default='reference', choices=list(ENGINES), help='Engine which passes the generations')
+    parser.add_argument('--generations', type=int, default=100, help='Number of generations to run')
+    parser.add_argument('--every', type=int, default=1, help='Export only every Nth generation')
+    parser.add_argument('--fields', default=','.join(WorldArrays.fields), help='Comma separated fields to export')
+    parser.add_argument('--row-group-size', type=int, default=1 << 18, help='Number of cells rows in each group')
+    parser.add_argument('--format', default=None, choices=ColumnarExporter.formats, help='Format of the tables')
+    parser.add_argument('--output-dir', default='tables', help='Path to the directory to write the tables to')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    arguments = parse_arguments()
+    RuleTables.activate(RuleSet.load(arguments.rules).compile())
+    random_seed(arguments.seed)
+
+    start_time = perf_counter()
+
+    with ColumnarExporter(
+        arguments.output_dir,
+        fields=arguments.fields.split(','),
+        row_group_size=arguments.row_group_size,
+        file_format=arguments.format
+    ) as columnar_exporter:
+        columnar_exporter.export_run(
+            CellularAutomaton(arguments.world, arguments.engine),
+            arguments.generations,
+            arguments.every
+        )
+
+    print(dumps({
+        'rows': columnar_exporter.num_rows,
+        'format': columnar_exporter.file_format,
+        'output_dir': arguments.output_dir,
+        'seconds': perf_counter() - start_time
+    }))
@@ -0,0 +1,249 @@
+import atexit
+from concurrent.futures import ProcessPoolExecutor
+from os import makedirs, replace
+from os.path import join
+from queue import Queue, Full
+from threading import Thread, Lock
+from time import perf_counter
+
+import numpy as np
+
+
+class OutputPipeline:
+    """
+    Moves the outputs of a run (checkpoints, frames, tables and so on) off the stepping thread: the stepping thread
+    hands immutable outputs (such as copies of generation views) to bounded queue, and writer threads drain it and
+    write them. With processes, the writer threads hand the outputs on to a process pool, for writing which holds
+    the GIL (like compressing in Python), so the outputs and the write function must be picklable.
+
+    When the queue is full, the block policy waits for room (nothing is lost, the run is slowed to the writers) and
+    the drop policy drops the output (the run is never slowed, outputs are lost while the writers fall behind).
+    The first error of the writers is raised by the next submit or by close, and the outputs left are dropped.
+    The outputs waiting when the program exits are written before it exits, unless the pipeline was closed.
+    """
+    policies = ['block', 'drop']
+    __stop_writing = None
+
+    def __init__(
+            self,
+            write,
+            max_pending=8,
+            policy='block',
+            num_writers=1,
+            use_processes=False,
+            metrics=None,
+            kind='output'
+    ):
+        """
+        Creates output pipeline, which writes from now on until closed.
+
+        :param write: Function which writes single output, called with the output
+        :param max_pending: Maximum number of outputs waiting to be written
+        :param policy: What to do with outputs submitted when the queue is full (one of policies)
+        :param num_writers: Number of writers, more than one may write the outputs out of order
+        :param use_processes: Whether the outputs are written in pool of processes rather than in the writer threads
+        :param metrics: Run metrics which the written outputs are recorded to, None for none
+        :param kind: Kind of the outputs the written outputs are recorded as
+        """
+        if policy not in OutputPipeline.policies:
+            raise ValueError(f'Unknown output policy given "{policy}".')
+
+        self.__write = write
+        self.__policy = policy
+        self.__metrics = metrics
+        self.__kind = kind
+        self.__lock = Lock()
+        self.__num_submitted = 0
+        self.__num_written = 0
+        self.__num_dropped = 0
+        self.__blocked_seconds = 0.0
+        self.__writer_error = None
+        self.__closed = False
+        self.__pending_outputs = Queue(maxsize=max_pending)
+        self.__executor = ProcessPoolExecutor(max_workers=num_writers) if use_processes else None
+        self.__writer_threads = [Thread(target=self.__write_outputs, daemon=True) for _ in range(num_writers)]
+
+        for writer_thread in self.__writer_threads:
+            writer_thread.start()
+
+        atexit.register(self.close)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def policy(self):
+        """
+        Getter for the policy of outputs submitted when the queue is full
+
+        :return: Output policy
+        """
+        return self.__policy
+
+    def stats(self):
+        """
+        Returns the counts of the outputs so far, and the time the stepping thread was blocked waiting for room
+
+        :return: Dictionary of the numbers of outputs submitted, written, dropped and waiting, and the blocked seconds
+        """
+        with self.__lock:
+            return {
+                'submitted': self.__num_submitted,
+                'written': self.__num_written,
+                'dropped': self.__num_dropped,
+                'pending': self.__pending_outputs.qsize(),
+                'blocked_seconds': self.__blocked_seconds
+            }
+
+    def submit(self, output, generation=None):
+        """
+        Hands output to the writers. The output must not change after it's submitted
+
+        :param output: The output to write
+        :param generation: The generation of the output, which the written output is recorded with (when there are
+                           metrics), None for not recording it
+        :return: True if the output was queued, False if it was dropped
+        """
+        self.__check_writer_error()
+
+        if self.__closed:
+            raise ValueError('Output pipeline is closed.')
+
+        with self.__lock:
+            self.__num_submitted += 1
+
+        try:
+            self.__pending_outputs.put_nowait((output, generation))
+            return True
+        except Full:
+            if self.__policy == 'drop':
+                with self.__lock:
+                    self.__num_dropped += 1
+
+                return False
+
+        # The block policy waits for the writers, and the wait is measured since it stalls the run
+        start_time = perf_counter()
+        self.__pending_outputs.put((output, generation))
+
+        with self.__lock:
+            self.__blocked_seconds += perf_counter() - start_time
+
+        self.__check_writer_error()
+        return True
+
+    def close(self):
+        """
+        Writes the outputs left and waits for the writers, raising the first error of the writers if any failed
+        """
+        if not self.__closed:
+            self.__closed = True
+            atexit.unregister(self.close)
+
+            try:
+                for _ in self.__writer_threads:
+                    self.__pending_outputs.put(OutputPipeline.__stop_writing)
+
+                for writer_thread in self.__writer_threads:
+                    writer_thread.join()
+            finally:
+                if self.__executor is not None:
+                    self.__executor.shutdown()
+
+        self.__check_writer_error()
+
+    def __check_writer_error(self):
+        """
+        Raises the first error of the writers, if any failed
+        """
+        if self.__writer_error is not None:
+            raise self.__writer_error
+
+    def __write_outputs(self):
+        """
+        Writes the outputs handed to the writers (in writer thread), until the pipeline is closed
+        """
+        while True:
+            pending_output = self.__pending_outputs.get()
+
+            if pending_output is OutputPipeline.__stop_writing:
+                break
+
+            # The outputs left after an error are drained, so the stepping thread never waits for room forever
+            if self.__writer_error is not None:
+                continue
+
+            (output, generation) = pending_output
+
+            try:
+                if self.__executor is None:
+                    self.__write(output)
+                else:
+                    self.__executor.submit(self.__write, output).result()
+            except Exception as error:
+                with self.__lock:
+                    self.__writer_error = self.__writer_error or error
+
+                continue
+
+            with self.__lock:
+                self.__num_written += 1
+
+            if self.__metrics is not None and generation is not None:
+                self.__metrics.record_output(self.__kind, generation)
+
+
+class CheckpointWriter:
+    """
+    Writes generation snapshots (such as copies of generation views) as checkpoint files: full checkpoint of every
+    field every Nth checkpoint, and delta checkpoints of the cells which changed since the previous checkpoint
+    in between. The deltas are calculated by the writer, so they cost the stepping thread nothing, but they depend
+    on the previous snapshot so the checkpoints must be written in order (by single writer thread).
+
+    Full checkpoints are written as checkpoint_<generation>.npz with array for each field, and delta checkpoints
+    as delta_<generation>.npz with the flat indices of the changed cells and their new values for each field.
+    """
+
+    def __init__(self, output_dir, full_every=10):
+        """
+        Creates checkpoint writer.
+
+        :param output_dir: Path to the directory to write the checkpoints to
+        :param full_every: Every how many checkpoints full checkpoint is written, 1 for no deltas
+        """
+        self.__output_dir = output_dir
+        self.__full_every = full_every
+        self.__previous_snapshot = None
+        self.__num_checkpoints = 0
+
+        makedirs(output_dir, exist_ok=True)
+
+    def __call__(self, snapshot):
+        """
+        Writes checkpoint of generation snapshot
+
+        :param snapshot: Generation view which doesn't change (see GenerationView.copy)
+        """
+        if self.__previous_snapshot is None or self.__num_checkpoints % self.__full_every == 0:
+            file_name = f'checkpoint_{snapshot.generation:06d}.npz'
+            arrays = {field: getattr(snapshot, field) for field in snapshot.fields}
+        else:
+            file_name = f'delta_{snapshot.generation:06d}.npz'
+            arrays = {'base_generation': np.array(self.__previous_snapshot.generation)}
+
+            for field in snapshot.fields:
+                field_values = getattr(snapshot, field).reshape(-1)
+                changed_indices = np.flatnonzero(field_values != getattr(self.__previous_snapshot, field).reshape(-1))
+                arrays[f'{field}_indices'] = changed_indices.astype(np.int32)
+                arrays[f'{field}_values'] = field_values[changed_indices]
+
+        # Written under temporary name and renamed, so an interrupted run never leaves partial checkpoint
+        with open(join(self.__output_dir, f'{file_name}.tmp'), 'wb') as checkpoint_file:
+            np.savez(checkpoint_file, generation=np.array(snapshot.generation), **arrays)
+
+        replace(join(self.__output_dir, f'{file_name}.tmp'), join(self.__output_dir, file_name))
+        self.__previous_snapshot = snapshot
+        self.__num_checkpoints += 1
@@ -1,7 +1,8 @@
-from tkinter import Tk, ttk, Canvas, StringVar, Toplevel, Scrollbar, VERTICAL, NS
+from json import dumps
+from threading import Thread
 
 from cellular_automaton import CellularAutomaton
-from settings import AppSettings, LogicSettings
+from settings import AppSettings, LogicSettings, CellTypes
 
 
 class AutomatonGUIRunner:
@@ -9,9 +10,93 @@ class AutomatonGUIRunner:
     Controls the automaton and run the GUI interface which attached to the
     main logic of the automaton
     """
-    __automaton = CellularAutomaton(LogicSettings.WORLD_FILE_PATH)
+    __load_check_interval = 50
+
+    def __init__(
+            self,
+            world_file_path=LogicSettings.WORLD_FILE_PATH,
+            engine='reference',
+            metrics_port=None,
+            memory_profiling=False
+    ):
+        """
+        Creates the GUI runner, the world is loaded in the background while a loading indicator is shown.
+
+        :param world_file_path: Path to world file
+        :param engine: Name of the engine which passes the generations
+        :param metrics_port: Port of local Prometheus metrics endpoint of the run, None for no endpoint
+        :param memory_profiling: Whether to profile the memory of the automaton and the canvas, the report is
+                                 printed by pressing M
+        """
+        self.__automaton = None
+        self.__metrics_port = metrics_port
+        self.__metrics_exporter = None
+        self.__memory_profiling = memory_profiling
+        self.__load_error = None
+        self.__initialize_app()
+
+        # Load the world in the background, so the window shows up right away
+        self.__load_thread = Thread(target=self.__load_automaton, args=(world_file_path, engine), daemon=True)
+        self.__load_thread.start()
+        self.__app.after(AutomatonGUIRunner.__load_check_interval, self.__check_automaton_loaded)
+
+    @property
+    def automaton(self):
+        """
+        Getter for the automaton the GUI runs
+
+        :return: Cellular automaton instance, or None if the world is still loading
+        """
+        return self.__automaton
+
+    def __initialize_app(self):
+        """
+        Initializes the app window with loading indicator until the world is loaded
+        """
+        # Imported here so only the GUI paths require (and pay for) tkinter
+        from tkinter import Tk, ttk
 
-    def __init__(self):
+        self.__app = Tk()
+        self.__app.title(AppSettings.APP_TITLE)
+
+        self.__loading_label = ttk.Label(self.__app, text='Loading world...', font=('Helvetica', 18))
+        self.__loading_label.grid(column=0, row=0, padx=20, pady=20)
+
+    def __load_automaton(self, world_file_path, engine):
+        """
+        Loads the world of the automaton (in the background thread)
+
+        :param world_file_path: Path to world file
+        :param engine: Name of the engine which passes the generations
+        """
+        try:
+            self.__automaton = CellularAutomaton(world_file_path, engine)
+
+            if self.__memory_profiling:
+                self.__automaton.enable_memory_profiling()
+
+            if self.__metrics_port is not None:
+                # Imported here so only runs publishing metrics pay for the HTTP server
+                from analytics.run_metrics import MetricsExporter
+
+                self.__metrics_exporter = MetricsExporter(self.__automaton.enable_metrics(), self.__metrics_port)
+                self.__metrics_exporter.start()
+        except Exception as error:
+            self.__load_error = error
+
+    def __check_automaton_loaded(self):
+        """
+        Checks whether the world is loaded, and shows it once it is
+        """
+        if self.__load_thread.is_alive():
+            self.__app.after(AutomatonGUIRunner.__load_check_interval, self.__check_automaton_loaded)
+            return
+
+        if self.__load_error is not None:
+            self.__app.destroy()
+            raise self.__load_error
+
+        self.__loading_label.destroy()
         self.__initialize_screen_elements()
         self.__draw_cells()
         self.__attach_spacebar_listener()
@@ -20,8 +105,7 @@ class AutomatonGUIRunner:
         """
         Initializes the screen elements in the automaton
         """
-        self.__app = Tk()
-        self.__app.title(AppSettings.APP_TITLE)
+        from tkinter import ttk, Canvas, StringVar, Scrollbar, VERTICAL, NS
 
         # Creating the world grid to display the cells of the world
         self.__world_frame = ttk.Frame(
@@ -103,6 +187,61 @@ class AutomatonGUIRunner:
             height=canvas_height
         )
 
+        self.__initialize_stats_panel(column=len(AppSettings.CELL_CUBE.keys()) + 3, row=4)
+
+    def __initialize_stats_panel(self, column, row):
+        """
+        Initializes the side panel showing the world statistics
+
+        :param column: The column in the world frame to place the panel at
+        :param row: The row in the world frame to place the panel at
+        """
+        from tkinter import ttk, StringVar, N, W, E
+
+        stats_frame = ttk.Frame(self.__world_frame, padding=10)
+        stats_frame.grid(column=column, row=row, sticky=N)
+
+        ttk.Label(
+            stats_frame,
+            text='World Statistics',
+            font=('Helvetica', 18, 'bold')
+        ).grid(column=0, row=0, columnspan=2, sticky=W)
+
+        self.__stats_label_texts = {}
+        stats_names = [cell_type.name.capitalize() for cell_type in CellTypes] + \
+            ['Mean Temp', 'Max Temp', 'Mean Air Pollution', 'Winds', 'Clouds']
+
+        for stat_index, stat_name in enumerate(stats_names):
+            self.__stats_label_texts[stat_name] = StringVar()
+
+            ttk.Label(
+                stats_frame,
+                text=f'{stat_name}:',
+                font=('Helvetica', 14)
+            ).grid(column=0, row=stat_index + 1, sticky=W)
+            ttk.Label(
+                stats_frame,
+                textvariable=self.__stats_label_texts[stat_name],
+                font=('Helvetica', 14)
+            ).grid(column=1, row=stat_index + 1, sticky=E)
+
+        self.__update_stats_panel()
+
+    def __update_stats_panel(self):
+        """
+        Updates the side panel with the current world statistics
+        """
+        stats = self.__automaton.stats
+
+        for cell_type in CellTypes:
+            self.__stats_label_texts[cell_type.name.capitalize()].set(str(stats.count(cell_type)))
+
+        self.__stats_label_texts['Mean Temp'].set('{:.2f}'.format(stats.mean_temp))
+        self.__stats_label_texts['Max Temp'].set('{:.2f}'.format(stats.max_temp))
+        self.__stats_label_texts['Mean Air Pollution'].set('{:.1f}%'.format(stats.mean_air_pollution * 100))
+        self.__stats_label_texts['Winds'].set(str(stats.num_winds))
+        self.__stats_label_texts['Clouds'].set(str(stats.num_clouds))
+
     def __draw_cells(self):
         """
         Draws the cells grid with all the visibility properties for each cell (In each generation)
@@ -162,6 +301,9 @@ class AutomatonGUIRunner:
         """
         self.__app.bind_all('<space>', lambda e: self.__next_generation())
 
+        if self.__memory_profiling:
+            self.__app.bind_all('<m>', lambda e: print(dumps(self.memory_report())))
+
     def __attach_cell_click_listener(self, cell_tag):
         """
         Attaches click event to all cells in the grid to show the information of a clicked cell.
@@ -176,7 +318,11 @@ class AutomatonGUIRunner:
         """
         self.__automaton.next_generation()
         self.__generation_label_text.set(f'Generation: {self.__automaton.generation}')
-        self.__draw_cells()
+        self.__update_stats_panel()
+
+        # The canvas items are allocated by Tk rather than Python, so drawing is traced as phase of its own
+        with self.__automaton.memory_phase('draw'):
+            self.__draw_cells()
 
     def __show_cell_info(self, cell_tag):
         """
@@ -184,6 +330,8 @@ class AutomatonGUIRunner:
 
         :param cell_tag: The cell tag location clicked
         """
+        from tkinter import ttk, Toplevel
+
         # Extract cell location from cell tag
         row_index, col_index = AutomatonGUIRunner.__extract_cell_location_from_tag(cell_tag)
 
@@ -274,11 +422,23 @@ class AutomatonGUIRunner:
         """
         return [int(ax) for ax in cell_tag.split('-')]
 
+    def memory_report(self):
+        """
+        Creates report of the memory of the automaton and the canvas items drawing it by subsystem
+
+        :return: Dictionary of the memory report (see CellularAutomaton.memory_report)
+        """
+        return self.__automaton.memory_report(canvas=self.__world_canvas)
+
     def run(self):
         """
         Runs the automaton
         """
-        self.__app.mainloop()
+        try:
+            self.__app.mainloop()
+        finally:
+            if self.__metrics_exporter is not None:
+                self.__metrics_exporter.close()
 
 
 if __name__ == '__main__':
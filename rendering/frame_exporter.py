@@ -0,0 +1,216 @@
+from argparse import ArgumentParser
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from functools import partial
+from json import dumps
+from os import makedirs, cpu_count
+from os.path import join
+from random import seed as random_seed
+from time import perf_counter
+
+from analytics.run_metrics import MetricsExporter
+from cellular_automaton import CellularAutomaton
+from engines.engine import ENGINES
+from rendering.png_encoder import write_png
+from rendering.rasterizer import Rasterizer
+from rules import RuleSet, RuleTables
+from settings import LogicSettings
+
+
+class FrameExporter:
+    """
+    Exports world states as PNG frames without any display.
+    The frames are rasterized in the calling process and encoded (compressed and written) across a process pool,
+    which is where most of the time goes.
+    """
+
+    def __init__(
+            self,
+            output_dir,
+            rasterizer=None,
+            max_workers=None,
+            compress_level=6,
+            max_pending_frames=None,
+            metrics=None
+    ):
+        """
+        Creates frame exporter.
+
+        :param output_dir: Path to the directory to write the frames to
+        :param rasterizer: Rasterizer of the frames, None for cells colored by their type
+        :param max_workers: Maximum number of encoding processes, None for number of processors
+        :param compress_level: zlib compression level of the frames (0 - 9), lower is faster
+        :param max_pending_frames: Maximum number of frames waiting to be encoded, the export waits for the
+                                   oldest frame beyond it so memory stays bounded. None for 4 frames per process
+        :param metrics: Run metrics which the written frames are recorded to (as "frame" outputs), None for none
+        """
+        self.__output_dir = output_dir
+        self.__rasterizer = rasterizer or Rasterizer()
+        self.__compress_level = compress_level
+        self.__executor = ProcessPoolExecutor(max_workers=max_workers)
+        self.__max_pending_frames = max_pending_frames or 4 * (max_workers or cpu_count())
+        self.__metrics = metrics
+        self.__pending_frames = deque()
+        self.__frame_paths = []
+
+        makedirs(output_dir, exist_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def frame_paths(self):
+        """
+        Getter for the paths of all the frames exported so far
+
+        :return: List of frame paths
+        """
+        return list(self.__frame_paths)
+
+    def export_frame(self, state, generation):
+        """
+        Exports single frame of world state
+
+        :param state: World state with cell_type, temp and air_pollution arrays (such as WorldArrays)
+        :param generation: The generation of the state, which the frame is named by
+        :return: Path of the frame
+        """
+        frame_path = join(self.__output_dir, f'{self.__rasterizer.mode}_{generation:06d}.png')
+
+        # Wait for the oldest frame when too many frames are waiting, so the export is bound by the encoding
+        while len(self.__pending_frames) >= self.__max_pending_frames:
+            self.__pending_frames.popleft().result()
+
+        pending_frame = self.__executor.submit(
+            write_png,
+            frame_path,
+            self.__rasterizer.rasterize(state),
+            self.__compress_level
+        )
+        self.__pending_frames.append(pending_frame)
+
+        if self.__metrics is not None:
+            pending_frame.add_done_callback(partial(self.__record_frame_written, generation))
+        self.__frame_paths.append(frame_path)
+
+        return frame_path
+
+    def export_run(self, automaton, num_generations, every=1, level=0):
+        """
+        Runs the automaton and exports every Nth generation of it (including the current generation)
+
+        :param automaton: Cellular automaton to run
+        :param num_generations: Number of generations to run
+        :param every: Export only generations which are multiple of it
+        :param level: State pyramid level of the frames, which are overviews of blocks of 2 ** level by 2 ** level
+                      cells (see StatePyramid). 0 for frames of the cells
+        :return: List of the exported frames paths
+        """
+        if level == 0:
+            return [
+                self.export_frame(generation_view, generation_view.generation)
+                for generation_view in automaton.iter_generations(num_generations, every, include_current=True)
+            ]
+
+        automaton.enable_pyramid()
+
+        # The pyramid is updated from the changed cells only, and the frames read only the blocks of the level
+        return [
+            self.export_frame(automaton.pyramid.level_state(level), generation_view.generation)
+            for generation_view in automaton.iter_generations(num_generations, every, include_current=True)
+        ]
+
+    def export_trajectory(self, trajectory, every=1):
+        """
+        Exports every Nth generation of recorded trajectory
+
+        :param trajectory: Iterable of (generation, world state) pairs
+        :param every: Export only generations which are multiple of it
+        :return: List of the exported frames paths
+        """
+        return [
+            self.export_frame(state, generation)
+            for (generation, state) in trajectory
+            if generation % every == 0
+        ]
+
+    def __record_frame_written(self, generation, pending_frame):
+        """
+        Records frame which was written to the run metrics (in the thread which completed it)
+
+        :param generation: The generation of the frame
+        :param pending_frame: Future of the frame
+        """
+        if not pending_frame.cancelled() and pending_frame.exception() is None:
+            self.__metrics.record_output('frame', generation)
+
+    def close(self):
+        """
+        Waits for all the frames to be written, raising the error of any frame which failed
+        """
+        try:
+            while self.__pending_frames:
+                self.__pending_frames.popleft().result()
+        finally:
+            self.__executor.shutdown()
+
+
+def parse_arguments():
+    """
+    Parses the command line arguments of the frame exporter
+
+    :return: Parsed arguments
+    """
+    parser = ArgumentParser(description='Runs the global warming automaton and exports its generations as PNG frames.')
+    parser.add_argument('--world', default=LogicSettings.WORLD_FILE_PATH, help='Path to world file')
+    parser.add_argument('--rules', default=LogicSettings.RULES_FILE_PATH, help='Path to rules file')
+    parser.add_argument('--seed', type=int, default=None, help='Seed for the random initial conditions')
+    parser.add_argument('--engine', default='reference', choices=list(ENGINES), help='Engine which passes the generations')
+    parser.add_argument('--generations', type=int, default=100, help='Number of generations to run')
+    parser.add_argument('--every', type=int, default=1, help='Export only every Nth generation')
+    parser.add_argument('--mode', default='type', choices=Rasterizer.modes, help='What the cells colors show')
+    parser.add_argument('--cell-size', type=int, default=8, help='Size in pixels of each cell')
+    parser.add_argument('--level', type=int, default=0, help='State pyramid level of overview frames, 0 for cells')
+    parser.add_argument('--output-dir', default='frames', help='Path to the directory to write the frames to')
+    parser.add_argument('--workers', type=int, default=None, help='Number of encoding processes')
+    parser.add_argument('--compress-level', type=int, default=6, help='zlib compression level of the frames')
+    parser.add_argument('--metrics-port', type=int, default=None, help='Port of local Prometheus metrics endpoint')
+    parser.add_argument('--metrics-textfile', default=None, help='Path to Prometheus metrics textfile to rewrite')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    arguments = parse_arguments()
+    RuleTables.activate(RuleSet.load(arguments.rules).compile())
+    random_seed(arguments.seed)
+
+    start_time = perf_counter()
+    automaton = CellularAutomaton(arguments.world, arguments.engine)
+    run_metrics = None
+
+    # Timing the generations costs every generation, so the metrics are enabled only when they are exported
+    if arguments.metrics_port is not None or arguments.metrics_textfile is not None:
+        run_metrics = automaton.enable_metrics()
+
+    with nullcontext() if run_metrics is None else MetricsExporter(
+        run_metrics,
+        arguments.metrics_port,
+        arguments.metrics_textfile
+    ), FrameExporter(
+        arguments.output_dir,
+        rasterizer=Rasterizer(arguments.mode, arguments.cell_size),
+        max_workers=arguments.workers,
+        compress_level=arguments.compress_level,
+        metrics=run_metrics
+    ) as frame_exporter:
+        frame_exporter.export_run(automaton, arguments.generations, arguments.every, arguments.level)
+
+    print(dumps({
+        'frames': len(frame_exporter.frame_paths),
+        'output_dir': arguments.output_dir,
+        'seconds': perf_counter() - start_time
+    }))
@@ -0,0 +1,331 @@
+from collections import deque
+
+import numpy as np
+
+from cellular_automaton import CellularAutomaton
+from rendering.png_encoder import encode_png
+from rendering.rasterizer import Rasterizer
+
+
+class NotebookRenderer:
+    """
+    Displays the automaton inside Jupyter notebook as in-memory image, with step, play and seek controls
+    and the statistics of the shown generation.
+
+    Between generations only the tiles of cells whose color changed are rasterized again. With ipycanvas installed
+    only those tiles are sent to the notebook as well, otherwise the whole image is encoded as PNG and sent.
+    Without ipywidgets the image and the statistics are still displayed, and are updated by step and seek.
+    """
+    __stats_fields = [
+        ('mean_temp', 'Mean temperature'),
+        ('max_temp', 'Max temperature'),
+        ('mean_air_pollution', 'Mean air pollution'),
+        ('num_winds', 'Winds'),
+        ('num_clouds', 'Clouds'),
+        ('generation_transitions', 'Type transitions')
+    ]
+
+    def __init__(self, automaton=None, rasterizer=None, tile_size=16, history_size=100, max_generation=10000):
+        """
+        Creates notebook renderer.
+
+        :param automaton: Cellular automaton to display, None for automaton of the default world
+        :param rasterizer: Rasterizer of the image, None for cells colored by their type
+        :param tile_size: Size in cells of the square tiles the image is updated by
+        :param history_size: Maximum number of generations kept for seeking back (the cells colors and statistics)
+        :param max_generation: Last generation the seek slider and the play control reach
+        """
+        self.__automaton = automaton or CellularAutomaton()
+        self.__rasterizer = rasterizer or Rasterizer()
+        self.__tile_size = tile_size
+        self.__max_generation = max_generation
+        self.__history = deque(maxlen=history_size)
+        self.__shown_generation = None
+        self.__shown_colors = None
+        self.__pixels = None
+        self.__widget = None
+        self.__canvas = None
+        self.__image = None
+        self.__image_handle = None
+        self.__stats_handle = None
+        self.__is_seeking = False
+
+        self.__record_generation()
+
+    @property
+    def automaton(self):
+        """
+        Getter for the automaton the renderer displays
+
+        :return: Cellular automaton instance
+        """
+        return self.__automaton
+
+    @property
+    def shown_generation(self):
+        """
+        Getter for the generation currently shown
+
+        :return: Generation number, or None if nothing was shown yet
+        """
+        return self.__shown_generation
+
+    @property
+    def generations(self):
+        """
+        Getter for the generations which can be seeked to without running the automaton
+
+        :return: List of generation numbers
+        """
+        return [generation for (generation, _, _) in self.__history]
+
+    def show(self):
+        """
+        Displays the renderer in the notebook, with the widgets controls when ipywidgets is installed
+        """
+        # Imported here so only the notebook paths require IPython
+        from IPython.display import display
+
+        (generation, colors, stats) = self.__history[-1]
+        self.__pixels = self.__rasterizer.rasterize_colors(colors)
+        self.__shown_colors = None
+
+        try:
+            self.__widget = self.__create_widget()
+        except ImportError:
+            self.__widget = None
+
+        if self.__widget is not None:
+            display(self.__widget)
+        else:
+            self.__image_handle = display(self.__create_image(), display_id=True)
+            self.__stats_handle = display(self.__create_stats_html(stats), display_id=True)
+
+        self.__show_generation(generation, colors, stats)
+
+    def _ipython_display_(self):
+        self.show()
+
+    def step(self, num_generations=1):
+        """
+        Passes generations in the automaton and shows the last one
+
+        :param num_generations: Number of generations to pass
+        """
+        for _ in range(num_generations):
+            self.__automaton.next_generation()
+            self.__record_generation()
+
+        self.__show_generation(*self.__history[-1])
+
+    def seek(self, generation):
+        """
+        Shows generation, passing generations in the automaton when it's after the current generation
+
+        :param generation: Generation number to show
+        """
+        if generation > self.__automaton.generation:
+            self.step(generation - self.__automaton.generation)
+            return
+
+        for (history_generation, colors, stats) in self.__history:
+            if history_generation == generation:
+                self.__show_generation(history_generation, colors, stats)
+                return
+
+        raise ValueError(f'Generation is not in the history given "{generation}".')
+
+    def __record_generation(self):
+        """
+        Records the cells colors and the statistics of the current generation of the automaton
+        """
+        self.__history.append((
+            self.__automaton.generation,
+            self.__rasterizer.colors(self.__automaton.world_arrays),
+            self.__automaton.stats.snapshot()
+        ))
+
+    def __show_generation(self, generation, colors, stats):
+        """
+        Updates the displayed image and statistics to generation
+
+        :param generation: Generation number
+        :param colors: Array of the cells colors of the generation
+        :param stats: Statistics snapshot of the generation
+        """
+        if self.__shown_colors is None or self.__shown_colors.shape != colors.shape:
+            self.__pixels = self.__rasterizer.rasterize_colors(colors)
+            self.__update_image([(0, 0, self.__pixels)])
+        else:
+            self.__update_image(self.__update_dirty_tiles(colors))
+
+        self.__shown_generation = generation
+        self.__shown_colors = colors
+        self.__update_stats(generation, stats)
+
+    def __update_dirty_tiles(self, colors):
+        """
+        Rasterizes again the tiles of the cells whose color changed since the shown generation
+
+        :param colors: Array of the cells colors to show
+        :return: List of (x, y, pixels) of the updated regions of the image, a region per run of dirty tiles in a row
+        """
+        tile_size = self.__tile_size
+        cell_size = self.__rasterizer.cell_size
+        (num_rows, num_cols) = colors.shape[:2]
+
+        # Pad the changed cells to whole tiles, and find the tiles with any changed cell
+        is_changed = np.any(colors != self.__shown_colors, axis=2)
+        num_tile_rows = -(-num_rows // tile_size)
+        num_tile_cols = -(-num_cols // tile_size)
+        padded_changed = np.zeros((num_tile_rows * tile_size, num_tile_cols * tile_size), dtype=bool)
+        padded_changed[:num_rows, :num_cols] = is_changed
+        dirty_tiles = padded_changed.reshape(num_tile_rows, tile_size, num_tile_cols, tile_size).any(axis=(1, 3))
+
+        regions = []
+
+        for tile_row in np.flatnonzero(dirty_tiles.any(axis=1)):
+            # Adjacent dirty tiles in the row are merged into single region
+            tile_cols = np.flatnonzero(dirty_tiles[tile_row])
+            run_starts = np.concatenate(([0], np.flatnonzero(np.diff(tile_cols) > 1) + 1))
+            run_ends = np.concatenate((run_starts[1:], [len(tile_cols)]))
+
+            for (run_start, run_end) in zip(run_starts, run_ends):
+                rows = slice(tile_row * tile_size, min((tile_row + 1) * tile_size, num_rows))
+                cols = slice(tile_cols[run_start] * tile_size, min((tile_cols[run_end - 1] + 1) * tile_size, num_cols))
+                pixel_rows = slice(rows.start * cell_size, rows.stop * cell_size)
+                pixel_cols = slice(cols.start * cell_size, cols.stop * cell_size)
+
+                self.__pixels[pixel_rows, pixel_cols] = self.__rasterizer.rasterize_colors(colors[rows, cols])
+                regions.append((int(pixel_cols.start), int(pixel_rows.start), self.__pixels[pixel_rows, pixel_cols]))
+
+        return regions
+
+    def __update_image(self, regions):
+        """
+        Sends the updated regions of the image to the notebook
+
+        :param regions: List of (x, y, pixels) of the updated regions
+        """
+        if not regions:
+            return
+
+        if self.__canvas is not None:
+            for (x, y, region_pixels) in regions:
+                self.__canvas.put_image_data(region_pixels, x, y)
+        elif self.__image is not None:
+            self.__image.value = encode_png(self.__pixels, compress_level=1)
+        elif self.__image_handle is not None:
+            self.__image_handle.update(self.__create_image())
+
+    def __update_stats(self, generation, stats):
+        """
+        Updates the displayed statistics and the seek controls to generation
+
+        :param generation: Generation number
+        :param stats: Statistics snapshot of the generation
+        """
+        stats_html = self.__create_stats_html(stats)
+
+        if self.__widget is not None:
+            self.__stats.value = stats_html.data
+            self.__is_seeking = True
+
+            try:
+                self.__slider.min = self.__history[0][0]
+                self.__slider.value = generation
+            finally:
+                self.__is_seeking = False
+        elif self.__stats_handle is not None:
+            self.__stats_handle.update(stats_html)
+
+    def __create_image(self):
+        """
+        Creates IPython image of the whole image
+
+        :return: IPython image
+        """
+        from IPython.display import Image
+
+        return Image(data=encode_png(self.__pixels, compress_level=1), format='png')
+
+    def __create_stats_html(self, stats):
+        """
+        Creates HTML table of statistics snapshot
+
+        :param stats: Statistics snapshot
+        :return: IPython HTML
+        """
+        from IPython.display import HTML
+
+        rows = [('Generation', stats['generation'])]
+        rows += [(cell_type, count) for cell_type, count in stats['cell_counts'].items()]
+        rows += [
+            (label, f'{stats[name]:.4f}' if isinstance(stats[name], float) else stats[name])
+            for (name, label) in NotebookRenderer.__stats_fields
+        ]
+
+        table_rows = ''.join(f'<tr><td>{label}</td><td>{value}</td></tr>' for (label, value) in rows)
+
+        return HTML(f'<table>{table_rows}</table>')
+
+    def __create_widget(self):
+        """
+        Creates the widgets of the image, the controls and the statistics
+
+        :return: Widget containing all the widgets
+        """
+        import ipywidgets
+
+        # The canvas is optional, it allows sending only the changed regions of the image
+        try:
+            from ipycanvas import Canvas
+        except ImportError:
+            Canvas = None
+
+        (num_rows, num_cols) = self.__automaton.world_arrays.shape
+        (width, height) = (num_cols * self.__rasterizer.cell_size, num_rows * self.__rasterizer.cell_size)
+
+        if Canvas is not None:
+            self.__canvas = Canvas(width=width, height=height)
+            image_widget = self.__canvas
+        else:
+            self.__image = ipywidgets.Image(format='png', width=width, height=height)
+            image_widget = self.__image
+
+        self.__stats = ipywidgets.HTML()
+        step_button = ipywidgets.Button(description='Step')
+        step_button.on_click(lambda _: self.step())
+        self.__slider = ipywidgets.IntSlider(
+            value=self.__automaton.generation,
+            min=self.__history[0][0],
+            max=self.__max_generation,
+            description='Generation'
+        )
+        self.__slider.observe(self.__on_slider_change, names='value')
+
+        # The play control advances the slider, which passes the generations as it goes
+        play = ipywidgets.Play(
+            value=self.__automaton.generation,
+            min=self.__history[0][0],
+            max=self.__max_generation,
+            interval=100
+        )
+        ipywidgets.jslink((play, 'value'), (self.__slider, 'value'))
+
+        return ipywidgets.VBox([
+            ipywidgets.HBox([step_button, play, self.__slider]),
+            ipywidgets.HBox([image_widget, self.__stats])
+        ])
+
+    def __on_slider_change(self, change):
+        """
+        Seeks to the generation selected by the slider (or the play control)
+
+        :param change: Change of the slider value
+        """
+        if self.__is_seeking:
+            return
+
+        # Generations dropped from the history show the oldest one kept instead
+        self.seek(max(change['new'], self.__history[0][0]))
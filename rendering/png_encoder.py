@@ -0,0 +1,57 @@
+from struct import pack
+from zlib import compress, crc32
+
+import numpy as np
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+
+def encode_png(pixels, compress_level=6):
+    """
+    Encodes RGB image as PNG, without any imaging library or display
+
+    :param pixels: Array of uint8 RGB pixels in the shape (height, width, 3)
+    :param compress_level: zlib compression level (0 - 9), lower is faster
+    :return: PNG file content
+    """
+    (height, width, _) = pixels.shape
+
+    # Each scanline starts with its filter type byte, 0 is no filtering
+    scanlines = np.zeros((height, width * 3 + 1), dtype=np.uint8)
+    scanlines[:, 1:] = pixels.reshape(height, width * 3)
+
+    # 8 bits per channel, color type 2 (RGB), default compression, filtering and no interlace
+    header = pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+
+    return b''.join([
+        PNG_SIGNATURE,
+        _chunk(b'IHDR', header),
+        _chunk(b'IDAT', compress(scanlines.tobytes(), compress_level)),
+        _chunk(b'IEND', b'')
+    ])
+
+
+def write_png(file_path, pixels, compress_level=6):
+    """
+    Encodes RGB image as PNG and writes it to file
+
+    :param file_path: Path to the PNG file to write
+    :param pixels: Array of uint8 RGB pixels in the shape (height, width, 3)
+    :param compress_level: zlib compression level (0 - 9), lower is faster
+    :return: Path to the written file
+    """
+    with open(file_path, 'wb') as png_file:
+        png_file.write(encode_png(pixels, compress_level))
+
+    return file_path
+
+
+def _chunk(chunk_type, data):
+    """
+    Builds PNG chunk
+
+    :param chunk_type: 4 bytes chunk type
+    :param data: Chunk data
+    :return: Chunk bytes (length, type, data and CRC)
+    """
+    return pack('>I', len(data)) + chunk_type + data + pack('>I', crc32(chunk_type + data) & 0xffffffff)
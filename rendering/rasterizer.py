@@ -0,0 +1,88 @@
+import numpy as np
+
+from settings import AppSettings, CellTypes
+
+
+class Rasterizer:
+    """
+    Converts world state arrays to RGB images, where each cell is drawn as square of pixels.
+    The cells are colored by their type (as in the GUI) or by color map of their temperature or air pollution.
+    """
+    modes = ['type', 'temp', 'air_pollution']
+
+    def __init__(self, mode='type', cell_size=8):
+        """
+        Creates rasterizer.
+
+        :param mode: What the cells colors show (type, temp or air_pollution)
+        :param cell_size: Size in pixels of the square of each cell
+        """
+        if mode not in Rasterizer.modes:
+            raise ValueError(f'Unknown rasterizer mode given "{mode}".')
+
+        self.__mode = mode
+        self.__cell_size = cell_size
+        self.__cell_type_colors = np.array(
+            [AppSettings.CELL_CUBE[cell_type]['RGB'] for cell_type in CellTypes],
+            dtype=np.uint8
+        )
+
+        if mode in AppSettings.COLOR_MAPS:
+            color_map = AppSettings.COLOR_MAPS[mode]
+            self.__color_map_values = np.array([value for (value, _) in color_map], dtype=np.float64)
+            self.__color_map_colors = np.array([color for (_, color) in color_map], dtype=np.float64)
+
+    @property
+    def mode(self):
+        """
+        Getter for what the cells colors show
+
+        :return: Rasterizer mode
+        """
+        return self.__mode
+
+    @property
+    def cell_size(self):
+        """
+        Getter for the size in pixels of each cell
+
+        :return: Cell size
+        """
+        return self.__cell_size
+
+    def colors(self, state):
+        """
+        Calculates the color of each cell
+
+        :param state: World state with cell_type, temp and air_pollution arrays (such as WorldArrays)
+        :return: Array of uint8 RGB colors in the shape (num_rows, num_cols, 3)
+        """
+        if self.__mode == 'type':
+            return self.__cell_type_colors[state.cell_type]
+
+        values = getattr(state, self.__mode)
+        colors = np.empty(values.shape + (3,), dtype=np.uint8)
+
+        # Values outside the color map get the color of the nearest stop
+        for channel in range(3):
+            colors[..., channel] = np.interp(values, self.__color_map_values, self.__color_map_colors[:, channel])
+
+        return colors
+
+    def rasterize(self, state):
+        """
+        Rasterizes world state to RGB image
+
+        :param state: World state with cell_type, temp and air_pollution arrays (such as WorldArrays)
+        :return: Array of uint8 RGB pixels in the shape (num_rows * cell_size, num_cols * cell_size, 3)
+        """
+        return self.rasterize_colors(self.colors(state))
+
+    def rasterize_colors(self, colors):
+        """
+        Rasterizes cells colors to RGB image
+
+        :param colors: Array of uint8 RGB colors in the shape (num_rows, num_cols, 3)
+        :return: Array of uint8 RGB pixels in the shape (num_rows * cell_size, num_cols * cell_size, 3)
+        """
+        return np.repeat(np.repeat(colors, self.__cell_size, axis=0), self.__cell_size, axis=1)
@@ -0,0 +1,216 @@
+from copy import deepcopy
+from json import load, dumps
+from operator import ge, gt, le, lt
+
+from settings import LogicSettings, CellTypes
+
+
+class RuleSet:
+    """
+    Represent the rules of the automaton as loaded from rules file.
+    """
+    __operators = {
+        '>=': ge,
+        '>': gt,
+        '<=': le,
+        '<': lt
+    }
+
+    def __init__(self, rules):
+        """
+        Creates rule set from rules dictionary (the rules file content)
+
+        :param rules: Dictionary of the rules
+        """
+        self.__rules = rules
+
+    @classmethod
+    def load(cls, rules_file_path=LogicSettings.RULES_FILE_PATH):
+        """
+        Loads rule set from rules file
+
+        :param rules_file_path: Path to JSON rules file
+        :return: Rule set of the rules file
+        """
+        with open(rules_file_path, 'r') as rules_file:
+            return cls(load(rules_file))
+
+    @property
+    def rules(self):
+        """
+        Getter for the rules dictionary
+
+        :return: Dictionary of the rules
+        """
+        return self.__rules
+
+    def get(self, path):
+        """
+        Returns a single rule value by its path
+
+        :param path: Dot separated path of the rule (for example cells.CITY.air_pollution_grow_factor)
+        :return: The rule value
+        """
+        value = self.__rules
+
+        for key in path.split('.'):
+            value = value[int(key)] if isinstance(value, list) else value[key]
+
+        return value
+
+    def with_overrides(self, overrides):
+        """
+        Creates new rule set with some of the rules overridden
+
+        :param overrides: Dictionary of rule path as key and the new rule value as value
+        :return: New rule set with the overridden values
+        """
+        rules = deepcopy(self.__rules)
+
+        for path, new_value in overrides.items():
+            *parent_keys, last_key = path.split('.')
+            parent = rules
+
+            for key in parent_keys:
+                parent = parent[int(key)] if isinstance(parent, list) else parent[key]
+
+            if isinstance(parent, list):
+                parent[int(last_key)] = new_value
+            elif last_key in parent:
+                parent[last_key] = new_value
+            else:
+                raise KeyError(f'Unknown rule "{path}".')
+
+        return RuleSet(rules)
+
+    def to_json(self):
+        """
+        Serializes the rule set to canonical JSON (same rules always give the same text)
+
+        :return: JSON text of the rules
+        """
+        return dumps(self.__rules, sort_keys=True, separators=(',', ':'))
+
+    def compile(self):
+        """
+        Compiles the rule set into flat rule tables
+
+        :return: Rule tables of the rule set
+        """
+        return RuleTables(self)
+
+    @classmethod
+    def get_operator(cls, operator_text):
+        """
+        Returns the comparison function of the operator text
+
+        :param operator_text: Operator text (>=, >, <=, <)
+        :return: Comparison function
+        """
+        if operator_text not in cls.__operators:
+            raise ValueError(f'Bad rule operator given "{operator_text}".')
+
+        return cls.__operators[operator_text]
+
+
+class RuleTables:
+    """
+    Represent the rules of the automaton compiled into flat lookup tables.
+    Per cell type rules are lists indexed by the cell type value.
+
+    The active rule tables are used by all the automatons in the process, and can be
+    swapped at any time with activate().
+    """
+    _active = None
+
+    def __init__(self, rule_set):
+        """
+        Compiles rule set into rule tables
+
+        :param rule_set: Rule set to compile
+        """
+        world_cell_rules = rule_set.get('world_cell')
+        self.temp_max = world_cell_rules['temp_max']
+        self.temp_min = world_cell_rules['temp_min']
+        self.air_pollution_max = world_cell_rules['air_pollution_max']
+        self.air_pollution_min = world_cell_rules['air_pollution_min']
+        self.air_pollution_heat_bound = world_cell_rules['air_pollution_heat_bound']
+        self.air_pollution_cool_bound = world_cell_rules['air_pollution_cool_bound']
+        self.air_pollution_heat_temp_factor = world_cell_rules['air_pollution_heat_temp_factor']
+        self.air_pollution_cool_temp_factor = world_cell_rules['air_pollution_cool_temp_factor']
+        self.wind_air_pollution_percentage_factor = world_cell_rules['wind_air_pollution_percentage_factor']
+        self.cloud_rain_temp_cool_factor = world_cell_rules['cloud_rain_temp_cool_factor']
+        self.cloud_rain_air_pollution_drop_percentage_factor = \
+            world_cell_rules['cloud_rain_air_pollution_drop_percentage_factor']
+
+        self.wind_affect_speed_factor = rule_set.get('wind.affect_speed_factor')
+
+        # Speed ranges of the winds of new worlds as tuples of (percentage of the winds, (min speed, max speed))
+        self.wind_speed_distribution = tuple(
+            (speed_bucket['percentage'], (speed_bucket['min_speed'], speed_bucket['max_speed']))
+            for speed_bucket in rule_set.get('wind.speed_distribution')
+        )
+        self.cloud_max_precipitation = rule_set.get('cloud.max_precipitation')
+        self.cloud_precipitation_grow_factor = rule_set.get('cloud.precipitation_grow_factor')
+
+        num_cell_types = len(CellTypes)
+
+        # Transitions of each cell type as tuples of (field, operator text, operator, threshold, new cell type),
+        # evaluated in order where the last met transition wins
+        self.transitions = [() for _ in range(num_cell_types)]
+
+        # Transition when it rains and the air pollution is low enough
+        self.rain_transition_air_pollution_max = [None] * num_cell_types
+        self.rain_transition_cell_type = [None] * num_cell_types
+
+        # Change each cell type applies on all of its neighbors every generation
+        self.neighbors_change_field = [None] * num_cell_types
+        self.neighbors_change_value = [0] * num_cell_types
+
+        self.air_pollution_grow_factor = [0] * num_cell_types
+
+        for cell_type_name, cell_rules in rule_set.get('cells').items():
+            cell_type_value = CellTypes[cell_type_name].value
+
+            self.transitions[cell_type_value] = tuple(
+                (
+                    transition['field'],
+                    transition['operator'],
+                    RuleSet.get_operator(transition['operator']),
+                    transition['value'],
+                    CellTypes[transition['to']]
+                )
+                for transition in cell_rules.get('transitions', [])
+            )
+
+            if 'rain_transition' in cell_rules:
+                self.rain_transition_air_pollution_max[cell_type_value] = \
+                    cell_rules['rain_transition']['air_pollution_max']
+                self.rain_transition_cell_type[cell_type_value] = CellTypes[cell_rules['rain_transition']['to']]
+
+            if 'neighbors_change' in cell_rules:
+                self.neighbors_change_field[cell_type_value] = cell_rules['neighbors_change']['field']
+                self.neighbors_change_value[cell_type_value] = cell_rules['neighbors_change']['value']
+
+            self.air_pollution_grow_factor[cell_type_value] = cell_rules.get('air_pollution_grow_factor', 0)
+
+    @classmethod
+    def active(cls):
+        """
+        Returns the active rule tables, loading the default rules file on first use
+
+        :return: Active rule tables
+        """
+        if cls._active is None:
+            cls._active = RuleSet.load().compile()
+
+        return cls._active
+
+    @classmethod
+    def activate(cls, rule_tables):
+        """
+        Sets the active rule tables
+
+        :param rule_tables: Rule tables to activate
+        """
+        cls._active = rule_tables
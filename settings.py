@@ -1,5 +1,5 @@
 from enum import Enum
-from os.path import abspath
+from os.path import abspath, dirname, join
 
 
 class CellTypes(Enum):
@@ -41,30 +41,57 @@ class AppSettings:
         'HEIGHT': 100,
     }
 
+    # RGB is the same color as the Tk color name, used when rendering without Tk
     CELL_CUBE = {
         CellTypes.EARTH: {
-            'COLOR': 'brown'
+            'COLOR': 'brown',
+            'RGB': (165, 42, 42)
         },
         CellTypes.SEA: {
-            'COLOR': 'blue'
+            'COLOR': 'blue',
+            'RGB': (0, 0, 255)
         },
         CellTypes.CITY: {
-            'COLOR': 'yellow'
+            'COLOR': 'yellow',
+            'RGB': (255, 255, 0)
         },
         CellTypes.ICEBERG: {
-            'COLOR': 'white'
+            'COLOR': 'white',
+            'RGB': (255, 255, 255)
         },
         CellTypes.FOREST: {
-            'COLOR': 'green'
+            'COLOR': 'green',
+            'RGB': (0, 255, 0)
         }
     }
 
+    # Color maps as list of (value, RGB) stops, values between the stops get interpolated colors
+    COLOR_MAPS = {
+        'temp': [
+            (-50, (0, 0, 128)),
+            (0, (0, 128, 255)),
+            (20, (255, 255, 255)),
+            (60, (255, 128, 0)),
+            (150, (128, 0, 0))
+        ],
+        'air_pollution': [
+            (0, (255, 255, 255)),
+            (0.5, (160, 160, 160)),
+            (1, (40, 40, 40))
+        ]
+    }
+
 
 class LogicSettings:
     """
     Contains configurations values for the automaton (GUI)
     """
-    WORLD_FILE_PATH = f'{abspath("")}/world.csv'
+    WORLD_FILE_PATH = join(dirname(abspath(__file__)), 'world.csv')
+
+    RULES_FILE_PATH = join(dirname(abspath(__file__)), 'rules.json')
+
+    # Version of the automaton logic, should be increased on every change in the simulation results
+    ENGINE_VERSION = 2
 
     NUM_CELLS = AppSettings.NUM_CELLS
 
@@ -0,0 +1,143 @@
+from struct import pack, unpack_from, calcsize
+
+import numpy as np
+
+# Message length, message type, generation, number of rows, number of columns and number of cells in the message
+HEADER_FORMAT = '<IBIHHI'
+HEADER_SIZE = calcsize(HEADER_FORMAT)
+
+KEYFRAME = 0
+DELTA = 1
+
+# Temperatures are sent in hundredths of a degree, and air pollution in 1/255 steps
+TEMP_SCALE = 100
+AIR_POLLUTION_SCALE = 255
+
+
+class StreamSnapshot:
+    """
+    Represent the world state of generation as it's streamed, with the values quantized to their wire types.
+    Changes smaller than the quantization are not streamed at all.
+    """
+
+    def __init__(self, generation, cell_type, temp, air_pollution):
+        """
+        Creates stream snapshot.
+
+        :param generation: Generation of the state
+        :param cell_type: Array of the cells types
+        :param temp: Array of the cells temperatures
+        :param air_pollution: Array of the cells air pollution
+        """
+        self.generation = generation
+        self.shape = cell_type.shape
+        self.cell_type = cell_type.astype(np.uint8).ravel()
+        self.temp = np.round(temp * TEMP_SCALE).astype(np.int16).ravel()
+        self.air_pollution = np.round(np.clip(air_pollution, 0, 1) * AIR_POLLUTION_SCALE).astype(np.uint8).ravel()
+
+    @classmethod
+    def from_world_arrays(cls, generation, world_arrays):
+        """
+        Creates stream snapshot of world arrays
+
+        :param generation: Generation of the world arrays
+        :param world_arrays: World arrays instance
+        :return: Stream snapshot instance
+        """
+        return cls(generation, world_arrays.cell_type, world_arrays.temp, world_arrays.air_pollution)
+
+    def changed_indices(self, previous_snapshot):
+        """
+        Finds the cells whose streamed values changed since previous snapshot
+
+        :param previous_snapshot: Stream snapshot of earlier generation
+        :return: Array of the flat indices of the changed cells
+        """
+        return np.flatnonzero(
+            (self.cell_type != previous_snapshot.cell_type) |
+            (self.temp != previous_snapshot.temp) |
+            (self.air_pollution != previous_snapshot.air_pollution)
+        ).astype(np.uint32)
+
+
+def encode_keyframe(snapshot):
+    """
+    Encodes message with the values of all the cells
+
+    :param snapshot: Stream snapshot to encode
+    :return: Message bytes
+    """
+    return _encode(KEYFRAME, snapshot, b'', slice(None))
+
+
+def encode_delta(snapshot, indices):
+    """
+    Encodes message with the values of the changed cells only
+
+    :param snapshot: Stream snapshot to encode
+    :param indices: Array of the flat indices of the changed cells
+    :return: Message bytes
+    """
+    return _encode(DELTA, snapshot, indices.astype('<u4').tobytes(), indices)
+
+
+def decode_message(data, offset=0):
+    """
+    Decodes message
+
+    :param data: Bytes containing the message
+    :param offset: Offset of the message in the bytes
+    :return: Dictionary of the message type, generation, shape, the indices (None for keyframe) and the values
+    """
+    (message_length, message_type, generation, num_rows, num_cols, num_cells) = unpack_from(HEADER_FORMAT, data, offset)
+    offset += HEADER_SIZE
+    indices = None
+
+    if message_type == DELTA:
+        indices = np.frombuffer(data, dtype='<u4', count=num_cells, offset=offset)
+        offset += 4 * num_cells
+
+    cell_type = np.frombuffer(data, dtype=np.uint8, count=num_cells, offset=offset)
+    temp = np.frombuffer(data, dtype='<i2', count=num_cells, offset=offset + num_cells)
+    air_pollution = np.frombuffer(data, dtype=np.uint8, count=num_cells, offset=offset + 3 * num_cells)
+
+    return {
+        'type': message_type,
+        'length': message_length,
+        'generation': generation,
+        'shape': (num_rows, num_cols),
+        'indices': indices,
+        'cell_type': cell_type,
+        'temp': temp / TEMP_SCALE,
+        'air_pollution': air_pollution / AIR_POLLUTION_SCALE
+    }
+
+
+def _encode(message_type, snapshot, indices_bytes, cells):
+    """
+    Encodes message of cells of snapshot
+
+    :param message_type: KEYFRAME or DELTA
+    :param snapshot: Stream snapshot to encode
+    :param indices_bytes: Encoded indices of the cells (empty for keyframe)
+    :param cells: Index of the cells to encode in the snapshot arrays
+    :return: Message bytes
+    """
+    cell_type = snapshot.cell_type[cells]
+    body = b''.join([
+        indices_bytes,
+        cell_type.tobytes(),
+        snapshot.temp[cells].astype('<i2').tobytes(),
+        snapshot.air_pollution[cells].tobytes()
+    ])
+    (num_rows, num_cols) = snapshot.shape
+
+    return pack(
+        HEADER_FORMAT,
+        HEADER_SIZE + len(body),
+        message_type,
+        snapshot.generation,
+        num_rows,
+        num_cols,
+        len(cell_type)
+    ) + body
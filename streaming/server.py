@@ -0,0 +1,333 @@
+import asyncio
+from argparse import ArgumentParser
+from collections import deque
+from json import dumps
+from os.path import join, dirname, abspath
+from random import seed as random_seed
+from socket import SOL_SOCKET, SO_SNDBUF
+from time import monotonic
+
+import numpy as np
+
+from cellular_automaton import CellularAutomaton
+from engines.engine import ENGINES
+from rules import RuleSet, RuleTables
+from settings import AppSettings, CellTypes, LogicSettings
+from streaming.protocol import StreamSnapshot, encode_keyframe, encode_delta
+
+VIEWER_FILE_PATH = join(dirname(abspath(__file__)), 'viewer.html')
+
+
+class AutomatonStreamServer:
+    """
+    Runs the automaton on its own schedule and streams its generations to any number of clients over HTTP,
+    along with a browser viewer which draws them on canvas.
+
+    Each client gets a keyframe of the whole world and then deltas of the changed cells only, in chunked response.
+    The changes of the recent generations are kept, so a slow client (whose socket buffer is full) just gets
+    a single delta of all the generations it missed once it catches up, or a keyframe if it missed too many.
+    """
+
+    def __init__(
+            self,
+            automaton=None,
+            host='127.0.0.1',
+            port=8765,
+            generation_interval=0.1,
+            history_size=64,
+            write_buffer_size=64 * 1024
+    ):
+        """
+        Creates stream server.
+
+        :param automaton: Cellular automaton to run, None for automaton of the default world
+        :param host: Host to listen on, local only by default
+        :param port: Port to listen on, 0 for any free port
+        :param generation_interval: Minimum seconds between generations
+        :param history_size: Number of recent generations whose changes are kept for coalescing deltas
+        :param write_buffer_size: Bytes buffered for each client before it's considered slow and waited for
+        """
+        self.__automaton = automaton or CellularAutomaton()
+        self.__host = host
+        self.__port = port
+        self.__generation_interval = generation_interval
+        self.__write_buffer_size = write_buffer_size
+        self.__snapshot = StreamSnapshot.from_world_arrays(self.__automaton.generation, self.__automaton.world_arrays)
+        self.__changes = deque(maxlen=history_size)
+        self.__server = None
+        self.__generation_condition = None
+        self.__client_tasks = set()
+        self.__is_closed = False
+
+    @property
+    def generation(self):
+        """
+        Getter for the latest generation streamed
+
+        :return: Generation number
+        """
+        return self.__snapshot.generation
+
+    @property
+    def port(self):
+        """
+        Getter for the port the server listens on (the actual port once started when 0 was given)
+
+        :return: Port number
+        """
+        if self.__server is not None:
+            return self.__server.sockets[0].getsockname()[1]
+
+        return self.__port
+
+    @property
+    def num_clients(self):
+        """
+        Getter for the number of clients currently streamed to
+
+        :return: Number of clients
+        """
+        return len(self.__client_tasks)
+
+    async def start(self):
+        """
+        Starts listening for clients
+        """
+        self.__generation_condition = asyncio.Condition()
+        self.__server = await asyncio.start_server(self.__handle_client, self.__host, self.__port)
+
+    async def run(self, num_generations=None):
+        """
+        Starts the server if needed, and passes generations on schedule while streaming them
+
+        :param num_generations: Number of generations to pass, None for passing generations until closed
+        """
+        if self.__server is None:
+            await self.start()
+
+        target_generation = None if num_generations is None else self.__automaton.generation + num_generations
+
+        while not self.__is_closed and (target_generation is None or self.generation < target_generation):
+            start_time = monotonic()
+
+            # The generation passes in worker thread, so the clients are served meanwhile
+            (snapshot, changed_indices) = await asyncio.to_thread(self.__next_generation)
+            await self.__publish(snapshot, changed_indices)
+
+            await asyncio.sleep(max(0.0, self.__generation_interval - (monotonic() - start_time)))
+
+    async def close(self):
+        """
+        Stops passing generations, disconnects all the clients and stops listening
+        """
+        self.__is_closed = True
+
+        if self.__server is None:
+            return
+
+        self.__server.close()
+
+        async with self.__generation_condition:
+            self.__generation_condition.notify_all()
+
+        for client_task in list(self.__client_tasks):
+            client_task.cancel()
+
+        await asyncio.gather(*self.__client_tasks, return_exceptions=True)
+        await self.__server.wait_closed()
+
+    def __next_generation(self):
+        """
+        Passes a generation and finds the cells it changed (in the worker thread)
+
+        :return: Tuple of the stream snapshot of the new generation and the flat indices of its changed cells
+        """
+        self.__automaton.next_generation()
+        snapshot = StreamSnapshot.from_world_arrays(self.__automaton.generation, self.__automaton.world_arrays)
+
+        return snapshot, snapshot.changed_indices(self.__snapshot)
+
+    async def __publish(self, snapshot, changed_indices):
+        """
+        Makes new generation the latest one and wakes the clients waiting for it
+
+        :param snapshot: Stream snapshot of the generation
+        :param changed_indices: Flat indices of the cells the generation changed
+        """
+        async with self.__generation_condition:
+            self.__snapshot = snapshot
+            self.__changes.append((snapshot.generation, changed_indices))
+            self.__generation_condition.notify_all()
+
+    def __encode_update(self, client_generation):
+        """
+        Encodes the update of a client from the generation it has to the latest generation
+
+        :param client_generation: Generation the client has, None for a new client
+        :return: Message bytes
+        """
+        snapshot = self.__snapshot
+
+        # Clients which missed more generations than the kept changes get the whole world again
+        if client_generation is None or not self.__changes or self.__changes[0][0] > client_generation + 1:
+            return encode_keyframe(snapshot)
+
+        missed_changes = [indices for (generation, indices) in self.__changes if generation > client_generation]
+
+        return encode_delta(snapshot, np.unique(np.concatenate(missed_changes)))
+
+    async def __handle_client(self, reader, writer):
+        """
+        Serves HTTP request of a client, either the viewer page or the stream of generations
+
+        :param reader: Stream reader of the connection
+        :param writer: Stream writer of the connection
+        """
+        task = asyncio.current_task()
+        self.__client_tasks.add(task)
+
+        try:
+            request = await reader.readuntil(b'\r\n\r\n')
+            (method, path) = request.split(b'\r\n', 1)[0].decode('latin-1').split(' ')[:2]
+            path = path.split('?', 1)[0]
+
+            if method != 'GET':
+                await self.__write_response(writer, '405 Method Not Allowed', 'text/plain', b'Method not allowed')
+            elif path == '/':
+                await self.__write_response(writer, '200 OK', 'text/html; charset=utf-8', self.__viewer_page())
+            elif path == '/stream':
+                await self.__stream(writer)
+            else:
+                await self.__write_response(writer, '404 Not Found', 'text/plain', b'Not found')
+        except (
+                asyncio.IncompleteReadError,
+                asyncio.LimitOverrunError,
+                ValueError,
+                ConnectionError,
+                asyncio.CancelledError
+        ):
+            # Malformed requests, disconnected clients and clients of closed server are just dropped
+            pass
+        finally:
+            self.__client_tasks.discard(task)
+            writer.close()
+
+    async def __stream(self, writer):
+        """
+        Streams the generations to a client as chunked response, until the client disconnects or the server closes
+
+        :param writer: Stream writer of the connection
+        """
+        # Both the socket buffer and the transport buffer are kept small, so a slow client is noticed early
+        writer.get_extra_info('socket').setsockopt(SOL_SOCKET, SO_SNDBUF, self.__write_buffer_size)
+        writer.transport.set_write_buffer_limits(high=self.__write_buffer_size)
+        writer.write(
+            b'HTTP/1.1 200 OK\r\n'
+            b'Content-Type: application/octet-stream\r\n'
+            b'Cache-Control: no-cache\r\n'
+            b'Transfer-Encoding: chunked\r\n'
+            b'\r\n'
+        )
+        client_generation = None
+
+        while not self.__is_closed:
+            async with self.__generation_condition:
+                await self.__generation_condition.wait_for(
+                    lambda: self.__is_closed or client_generation != self.__snapshot.generation
+                )
+
+            if self.__is_closed:
+                break
+
+            message_generation = self.__snapshot.generation
+            message = self.__encode_update(client_generation)
+            writer.write(f'{len(message):x}\r\n'.encode('ascii') + message + b'\r\n')
+
+            # Waits while the client's buffer is full, generations passing meanwhile are coalesced into the next delta
+            await writer.drain()
+            client_generation = message_generation
+
+        writer.write(b'0\r\n\r\n')
+
+    @staticmethod
+    async def __write_response(writer, status, content_type, body):
+        """
+        Writes whole HTTP response
+
+        :param writer: Stream writer of the connection
+        :param status: Status line of the response
+        :param content_type: Content type of the body
+        :param body: Body bytes
+        """
+        writer.write(
+            f'HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\nContent-Length: {len(body)}\r\n'
+            f'Connection: close\r\n\r\n'.encode('latin-1') + body
+        )
+        await writer.drain()
+
+    def __viewer_page(self):
+        """
+        Creates the viewer page, with the cells colors of the GUI
+
+        :return: Page bytes
+        """
+        with open(VIEWER_FILE_PATH, encoding='utf-8') as viewer_file:
+            viewer_page = viewer_file.read()
+
+        viewer_config = {
+            'cell_colors': [AppSettings.CELL_CUBE[cell_type]['RGB'] for cell_type in CellTypes],
+            'cell_types': [cell_type.name for cell_type in CellTypes],
+            'color_maps': AppSettings.COLOR_MAPS
+        }
+
+        return viewer_page.replace('__VIEWER_CONFIG__', dumps(viewer_config)).encode('utf-8')
+
+
+def parse_arguments():
+    """
+    Parses the command line arguments of the stream server
+
+    :return: Parsed arguments
+    """
+    parser = ArgumentParser(description='Runs the global warming automaton and streams its generations to browsers.')
+    parser.add_argument('--world', default=LogicSettings.WORLD_FILE_PATH, help='Path to world file')
+    parser.add_argument('--rules', default=LogicSettings.RULES_FILE_PATH, help='Path to rules file')
+    parser.add_argument('--seed', type=int, default=None, help='Seed for the random initial conditions')
+    parser.add_argument('--engine', default='reference', choices=list(ENGINES), help='Engine which passes the generations')
+    parser.add_argument('--host', default='127.0.0.1', help='Host to listen on')
+    parser.add_argument('--port', type=int, default=8765, help='Port to listen on')
+    parser.add_argument('--interval', type=float, default=0.1, help='Minimum seconds between generations')
+    parser.add_argument('--generations', type=int, default=None, help='Number of generations to run, default is forever')
+    return parser.parse_args()
+
+
+async def serve(arguments):
+    """
+    Runs the stream server of the command line arguments until the generations are done or it's interrupted
+
+    :param arguments: Parsed arguments
+    """
+    stream_server = AutomatonStreamServer(
+        CellularAutomaton(arguments.world, arguments.engine),
+        host=arguments.host,
+        port=arguments.port,
+        generation_interval=arguments.interval
+    )
+    await stream_server.start()
+    print(dumps({'url': f'http://{arguments.host}:{stream_server.port}/'}), flush=True)
+
+    try:
+        await stream_server.run(arguments.generations)
+    finally:
+        await stream_server.close()
+
+
+if __name__ == '__main__':
+    arguments = parse_arguments()
+    RuleTables.activate(RuleSet.load(arguments.rules).compile())
+    random_seed(arguments.seed)
+
+    try:
+        asyncio.run(serve(arguments))
+    except KeyboardInterrupt:
+        pass
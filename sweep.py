@@ -0,0 +1,335 @@
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from hashlib import sha256
+from itertools import product
+from json import dumps, loads, load, dump
+from os import makedirs, replace
+from os.path import join, exists
+from random import Random
+
+from batch_runner import AutomatonBatchRunner
+from analytics.stop_conditions import parse_stop_condition
+from rules import RuleSet, RuleTables
+from settings import LogicSettings
+
+
+class SweepCache:
+    """
+    Caches the results of sweep points on disk, keyed by hash of everything which affects the result.
+    """
+
+    def __init__(self, cache_dir):
+        """
+        Creates sweep cache in the given directory
+
+        :param cache_dir: Path to the cache directory
+        """
+        self.__cache_dir = cache_dir
+        makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def key(world_file_path, rule_set, seed, num_generations, stop_conditions, engine='reference'):
+        """
+        Calculates the cache key of a sweep point
+
+        :param world_file_path: Path to the world file of the point
+        :param rule_set: Rule set of the point
+        :param seed: Seed of the point
+        :param num_generations: Number of generations of the point
+        :param stop_conditions: List of stop conditions texts of the point
+        :param engine: Name of the engine which passes the generations of the point
+        :return: Cache key of the point
+        """
+        point_hash = sha256()
+
+        with open(world_file_path, 'rb') as world_file:
+            point_hash.update(world_file.read())
+
+        point_hash.update(rule_set.to_json().encode())
+        point_hash.update(dumps({
+            'seed': seed,
+            'generations': num_generations,
+            'stop_conditions': stop_conditions,
+            'engine': engine,
+            'engine_version': LogicSettings.ENGINE_VERSION
+        }, sort_keys=True).encode())
+
+        return point_hash.hexdigest()
+
+    def get(self, key):
+        """
+        Returns the cached result of a key
+
+        :param key: Cache key
+        :return: The cached result, or None if the key is not cached
+        """
+        result_path = self.__result_path(key)
+
+        if not exists(result_path):
+            return None
+
+        with open(result_path, 'r') as result_file:
+            return load(result_file)
+
+    def put(self, key, result):
+        """
+        Caches result of a key
+
+        :param key: Cache key
+        :param result: The result to cache
+        """
+        result_path = self.__result_path(key)
+
+        # Write to temporary file first, so interrupted sweeps never leave partial results
+        with open(f'{result_path}.tmp', 'w') as result_file:
+            dump(result, result_file)
+
+        replace(f'{result_path}.tmp', result_path)
+
+    def __result_path(self, key):
+        """
+        Returns the path of the result file of a key
+
+        :param key: Cache key
+        :return: Path to the result file
+        """
+        return join(self.__cache_dir, f'{key}.json')
+
+
+class ParameterSweep:
+    """
+    Runs the automaton over many points of rules values and seeds, in a process pool,
+    reusing the results of points which were already calculated.
+    """
+
+    def __init__(
+            self,
+            world_file_path=LogicSettings.WORLD_FILE_PATH,
+            rule_set=None,
+            num_generations=100,
+            stop_conditions=None,
+            cache_dir='sweep_cache'
+    ):
+        """
+        Creates parameter sweep.
+
+        :param world_file_path: Path to world file
+        :param rule_set: Base rule set the points override, None for the default rules file
+        :param num_generations: Number of generations to run each point
+        :param stop_conditions: List of stop conditions texts for each point run
+        :param cache_dir: Path to the results cache directory
+        """
+        self.__world_file_path = world_file_path
+        self.__rule_set = rule_set or RuleSet.load()
+        self.__num_generations = num_generations
+        self.__stop_conditions = stop_conditions or []
+        self.__cache = SweepCache(cache_dir)
+
+    @staticmethod
+    def grid_points(parameters, seeds):
+        """
+        Expands parameters grid into sweep points
+
+        :param parameters: Dictionary of rule path as key and list of values as value
+        :param seeds: List of seeds to run for each parameters combination
+        :return: List of points, each is tuple of (overrides dictionary, seed)
+        """
+        paths = list(parameters.keys())
+
+        return [
+            (dict(zip(paths, values)), seed)
+            for values in product(*[parameters[path] for path in paths])
+            for seed in seeds
+        ]
+
+    @staticmethod
+    def parse_value(rule_set, path, value_text):
+        """
+        Parses value of a rule from text, as the type of the rule value in the rule set
+
+        :param rule_set: Rule set which has the rule
+        :param path: Dot separated path of the rule
+        :param value_text: Text of the value
+        :return: The value, int for int rules and float for float rules
+        """
+        rule_value = rule_set.get(path)
+
+        if isinstance(rule_value, int):
+            return int(value_text)
+
+        if isinstance(rule_value, float):
+            return float(value_text)
+
+        return value_text
+
+    @staticmethod
+    def random_points(parameters, num_samples, seeds, sample_seed=None):
+        """
+        Samples random sweep points
+
+        :param parameters: Dictionary of rule path as key and (low, high) range as value, int ranges are sampled
+                           as ints (both ends included)
+        :param num_samples: Number of parameters combinations to sample
+        :param seeds: List of seeds to run for each parameters combination
+        :param sample_seed: Seed for the sampling of the combinations
+        :return: List of points, each is tuple of (overrides dictionary, seed)
+        """
+        sample_random = Random(sample_seed)
+        points = []
+
+        for _ in range(num_samples):
+            overrides = {
+                path: sample_random.randint(low, high) if isinstance(low, int) and isinstance(high, int) else
+                sample_random.uniform(low, high)
+                for path, (low, high) in parameters.items()
+            }
+            points.extend((overrides, seed) for seed in seeds)
+
+        return points
+
+    def run(self, points, max_workers=None):
+        """
+        Runs the sweep points, only the points which are not cached are calculated. Points which fail get result
+        with the error instead of the run summary, which is not cached, and the rest of the points still run
+
+        :param points: List of points, each is tuple of (overrides dictionary, seed)
+        :param max_workers: Maximum number of processes, None for number of processors
+        :return: List of results in the order of the points
+        """
+        results = [None] * len(points)
+        pending_points = {}
+
+        for point_index, (overrides, seed) in enumerate(points):
+            rule_set = self.__rule_set.with_overrides(overrides)
+            key = SweepCache.key(
+                self.__world_file_path,
+                rule_set,
+                seed,
+                self.__num_generations,
+                self.__stop_conditions
+            )
+            cached_result = self.__cache.get(key)
+
+            if cached_result is not None:
+                results[point_index] = {'overrides': overrides, **cached_result, 'cached': True}
+            else:
+                # Identical points share a single calculation
+                pending_points.setdefault(key, (rule_set, seed, []))[2].append(point_index)
+
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                key: executor.submit(
+                    run_sweep_point,
+                    self.__world_file_path,
+                    rule_set.to_json(),
+                    seed,
+                    self.__num_generations,
+                    self.__stop_conditions
+                )
+                for key, (rule_set, seed, _) in pending_points.items()
+            }
+
+            for key, future in futures.items():
+                try:
+                    result = future.result()
+                except Exception as error:
+                    result = {'seed': pending_points[key][1], 'error': f'{type(error).__name__}: {error}'}
+                else:
+                    self.__cache.put(key, result)
+
+                for point_index in pending_points[key][2]:
+                    results[point_index] = {'overrides': points[point_index][0], **result, 'cached': False}
+
+        return results
+
+
+def run_sweep_point(world_file_path, rules_json, seed, num_generations, stop_conditions):
+    """
+    Runs single sweep point (in a worker process)
+
+    :param world_file_path: Path to world file
+    :param rules_json: JSON text of the rules of the point
+    :param seed: Seed of the point
+    :param num_generations: Number of generations to run
+    :param stop_conditions: List of stop conditions texts
+    :return: The batch run summary of the point
+    """
+    RuleTables.activate(RuleSet(loads(rules_json)).compile())
+
+    return AutomatonBatchRunner(world_file_path, seed).run(
+        num_generations,
+        stop_conditions=[parse_stop_condition(condition) for condition in stop_conditions]
+    )
+
+
+def parse_arguments():
+    """
+    Parses the command line arguments of the parameter sweep
+
+    :return: Parsed arguments
+    """
+    parser = ArgumentParser(description='Runs the global warming automaton over a sweep of rules values.')
+    parser.add_argument('--world', default=LogicSettings.WORLD_FILE_PATH, help='Path to world file')
+    parser.add_argument('--rules', default=LogicSettings.RULES_FILE_PATH, help='Path to the base rules file')
+    parser.add_argument('--generations', type=int, default=100, help='Number of generations to run each point')
+    parser.add_argument('--seeds', default='0', help='Comma separated seeds to run for each point')
+    parser.add_argument(
+        '--param',
+        action='append',
+        default=[],
+        help='Grid parameter as <RULE_PATH>=<VALUE>,<VALUE>,... (for example cells.CITY.air_pollution_grow_factor=0.05,0.08)'
+    )
+    parser.add_argument(
+        '--random',
+        action='append',
+        default=[],
+        help='Random search parameter as <RULE_PATH>=<LOW>:<HIGH>'
+    )
+    parser.add_argument('--samples', type=int, default=10, help='Number of random search samples')
+    parser.add_argument(
+        '--sample-seed',
+        type=int,
+        default=0,
+        help='Seed for the sampling of the random search, the same seed samples the same (cached) points'
+    )
+    parser.add_argument('--stop-when', action='append', default=[], help='Stop condition of each point run')
+    parser.add_argument('--workers', type=int, default=None, help='Number of worker processes')
+    parser.add_argument('--cache-dir', default='sweep_cache', help='Path to the results cache directory')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    arguments = parse_arguments()
+    seeds = [int(seed) for seed in arguments.seeds.split(',')]
+    base_rule_set = RuleSet.load(arguments.rules)
+
+    # The values keep the types of the base rules, so int rules (like wind.affect_speed_factor) are swept as ints
+    grid_parameters = {
+        path: [ParameterSweep.parse_value(base_rule_set, path, value) for value in values.split(',')]
+        for path, values in (parameter.split('=') for parameter in arguments.param)
+    }
+    random_parameters = {
+        path: tuple(ParameterSweep.parse_value(base_rule_set, path, bound) for bound in value_range.split(':'))
+        for path, value_range in (parameter.split('=') for parameter in arguments.random)
+    }
+
+    sweep_points = ParameterSweep.grid_points(grid_parameters, seeds) if grid_parameters else []
+
+    if random_parameters:
+        sweep_points += ParameterSweep.random_points(
+            random_parameters,
+            arguments.samples,
+            seeds,
+            sample_seed=arguments.sample_seed
+        )
+
+    parameter_sweep = ParameterSweep(
+        world_file_path=arguments.world,
+        rule_set=base_rule_set,
+        num_generations=arguments.generations,
+        stop_conditions=arguments.stop_when,
+        cache_dir=arguments.cache_dir
+    )
+
+    for sweep_result in parameter_sweep.run(sweep_points or [({}, seed) for seed in seeds], arguments.workers):
+        print(dumps({**sweep_result, 'sample_seed': arguments.sample_seed} if random_parameters else sweep_result))
@@ -0,0 +1,232 @@
+import numpy as np
+
+from world_observer import WorldObserver
+from direction_matrix import DirectionMatrix
+
+
+class WorldArrays(WorldObserver):
+    """
+    Represent the world cells state as arrays (one array for each cell property).
+    The arrays are kept in sync with the world cells by observing their changes.
+
+    Wind direction is stored as index in DirectionMatrix.get_all_directions(), and missing wind
+    or cloud are stored as -1.
+    """
+    fields = ['cell_type', 'temp', 'air_pollution', 'wind_direction', 'wind_speed', 'cloud_precipitation']
+
+    def __init__(self, num_rows, num_cols):
+        """
+        Creates empty world arrays in the given dimensions.
+
+        :param num_rows: Number of rows in the world grid
+        :param num_cols: Number of columns in the world grid
+        """
+        self.__shape = (num_rows, num_cols)
+        self.__cell_type = np.zeros(self.__shape, dtype=np.int8)
+        self.__temp = np.zeros(self.__shape, dtype=np.float64)
+        self.__air_pollution = np.zeros(self.__shape, dtype=np.float64)
+        self.__wind_direction = np.full(self.__shape, -1, dtype=np.int8)
+        self.__wind_speed = np.zeros(self.__shape, dtype=np.int16)
+        self.__cloud_precipitation = np.full(self.__shape, -1, dtype=np.int16)
+        self.__directions = {
+            direction: direction_index
+            for direction_index, direction in enumerate(DirectionMatrix.get_all_directions())
+        }
+
+        # Increased on each change, so consumers can know when the arrays changed
+        self.__version = 0
+
+    @classmethod
+    def from_world_grid(cls, world_grid):
+        """
+        Creates world arrays from existing world grid
+
+        :param world_grid: World grid matrix of cells
+        :return: World arrays containing the world grid state
+        """
+        world_arrays = cls(len(world_grid), len(world_grid[0]))
+
+        for row_index in range(len(world_grid)):
+            for col_index in range(len(world_grid[row_index])):
+                world_arrays.cell_added((row_index, col_index), world_grid[row_index][col_index])
+
+        return world_arrays
+
+    @property
+    def shape(self):
+        """
+        Getter for the shape of the arrays
+
+        :return: (num_rows, num_cols) of the world
+        """
+        return self.__shape
+
+    @property
+    def version(self):
+        """
+        Getter for the version of the arrays, which changes on every change
+
+        :return: Version number
+        """
+        return self.__version
+
+    @property
+    def cell_type(self):
+        """
+        Getter for the cell types array (values of CellTypes)
+
+        :return: Cell types array
+        """
+        return self.__cell_type
+
+    @property
+    def temp(self):
+        """
+        Getter for the temperatures array
+
+        :return: Temperatures array
+        """
+        return self.__temp
+
+    @property
+    def air_pollution(self):
+        """
+        Getter for the air pollution array
+
+        :return: Air pollution array
+        """
+        return self.__air_pollution
+
+    @property
+    def wind_direction(self):
+        """
+        Getter for the wind directions array (-1 where there's no wind)
+
+        :return: Wind directions array
+        """
+        return self.__wind_direction
+
+    @property
+    def wind_speed(self):
+        """
+        Getter for the wind speeds array (0 where there's no wind)
+
+        :return: Wind speeds array
+        """
+        return self.__wind_speed
+
+    @property
+    def cloud_precipitation(self):
+        """
+        Getter for the clouds precipitation array (-1 where there's no cloud)
+
+        :return: Clouds precipitation array
+        """
+        return self.__cloud_precipitation
+
+    def cell_added(self, location, cell_instance):
+        self.__cell_type[location] = cell_instance.type.value
+        self.__temp[location] = cell_instance.temp
+        self.__air_pollution[location] = cell_instance.air_pollution
+        self.__set_wind(location, cell_instance.wind)
+        self.__set_cloud(location, cell_instance.cloud)
+        self.__version += 1
+
+    def cell_changed(self, location, field, old_value, new_value):
+        if field == 'temp':
+            self.__temp[location] = new_value
+            self.__version += 1
+        elif field == 'air_pollution':
+            self.__air_pollution[location] = new_value
+            self.__version += 1
+        elif field == 'wind':
+            self.__set_wind(location, new_value)
+            self.__version += 1
+        elif field == 'cloud':
+            self.__set_cloud(location, new_value)
+            self.__version += 1
+        elif field == 'precipitation':
+            self.__cloud_precipitation[location] = new_value
+            self.__version += 1
+
+    def __set_wind(self, location, wind_instance):
+        """
+        Sets the wind arrays values of a location
+
+        :param location: (row, col) location of the cell
+        :param wind_instance: Wind instance of the cell or None
+        """
+        if wind_instance is None:
+            self.__wind_direction[location] = -1
+            self.__wind_speed[location] = 0
+        else:
+            self.__wind_direction[location] = self.__directions[wind_instance.direction]
+            self.__wind_speed[location] = wind_instance.speed
+
+    def __set_cloud(self, location, cloud_instance):
+        """
+        Sets the cloud array value of a location
+
+        :param location: (row, col) location of the cell
+        :param cloud_instance: Cloud instance of the cell or None
+        """
+        self.__cloud_precipitation[location] = -1 if cloud_instance is None else cloud_instance.precipitation
+
+
+class GenerationView:
+    """
+    Represent read only view of the world state of a generation, as arrays of the requested fields only.
+    The arrays are not copies: they reflect the state of the automaton as long as it stays in the generation
+    of the view, so consumers which keep views beyond it should keep copies of them (see copy()).
+    """
+
+    def __init__(self, generation, field_arrays):
+        """
+        Creates generation view.
+
+        :param generation: The generation of the view
+        :param field_arrays: Dictionary of read only arrays of the fields by their names
+        """
+        self.__generation = generation
+        self.__field_arrays = field_arrays
+
+    @property
+    def generation(self):
+        """
+        Getter for the generation of the view
+
+        :return: Generation number
+        """
+        return self.__generation
+
+    @property
+    def fields(self):
+        """
+        Getter for the names of the fields in the view
+
+        :return: List of field names
+        """
+        return list(self.__field_arrays)
+
+    def __getattr__(self, field):
+        # Only the fields are looked up here, the private attributes are found before it's called
+        if field.startswith('_'):
+            raise AttributeError(field)
+
+        try:
+            return self.__field_arrays[field]
+        except KeyError:
+            raise AttributeError(f'Unknown field in generation view given "{field}".') from None
+
+    def copy(self):
+        """
+        Creates copy of the view, which keeps the state of its generation
+
+        :return: Generation view with copies of the arrays
+        """
+        field_arrays = {field: field_values.copy() for field, field_values in self.__field_arrays.items()}
+
+        for field_values in field_arrays.values():
+            field_values.flags.writeable = False
+
+        return GenerationView(self.__generation, field_arrays)
@@ -0,0 +1,145 @@
+class WorldObserver:
+    """
+    Represent an observer of the world cells changes.
+    Subclasses override only the events they are interested in.
+    """
+
+    def cell_added(self, location, cell_instance):
+        """
+        Called when a cell is placed in the world grid.
+
+        :param location: (row, col) location of the cell
+        :param cell_instance: The cell instance placed
+        """
+        pass
+
+    def cell_removed(self, location, cell_instance):
+        """
+        Called when a cell is removed from the world grid.
+
+        :param location: (row, col) location of the cell
+        :param cell_instance: The cell instance removed
+        """
+        pass
+
+    def cell_replaced(self, location, old_cell_instance, new_cell_instance):
+        """
+        Called when a cell is replaced by another cell (cell type change).
+        As default, it behaves as removing the old cell and adding the new one.
+
+        :param location: (row, col) location of the cell
+        :param old_cell_instance: The cell instance which was replaced
+        :param new_cell_instance: The cell instance which replaced the old one
+        """
+        self.cell_removed(location, old_cell_instance)
+        self.cell_added(location, new_cell_instance)
+
+    def cell_changed(self, location, field, old_value, new_value):
+        """
+        Called when a property of a cell changes.
+
+        :param location: (row, col) location of the cell
+        :param field: The name of the property changed (temp, air_pollution, wind, cloud, precipitation)
+        :param old_value: The value before the change
+        :param new_value: The value after the change
+        """
+        pass
+
+    def generation_passed(self, generation):
+        """
+        Called when the whole world passed a generation.
+
+        :param generation: The new generation number
+        """
+        pass
+
+
+class WorldObserverGroup(WorldObserver):
+    """
+    Dispatches the world events to a group of observers.
+    Each event is only dispatched to the observers which override it, so
+    not interested observers don't cost anything on the hot path.
+    """
+    __events = ['cell_added', 'cell_removed', 'cell_replaced', 'cell_changed', 'generation_passed']
+
+    def __init__(self):
+        self.__observers = []
+        self.__event_observers = {event: [] for event in WorldObserverGroup.__events}
+
+        # Rule counters the cells of the group count the rules they fire into, None when not counting
+        self.rule_counters = None
+
+    @property
+    def observers(self):
+        """
+        Getter for the observers in the group
+
+        :return: List of the observers
+        """
+        return list(self.__observers)
+
+    def add(self, observer):
+        """
+        Adds observer to the group
+
+        :param observer: Observer instance to add
+        """
+        self.__observers.append(observer)
+        self.__update_event_observers()
+
+    def remove(self, observer):
+        """
+        Removes observer from the group
+
+        :param observer: Observer instance to remove
+        """
+        self.__observers.remove(observer)
+        self.__update_event_observers()
+
+    def cell_added(self, location, cell_instance):
+        for observer in self.__event_observers['cell_added']:
+            observer.cell_added(location, cell_instance)
+
+    def cell_removed(self, location, cell_instance):
+        for observer in self.__event_observers['cell_removed']:
+            observer.cell_removed(location, cell_instance)
+
+    def cell_replaced(self, location, old_cell_instance, new_cell_instance):
+        for observer in self.__event_observers['cell_replaced']:
+            observer.cell_replaced(location, old_cell_instance, new_cell_instance)
+
+    def cell_changed(self, location, field, old_value, new_value):
+        for observer in self.__event_observers['cell_changed']:
+            observer.cell_changed(location, field, old_value, new_value)
+
+    def generation_passed(self, generation):
+        for observer in self.__event_observers['generation_passed']:
+            observer.generation_passed(generation)
+
+    def __update_event_observers(self):
+        """
+        Rebuilds the observers list of each event by the events each observer overrides
+        """
+        for event in WorldObserverGroup.__events:
+            self.__event_observers[event] = [
+                observer for observer in self.__observers
+                if WorldObserverGroup.__overrides_event(observer, event)
+            ]
+
+    @staticmethod
+    def __overrides_event(observer, event):
+        """
+        Checks if the observer overrides the given event (or inherits override of it)
+
+        :param observer: Observer instance to check
+        :param event: The event name
+        :return: True if the observer handles the event, Otherwise False
+        """
+        observer_handler = getattr(type(observer), event, None)
+
+        # Replaced event is handled by the removed and added events as default
+        if event == 'cell_replaced' and observer_handler is WorldObserver.cell_replaced:
+            return WorldObserverGroup.__overrides_event(observer, 'cell_added') or \
+                WorldObserverGroup.__overrides_event(observer, 'cell_removed')
+
+        return observer_handler is not None and observer_handler is not getattr(WorldObserver, event)
@@ -0,0 +1,135 @@
+class WorldTile:
+    """
+    Represent square tile of world cells which may be shared by several branches of the automaton.
+    """
+
+    def __init__(self, observers):
+        """
+        Creates tile held by single branch.
+
+        :param observers: The world observers the cells of the tile are attached to
+        """
+        self.holders = 1
+        self.observers = observers
+
+
+class WorldTiles:
+    """
+    Tracks which tiles of the world grid a branch of the automaton shares with other branches.
+    Shared tiles are copied by the branch right before it writes to them (copy on write), so branches
+    forked from each other cost memory proportional to the tiles they changed.
+    """
+
+    def __init__(self, num_rows, num_cols, observers, tile_size=8, tiles=None):
+        """
+        Creates world tiles of a branch.
+
+        :param num_rows: Number of rows in the world grid
+        :param num_cols: Number of columns in the world grid
+        :param observers: The world observers of the branch, which the cells it writes to are attached to
+        :param tile_size: Size in cells of the square tiles
+        :param tiles: Matrix of the tiles to share, None for new tiles held only by this branch
+        """
+        self.__shape = (num_rows, num_cols)
+        self.__observers = observers
+        self.__tile_size = tile_size
+        self.__tiles = tiles or [
+            [WorldTile(observers) for _ in range(0, num_cols, tile_size)]
+            for _ in range(0, num_rows, tile_size)
+        ]
+
+    @property
+    def tile_size(self):
+        """
+        Getter for the size in cells of the tiles
+
+        :return: Tile size
+        """
+        return self.__tile_size
+
+    @property
+    def num_shared_tiles(self):
+        """
+        Getter for the number of tiles this branch shares with other branches
+
+        :return: Number of shared tiles
+        """
+        return sum(tile.holders > 1 for tiles_row in self.__tiles for tile in tiles_row)
+
+    def share(self, observers):
+        """
+        Shares all the tiles with new branch
+
+        :param observers: The world observers of the new branch
+        :return: World tiles of the new branch
+        """
+        for tiles_row in self.__tiles:
+            for tile in tiles_row:
+                tile.holders += 1
+
+        return WorldTiles(
+            *self.__shape,
+            observers,
+            self.__tile_size,
+            [list(tiles_row) for tiles_row in self.__tiles]
+        )
+
+    def release(self):
+        """
+        Releases all the tiles of the branch, once it's no longer used
+        """
+        for tiles_row in self.__tiles:
+            for tile in tiles_row:
+                tile.holders -= 1
+
+    def own(self, row_index, col_index, world_grid):
+        """
+        Makes the tile of a cell writable by this branch, copying its cells if it's shared
+
+        :param row_index: Row of the cell
+        :param col_index: Column of the cell
+        :param world_grid: World grid matrix of this branch
+        """
+        (tile_row, tile_col) = (row_index // self.__tile_size, col_index // self.__tile_size)
+        tile = self.__tiles[tile_row][tile_col]
+
+        if tile.holders == 1 and tile.observers is self.__observers:
+            return
+
+        if tile.holders > 1:
+            tile.holders -= 1
+            self.__tiles[tile_row][tile_col] = WorldTile(self.__observers)
+            self.__attach_tile_cells(tile_row, tile_col, world_grid, copy_cells=True)
+        else:
+            # The other branches released the tile, so its cells only need to notify this branch from now on
+            tile.observers = self.__observers
+            self.__attach_tile_cells(tile_row, tile_col, world_grid, copy_cells=False)
+
+    def own_all(self, world_grid):
+        """
+        Makes all the tiles writable by this branch, copying the shared ones
+
+        :param world_grid: World grid matrix of this branch
+        """
+        for tile_row, tiles_row in enumerate(self.__tiles):
+            for tile_col, tile in enumerate(tiles_row):
+                if tile.holders > 1 or tile.observers is not self.__observers:
+                    self.own(tile_row * self.__tile_size, tile_col * self.__tile_size, world_grid)
+
+    def __attach_tile_cells(self, tile_row, tile_col, world_grid, copy_cells):
+        """
+        Attaches the cells of a tile to the world observers of this branch
+
+        :param tile_row: Row of the tile
+        :param tile_col: Column of the tile
+        :param world_grid: World grid matrix of this branch
+        :param copy_cells: Whether to replace the cells with copies of them first
+        """
+        (num_rows, num_cols) = self.__shape
+
+        for row_index in range(tile_row * self.__tile_size, min((tile_row + 1) * self.__tile_size, num_rows)):
+            for col_index in range(tile_col * self.__tile_size, min((tile_col + 1) * self.__tile_size, num_cols)):
+                if copy_cells:
+                    world_grid[row_index][col_index] = world_grid[row_index][col_index].copy()
+
+                world_grid[row_index][col_index].attach_observer(self.__observers, (row_index, col_index))